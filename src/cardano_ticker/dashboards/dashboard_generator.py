@@ -1,3 +1,6 @@
+import logging
+
+from cardano_ticker.data_fetcher.data_plan import DataPlan
 from cardano_ticker.utils.currency import currency_from_str
 from cardano_ticker.widgets.generic.w_text import (
     DateTimeWidget,
@@ -28,12 +31,19 @@ from cardano_ticker.widgets.w_portfolio_charts import (
     PortfolioValueChart,
     TreemapWidget,
 )
-from cardano_ticker.data_fetcher.portfolio_fetcher import PortfolioDataFetcher
+from cardano_ticker.data_fetcher.portfolio_fetcher import HOLDINGS_TTL, PortfolioFetcherRegistry
 
 
 class DashboardGenerator:
-    def __init__(self, data_fetcher):
+    def __init__(self, data_fetcher, budget=None):
+        """
+        Initialize the generator
+        Args:
+            data_fetcher: The data fetcher shared by the widgets
+            budget: Optional RequestBudget pacing the data plans of the dashboards
+        """
         self.data_fetcher = data_fetcher
+        self.budget = budget
 
     def json_to_layout(self, data: dict) -> WidgetLayout:
         """
@@ -43,6 +53,8 @@ class DashboardGenerator:
         canvas_size = data["canvas_size"]
         background_color = data["background_color"] if "background_color" in data else "white"
         layout = WidgetLayout(canvas_size, background_color=background_color)
+        # portfolio fetchers shared by the widgets of this dashboard only
+        portfolio_fetchers = PortfolioFetcherRegistry()
 
         for widget_data in data["dashboard"]:
             widget_type = widget_data["type"]
@@ -104,6 +116,8 @@ class DashboardGenerator:
                     text_color=text_color,
                     increasing_line_color=inc_col,
                     decreasing_line_color=dec_col,
+                    days=widget_data["data"].get("days", 7),
+                    interval=widget_data["data"].get("interval", None),
                 )
             elif widget_type == "date_text":
                 # Get font_size from data if provided, otherwise use auto-adjust
@@ -196,10 +210,14 @@ class DashboardGenerator:
 
                 portfolio_fetcher = None
                 if api_url and api_key:
-                    portfolio_fetcher = PortfolioDataFetcher(
-                        api_base_url=api_url,
+                    portfolio_fetcher = portfolio_fetchers.get(
+                        api_url,
                         portfolio_id=portfolio_id,
-                        api_key=api_key
+                        api_key=api_key,
+                        quotes=data_fetcher.quotes,
+                        holdings_ttl=widget_data["data"].get("holdings_refresh_s", HOLDINGS_TTL),
+                        price_fetcher=data_fetcher.price_fetcher,
+                        quote_symbols=widget_data["data"].get("quote_symbols"),
                     )
 
                 widget = PortfolioSummaryWidget(
@@ -208,6 +226,7 @@ class DashboardGenerator:
                     background_color=background_color,
                     text_color=text_color,
                     font_size=font_size,
+                    local_valuation=widget_data["data"].get("local_valuation", False),
                 )
             elif widget_type == "allocation_donut_chart":
                 # Portfolio allocation donut chart
@@ -233,10 +252,14 @@ class DashboardGenerator:
                     ]
                 elif api_url and api_key:
                     # Connect to portfolio-tracker API with authentication
-                    portfolio_fetcher = PortfolioDataFetcher(
-                        api_base_url=api_url,
+                    portfolio_fetcher = portfolio_fetchers.get(
+                        api_url,
                         portfolio_id=portfolio_id,
-                        api_key=api_key
+                        api_key=api_key,
+                        quotes=data_fetcher.quotes,
+                        holdings_ttl=widget_data["data"].get("holdings_refresh_s", HOLDINGS_TTL),
+                        price_fetcher=data_fetcher.price_fetcher,
+                        quote_symbols=widget_data["data"].get("quote_symbols"),
                     )
 
                 widget = AllocationDonutChart(
@@ -251,6 +274,7 @@ class DashboardGenerator:
                     title=title,
                     btc_price=btc_price,
                     hide_value=hide_value,
+                    local_valuation=widget_data["data"].get("local_valuation", False),
                 )
             elif widget_type == "pnl_treemap":
                 # Portfolio gains/losses treemap (heatmap)
@@ -277,10 +301,14 @@ class DashboardGenerator:
                     ]
                 elif api_url and api_key:
                     # Connect to portfolio-tracker API with authentication
-                    portfolio_fetcher = PortfolioDataFetcher(
-                        api_base_url=api_url,
+                    portfolio_fetcher = portfolio_fetchers.get(
+                        api_url,
                         portfolio_id=portfolio_id,
-                        api_key=api_key
+                        api_key=api_key,
+                        quotes=data_fetcher.quotes,
+                        holdings_ttl=widget_data["data"].get("holdings_refresh_s", HOLDINGS_TTL),
+                        price_fetcher=data_fetcher.price_fetcher,
+                        quote_symbols=widget_data["data"].get("quote_symbols"),
                     )
 
                 widget = TreemapWidget(
@@ -293,6 +321,7 @@ class DashboardGenerator:
                     title=title,
                     padding=padding,
                     show_7d=show_7d,
+                    local_valuation=widget_data["data"].get("local_valuation", False),
                 )
             elif widget_type == "portfolio_value_chart":
                 # Portfolio value over time line chart
@@ -305,10 +334,14 @@ class DashboardGenerator:
 
                 portfolio_fetcher = None
                 if api_url and api_key:
-                    portfolio_fetcher = PortfolioDataFetcher(
-                        api_base_url=api_url,
+                    portfolio_fetcher = portfolio_fetchers.get(
+                        api_url,
                         portfolio_id=portfolio_id,
-                        api_key=api_key
+                        api_key=api_key,
+                        quotes=data_fetcher.quotes,
+                        holdings_ttl=widget_data["data"].get("holdings_refresh_s", HOLDINGS_TTL),
+                        price_fetcher=data_fetcher.price_fetcher,
+                        quote_symbols=widget_data["data"].get("quote_symbols"),
                     )
 
                 widget = PortfolioValueChart(
@@ -320,11 +353,20 @@ class DashboardGenerator:
                     font_size=font_size,
                     title=title,
                     days=days,
+                    local_history=widget_data["data"].get("local_history", False),
                 )
             else:
                 raise ValueError(f"Widget type {widget_type} not found")
 
             layout.add_widget(widget, position)
+
+        # collect the data needs of every widget, so each frame fetches them in one planned step
+        data_plan = DataPlan(layout.widgets, budget=self.budget)
+        logging.info(
+            f"Data plan: {len(data_plan.requests)} unique requests for {len(data_plan.widgets)} of "
+            f"{len(layout.widgets)} widgets"
+        )
+        layout.set_data_plan(data_plan)
         return layout
 
     @staticmethod
@@ -9,7 +9,7 @@ import threading
 import time
 
 from blockfrost import ApiError
-from flask import Flask, send_file
+from flask import Flask, jsonify, send_file
 
 from cardano_ticker.dashboards.config import read_config
 from cardano_ticker.dashboards.dashboard_commands import (
@@ -17,7 +17,11 @@ from cardano_ticker.dashboards.dashboard_commands import (
     DashboardResponses,
 )
 from cardano_ticker.dashboards.dashboard_generator import DashboardGenerator
+from cardano_ticker.data_fetcher.blockfrost_client import LOCAL_CHAIN_URL
 from cardano_ticker.data_fetcher.data_fetcher import DataFetcher
+from cardano_ticker.data_fetcher.http_session import get_shared_session
+from cardano_ticker.data_fetcher.persistent_cache import PersistentCache
+from cardano_ticker.data_fetcher.request_budget import RequestBudget
 from cardano_ticker.utils.constants import RESOURCES_DIR
 
 sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__))))
@@ -45,9 +49,30 @@ class DashboardManager:
         self.dashboard_dir = self.config.get("dashboard_path", SAMPLES_DIR) or SAMPLES_DIR
         logging.info(f"Dashboard directory: {self.dashboard_dir}")
 
-        # Create data fetcher and dashboard generator
-        self.fetcher = DataFetcher(blockfrost_project_id=self.config["blockfrost_project_id"])
-        self.dashboard_generator = DashboardGenerator(self.fetcher)
+        # Create the shared HTTP session, data fetcher and dashboard generator
+        self.session = get_shared_session(
+            timeout=self.config.get("http_timeout_s", 5),
+            host_pool_sizes=self.config.get("http_pool_sizes", None),
+        )
+        # Last known data survives restarts, so the first frame does not wait for the network
+        self.cache = PersistentCache(
+            os.path.join(self.output_dir, "ticker_cache.sqlite"),
+            max_bytes=int(self.config.get("cache_max_mb", 16) * 1024 * 1024),
+        )
+        self.fetcher = DataFetcher(
+            blockfrost_project_id=self.config["blockfrost_project_id"],
+            hedge_delay=self.config.get("hedge_delay_s", None),
+            session=self.session,
+            cache=self.cache,
+            pool_index_path=os.path.join(self.output_dir, "pool_index.sqlite"),
+            pool_history_dir=os.path.join(self.output_dir, "pool_history"),
+            chain_backends=self.config.get("chain_backends", ["blockfrost"]),
+            chain_hedge_delay=self.config.get("chain_hedge_delay_s", None),
+            local_chain_url=self.config.get("local_chain_url", LOCAL_CHAIN_URL),
+        )
+        # daily request budgets, stretching the refresh of the providers that would exceed theirs
+        self.budget = RequestBudget(self.refresh_interval_s, self.config.get("daily_request_budgets", None))
+        self.dashboard_generator = DashboardGenerator(self.fetcher, budget=self.budget)
         self.current_dashboard = None
         self.mutex = threading.Lock()
         self.last_image = None
@@ -77,6 +102,13 @@ class DashboardManager:
                 return "No black-and-white image available", 404
             return send_file(bw_image_path, mimetype='image/bmp')
 
+        @self.app.route('/provider-health')
+        def get_provider_health():
+            """
+            HTTP Endpoint to serve the health of the data providers.
+            """
+            return jsonify({**self.fetcher.provider_health(), "request_budget": self.budget.snapshot()})
+
     def __get_dashboard_file_from_config(self):
         """
         Get the dashboard file from the configuration.
@@ -140,6 +172,14 @@ class DashboardManager:
 
         logging.info(f"Black & white dashboard image saved at: {bw_image_path}")
 
+        stats = self.session.connection_stats()
+        logging.info(
+            f"HTTP connections: {stats['requests']} requests, {stats['reused_connections']} reused, "
+            f"{stats['new_connections']} new"
+        )
+        flight = self.fetcher.flight.stats()
+        logging.info(f"Data calls: {flight['calls']} fetched, {flight['coalesced']} coalesced")
+
     def render_loop(self):
         """
         Main loop to periodically update the dashboard image.
@@ -152,7 +192,12 @@ class DashboardManager:
         if self.current_dashboard is None:
             raise ValueError("Dashboard could not be created.")
 
+        stale_served = self.cache.stale_served
         self.update_frame()
+        if self.cache.stale_served > stale_served:
+            # the first frame used data from the previous run, render a fresh one as soon as possible
+            logging.info("First frame rendered from the persistent cache, scheduling a fresh one")
+            self.last_update_time = time.time() - self.refresh_interval_s
 
         while True:
             now = time.time()
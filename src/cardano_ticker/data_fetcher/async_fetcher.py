@@ -0,0 +1,122 @@
+"""
+Asyncio counterparts of the data fetchers.
+
+The blocking calls of the sync fetchers run on a shared thread pool, so any number of them can be awaited
+concurrently from one event loop while the caches and the pooled HTTP session stay shared with the sync API.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_fetch_executor():
+    """
+    Get the thread pool running the blocking fetches, created on first use
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="async_fetcher")
+        return _executor
+
+
+class AsyncFetcherWrapper:
+    def __init__(self, fetcher, executor=None):
+        """
+        Initialize the wrapper
+        Args:
+            fetcher: The sync fetcher doing the actual work
+            executor: The executor running the blocking calls, defaults to the shared fetch executor
+        """
+        self.fetcher = fetcher
+        self._executor = executor
+
+    async def _run(self, func, *args, **kwargs):
+        """
+        Run a blocking fetcher method without blocking the event loop
+        """
+        loop = asyncio.get_running_loop()
+        executor = self._executor or get_fetch_executor()
+        return await loop.run_in_executor(executor, partial(func, *args, **kwargs))
+
+
+class AsyncCryptoPriceFetcher(AsyncFetcherWrapper):
+    async def get_realtime(self, symbol, currency):
+        return await self._run(self.fetcher.get_realtime, symbol, currency)
+
+    async def get_realtime_many(self, pairs):
+        return await self._run(self.fetcher.get_realtime_many, list(pairs))
+
+    async def get_chart_data(self, symbol, currency, days=7, require_ohlc=True):
+        return await self._run(self.fetcher.get_chart_data, symbol, currency, days, require_ohlc)
+
+    async def get_candles(self, symbol, currency, days, width=None, interval=None):
+        return await self._run(self.fetcher.get_candles, symbol, currency, days, width, interval)
+
+
+class AsyncDataFetcher(AsyncFetcherWrapper):
+    async def get_realtime(self, symbol, currency):
+        return await self._run(self.fetcher.get_realtime, symbol, currency)
+
+    async def get_realtime_many(self, pairs):
+        return await self._run(self.fetcher.get_realtime_many, list(pairs))
+
+    async def get_chart_data(self, symbol, currency, days=7, require_ohlc=True):
+        return await self._run(self.fetcher.get_chart_data, symbol, currency, days, require_ohlc)
+
+    async def get_candles(self, symbol, currency, days, width=None, interval=None):
+        return await self._run(self.fetcher.get_candles, symbol, currency, days, width, interval)
+
+    async def pool(self, pool_id):
+        return await self._run(self.fetcher.pool, pool_id)
+
+    async def pool_history(self, pool_id):
+        return await self._run(self.fetcher.pool_history, pool_id)
+
+    async def pool_name_and_ticker(self, pool_id):
+        return await self._run(self.fetcher.pool_name_and_ticker, pool_id)
+
+    async def network(self):
+        return await self._run(self.fetcher.network)
+
+    async def cardano_transactions_data(self):
+        return await self._run(self.fetcher.cardano_transactions_data)
+
+    async def blockchain_stats(self):
+        return await self._run(self.fetcher.blockchain_stats)
+
+    async def epoch_progress(self):
+        return await self._run(self.fetcher.epoch_progress)
+
+
+class AsyncPortfolioDataFetcher(AsyncFetcherWrapper):
+    async def fetch_from_ticker_api(self):
+        return await self._run(self.fetcher.fetch_from_ticker_api)
+
+    async def get_snapshot(self, local=False):
+        return await self._run(self.fetcher.get_snapshot, local)
+
+    async def fetch_portfolio_history(self, days=7):
+        return await self._run(self.fetcher.fetch_portfolio_history, days)
+
+    async def get_local_history(self, days=7):
+        return await self._run(self.fetcher.get_local_history, days)
+
+    async def get_eur_rate(self, refresh=False):
+        return await self._run(self.fetcher.get_eur_rate, refresh)
+
+    async def get_holdings(self, refresh=False):
+        return await self._run(self.fetcher.get_holdings, refresh)
+
+    async def get_allocation_data(self, refresh=False, local=False):
+        return await self._run(self.fetcher.get_allocation_data, refresh, local)
+
+    async def get_pnl_data(self, refresh=False, local=False):
+        return await self._run(self.fetcher.get_pnl_data, refresh, local)
+
+    async def get_performance_7d_data(self, refresh=False, local=False):
+        return await self._run(self.fetcher.get_performance_7d_data, refresh, local)
@@ -0,0 +1,167 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from blockfrost import ApiError, ApiUrls
+
+from cardano_ticker.data_fetcher.chain_backend import ChainBackend, api_error
+from cardano_ticker.data_fetcher.http_session import get_shared_session
+from cardano_ticker.data_fetcher.rate_limiter import TokenBucket
+
+logging.basicConfig(level=logging.INFO)
+
+# Blockfrost allows 10 requests per second per project
+BLOCKFROST_RATE = 10
+BLOCKFROST_PAGE_SIZE = 100
+# Default url of a local server speaking the Blockfrost API
+LOCAL_CHAIN_URL = "http://localhost:3000"
+
+
+class BlockfrostClient(ChainBackend):
+    """
+    Thin Blockfrost client with the same method names and arguments as the BlockFrostApi calls used by the fetchers,
+    always returning JSON.
+    Requests go through the pooled, gzip-enabled HTTP session and a token bucket keeping below the rate limit.
+    With gather_pages=True, the pages after the first one are fetched max_workers at a time instead of one by one.
+    Failed requests raise blockfrost.ApiError, as the SDK does, with no status code for transport errors.
+    """
+
+    name = "blockfrost"
+
+    def __init__(
+        self,
+        project_id,
+        base_url=ApiUrls.mainnet.value,
+        api_version="v0",
+        session=None,
+        max_workers=4,
+        rate=BLOCKFROST_RATE,
+        burst=BLOCKFROST_RATE,
+    ):
+        """
+        Initialize the client
+        Args:
+            project_id: The Blockfrost project id
+            base_url: The API url, mainnet by default
+            api_version: The API version, empty if the API is served at base_url
+            session: The HttpSession sending the requests, the shared session by default
+            max_workers: Number of pages fetched concurrently
+            rate: Sustained requests per second
+            burst: Requests that can be sent at once after a quiet period
+        """
+        self.url = f"{base_url}/{api_version}" if api_version else base_url
+        self.session = session or get_shared_session()
+        self.max_workers = max_workers
+        self.limiter = TokenBucket(rate, burst)
+        self._headers = {"project_id": project_id}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="blockfrost")
+        self._calls_lock = threading.Lock()
+        self.calls = 0
+
+    def _get(self, path, **params):
+        self.limiter.acquire()
+        with self._calls_lock:
+            self.calls += 1
+        try:
+            response = self.session.get(
+                f"{self.url}/{path}",
+                params={name: value for name, value in params.items() if value is not None},
+                headers=self._headers,
+            )
+        except requests.RequestException as e:
+            # timeouts and connection errors have no status code
+            raise api_error(None, str(e)) from e
+        if response.status_code != 200:
+            raise ApiError(response)
+        return response.json()
+
+    def _list(self, path, count=BLOCKFROST_PAGE_SIZE, page=1, order=None, gather_pages=False, return_type=None):
+        """
+        Get a paged listing
+        Args:
+            path: The endpoint path
+            count: Number of items per page
+            page: The page to get, or the first one with gather_pages
+            order: "asc" or "desc", the API default (asc) if None
+            gather_pages: Get every page from page to the last one
+            return_type: Ignored, the items are always JSON
+        """
+        items = self._get(path, count=count, page=page, order=order)
+        if not gather_pages or len(items) < count:
+            return items
+
+        # the length of the listing is unknown, fetch the next pages a batch at a time until one is not full
+        page += 1
+        while True:
+            pages = range(page, page + self.max_workers)
+            batch = list(self._executor.map(lambda p: self._get(path, count=count, page=p, order=order), pages))
+            for page_items in batch:
+                items.extend(page_items)
+                if len(page_items) < count:
+                    return items
+            page += self.max_workers
+
+    def epoch_latest(self, return_type=None):
+        return self._get("epochs/latest")
+
+    def network(self, return_type=None):
+        return self._get("network")
+
+    def block_latest(self, return_type=None):
+        return self._get("blocks/latest")
+
+    def blocks_next(self, hash_or_number, **kwargs):
+        return self._list(f"blocks/{hash_or_number}/next", **kwargs)
+
+    def blocks_previous(self, hash_or_number, **kwargs):
+        return self._list(f"blocks/{hash_or_number}/previous", **kwargs)
+
+    def pool(self, pool_id, return_type=None):
+        return self._get(f"pools/{pool_id}")
+
+    def pool_metadata(self, pool_id, return_type=None):
+        return self._get(f"pools/{pool_id}/metadata")
+
+    def pool_history(self, pool_id, **kwargs):
+        return self._list(f"pools/{pool_id}/history", **kwargs)
+
+    def pool_delegators(self, pool_id, **kwargs):
+        return self._list(f"pools/{pool_id}/delegators", **kwargs)
+
+    def pools(self, **kwargs):
+        return self._list("pools", **kwargs)
+
+    def pools_extended(self, **kwargs):
+        return self._list("pools/extended", **kwargs)
+
+    def pools_retired(self, **kwargs):
+        return self._list("pools/retired", **kwargs)
+
+
+class LocalHttpBackend(BlockfrostClient):
+    """
+    Blockfrost API served by a local HTTP server, like a self-hosted Blockfrost backend or a fake serving
+    recorded answers to test the chain widgets. No project id and no rate limit.
+    """
+
+    name = "local"
+
+    def __init__(self, base_url=LOCAL_CHAIN_URL, api_version="", session=None, max_workers=4):
+        """
+        Initialize the backend
+        Args:
+            base_url: Url of the local server
+            api_version: The API version, empty if the API is served at base_url
+            session: The HttpSession sending the requests, the shared session by default
+            max_workers: Number of pages fetched concurrently
+        """
+        super().__init__(
+            "",
+            base_url=base_url,
+            api_version=api_version,
+            session=session,
+            max_workers=max_workers,
+            rate=1000,
+            burst=1000,
+        )
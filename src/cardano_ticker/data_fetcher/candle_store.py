@@ -0,0 +1,202 @@
+import logging
+import math
+import threading
+import time
+
+import pandas as pd
+
+logging.basicConfig(level=logging.INFO)
+
+# Candle intervals supported by the store, in seconds, finest first
+INTERVAL_SECONDS = {
+    "1m": 60,
+    "15m": 15 * 60,
+    "1h": 60 * 60,
+    "1d": 24 * 60 * 60,
+}
+
+# Number of candles kept per interval: fine candles only cover the recent past, coarse ones go back further
+INTERVAL_MAX_CANDLES = {
+    "1m": 24 * 60,  # 1 day
+    "15m": 14 * 24 * 4,  # 14 days
+    "1h": 90 * 24,  # 90 days
+    "1d": 3 * 365,  # 3 years
+}
+
+# Each interval is rolled up into the next coarser one
+ROLLUPS = {
+    "1m": "15m",
+    "15m": "1h",
+    "1h": "1d",
+}
+
+
+def pick_interval(days, width, pixels_per_candle=3):
+    """
+    Pick the finest candle interval that keeps about one candle per few pixels of the chart
+    Args:
+        days: Length of the chart window in days
+        width: Width of the chart in pixels
+        pixels_per_candle: Minimum number of pixels per candle
+    Returns the interval, the coarsest one if even that gives too many candles
+    """
+    max_candles = max(width // pixels_per_candle, 1)
+    for interval, step in INTERVAL_SECONDS.items():
+        if days * 24 * 60 * 60 / step <= max_candles:
+            return interval
+    return list(INTERVAL_SECONDS)[-1]
+
+
+def candle_count(days, interval):
+    """
+    Get the number of candles of an interval covering a window of days
+    """
+    return max(math.ceil(days * 24 * 60 * 60 / INTERVAL_SECONDS[interval]), 1)
+
+
+def rollup(df, interval):
+    """
+    Aggregate candles into candles of a coarser interval
+    Only the coarse candles whose start is covered by the given candles are returned, the last one may be in progress
+    Args:
+        df: The candles, indexed by open time
+        interval: The coarser interval
+    """
+    step = INTERVAL_SECONDS[interval]
+    df = df.sort_index()
+    coarse = df.resample(f"{step}s", label="left", closed="left").agg(
+        {"open": "first", "high": "max", "low": "min", "close": "last"}
+    )
+    coarse = coarse.dropna()
+    # a bucket starting before the first fine candle is incomplete
+    return coarse[coarse.index >= df.index[0]][["high", "low", "open", "close"]]
+
+
+class CandleStore:
+    """
+    Local copy of the OHLC candles fetched for each (symbol, currency, interval).
+    Once a series is stored only the candles newer than the last stored one are fetched: the last stored candle
+    is fetched again, as it was still in progress, and replaced by the new version.
+    Any window up to max_candles candles is then served from the local copy.
+
+    The intervals form a pyramid: candles merged into a series are rolled up into the coarser series of the same
+    pair, so a fresh fine series keeps the in-progress coarse candles up to date without fetching them.
+    """
+
+    def __init__(self, max_candles=None, cache=None):
+        """
+        Initialize the store
+        Args:
+            max_candles: Number of candles kept per series, older ones are dropped, defaults to INTERVAL_MAX_CANDLES
+            cache: Optional PersistentCache keeping the candles across restarts
+        """
+        self.max_candles = max_candles
+        self.cache = cache
+        self._candles = {}
+        self._updated = {}
+        self._lock = threading.Lock()
+
+    def limit(self, interval):
+        """
+        Get the number of candles kept for an interval
+        """
+        return self.max_candles or INTERVAL_MAX_CANDLES[interval]
+
+    @staticmethod
+    def _cache_key(key):
+        return "candles:{}:{}:{}".format(*key)
+
+    def _get(self, key):
+        """
+        Get the stored candles of a series, loading them from the persistent cache on first use
+        Must be called with the lock held
+        """
+        if key not in self._candles:
+            entry = self.cache.get(self._cache_key(key)) if self.cache is not None else None
+            self._candles[key] = entry[0] if entry is not None else None
+        return self._candles[key]
+
+    def fetch_plan(self, symbol, currency, interval, count, max_age=0, now=None):
+        """
+        Decide which candles to fetch so the last count candles of a series are up to date
+        Args:
+            symbol: The symbol of the coin
+            currency: The currency to compare the coin to
+            interval: The candle interval, a key of INTERVAL_SECONDS
+            count: Number of candles the caller needs
+            max_age: Seconds during which a series updated by a fetch or a rollup needs no fetch
+            now: Current unix time, defaults to now
+        Returns a (start, limit) tuple: start is the unix open time of the first candle to fetch and limit the number
+        of candles, 0 if nothing has to be fetched. start is None when the whole window has to be fetched and
+        replace the stored candles.
+        """
+        now = time.time() if now is None else now
+        step = INTERVAL_SECONDS[interval]
+        with self._lock:
+            df = self._get((symbol, currency, interval))
+            updated = self._updated.get((symbol, currency, interval), 0)
+
+        if df is None or df.empty:
+            return None, count
+
+        first_open = df.index[0].value // 10**9
+        last_open = df.index[-1].value // 10**9
+        window_start = (now // step - count + 1) * step
+        missing = int((now - last_open) // step) + 1
+        if first_open > window_start or missing > self.limit(interval):
+            # the stored candles do not reach back far enough, or the gap is larger than the series
+            return None, count
+        if now - updated < max_age:
+            return last_open, 0
+        return last_open, missing
+
+    def merge(self, symbol, currency, interval, df, replace=False):
+        """
+        Add fetched candles to a series, a fetched candle replaces the stored one with the same open time
+        Args:
+            symbol: The symbol of the coin
+            currency: The currency to compare the coin to
+            interval: The candle interval
+            df: The fetched candles, indexed by open time
+            replace: Drop the stored candles first
+        """
+        if df.empty:
+            return
+        key = (symbol, currency, interval)
+        first_fetched = df.index.min()
+        with self._lock:
+            stored = None if replace else self._get(key)
+            if stored is not None and not stored.empty:
+                df = pd.concat([stored, df])
+                df = df[~df.index.duplicated(keep="last")].sort_index()
+            df = df.iloc[-self.limit(interval) :]
+            self._candles[key] = df
+            self._updated[key] = time.time()
+
+            coarse_interval = ROLLUPS.get(interval)
+            coarse_key = (symbol, currency, coarse_interval)
+            # only coarse series that exist are kept up to date, the others are fetched when first needed
+            coarse = self._get(coarse_key) if coarse_interval is not None else None
+
+        if self.cache is not None:
+            self.cache.set(self._cache_key(key), df, INTERVAL_SECONDS[interval])
+
+        if coarse is not None and not coarse.empty:
+            # roll up the coarse candles touched by the fetched ones, from the whole fine series
+            bucket_start = first_fetched.floor(f"{INTERVAL_SECONDS[coarse_interval]}s")
+            rolled = rollup(df[df.index >= bucket_start], coarse_interval)
+            coarse_step = pd.Timedelta(seconds=INTERVAL_SECONDS[coarse_interval])
+            # candles older than the coarse series, or after a gap in it, are left to the next fetch
+            rolled = rolled[rolled.index >= coarse.index[0]]
+            if not rolled.empty and rolled.index[0] <= coarse.index[-1] + coarse_step:
+                self.merge(symbol, currency, coarse_interval, rolled)
+
+    def window(self, symbol, currency, interval, count):
+        """
+        Get the last count candles of a series, None if nothing is stored
+        """
+        with self._lock:
+            df = self._get((symbol, currency, interval))
+        if df is None or df.empty:
+            return None
+        return df.iloc[-count:].copy()
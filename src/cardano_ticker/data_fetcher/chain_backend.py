@@ -0,0 +1,199 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from blockfrost import ApiError
+
+from cardano_ticker.data_fetcher.hedging import hedged_call
+from cardano_ticker.data_fetcher.provider_health import ProviderHealthRegistry
+
+logging.basicConfig(level=logging.INFO)
+
+# Error answers that are not failures of the backend: the request is wrong or the item does not exist
+DEFINITIVE_STATUS = (400, 404)
+
+
+class _ErrorResponse:
+    def __init__(self, status_code, message):
+        self.status_code = status_code
+        self._message = message
+
+    def json(self):
+        return {"status_code": self.status_code, "error": "Error", "message": self._message}
+
+
+def api_error(status_code, message):
+    """
+    Build the ApiError raised by the SDK for an error answer, for backends that detect the error themselves
+    """
+    return ApiError(_ErrorResponse(status_code, message))
+
+
+class ChainBackend:
+    """
+    Source of chain data. Every method returns JSON shaped like the answer of the Blockfrost endpoint the SDK
+    method of the same name calls, and raises blockfrost.ApiError on error answers, with status 404 when
+    the item does not exist.
+    Listings take the count, page, order and gather_pages arguments of the Blockfrost listings.
+    The return_type argument is accepted for compatibility with the SDK and ignored, answers are always JSON.
+    """
+
+    name = "chain"
+
+    def epoch_latest(self, return_type=None):
+        raise NotImplementedError
+
+    def network(self, return_type=None):
+        raise NotImplementedError
+
+    def block_latest(self, return_type=None):
+        raise NotImplementedError
+
+    def blocks_next(self, hash_or_number, **kwargs):
+        raise NotImplementedError
+
+    def blocks_previous(self, hash_or_number, **kwargs):
+        raise NotImplementedError
+
+    def pool(self, pool_id, return_type=None):
+        raise NotImplementedError
+
+    def pool_metadata(self, pool_id, return_type=None):
+        raise NotImplementedError
+
+    def pool_history(self, pool_id, **kwargs):
+        raise NotImplementedError
+
+    def pool_delegators(self, pool_id, **kwargs):
+        raise NotImplementedError
+
+    def pools(self, **kwargs):
+        raise NotImplementedError
+
+    def pools_extended(self, **kwargs):
+        raise NotImplementedError
+
+    def pools_retired(self, **kwargs):
+        raise NotImplementedError
+
+
+class FailoverChainBackend(ChainBackend):
+    """
+    Chain backend spreading the calls over several backends by health: each call goes to the healthiest backend
+    and fails over to the next ones when it errors, is rate limited or out of quota.
+    With a hedge delay, a backend that is slow to answer gets raced by the next one.
+    """
+
+    name = "failover"
+
+    def __init__(self, backends, hedge_delay=None, **health_kwargs):
+        """
+        Initialize the failover backend
+        Args:
+            backends: The backends, in order of preference, with distinct names
+            hedge_delay: Seconds to wait for a backend before racing the next one, None to try them one by one
+            health_kwargs: Arguments for the ProviderHealth of every backend
+        """
+        names = [backend.name for backend in backends]
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            raise ValueError(f"Chain backends need distinct names, got several {', '.join(duplicates)}")
+        self.backends = {backend.name: backend for backend in backends}
+        self.hedge_delay = hedge_delay
+        self.health = ProviderHealthRegistry(**health_kwargs)
+        self._executor = ThreadPoolExecutor(max_workers=2 * len(self.backends), thread_name_prefix="chain_backend")
+
+    def _attempt(self, name, method, args, kwargs):
+        """
+        Call a backend and record the outcome in its health
+        Definitive error answers are returned instead of raised, so they are not retried on the other backends
+        """
+        health = self.health.get(name)
+        start = time.time()
+        try:
+            result = getattr(self.backends[name], method)(*args, **kwargs)
+        except ApiError as e:
+            if e.status_code in DEFINITIVE_STATUS:
+                health.record_success(time.time() - start)
+                return e
+            health.record_failure(e.status_code)
+            raise
+        except Exception:
+            health.record_failure()
+            raise
+        health.record_success(time.time() - start)
+        return result
+
+    def _call(self, method, *args, **kwargs):
+        names = self.health.order(list(self.backends))
+        if not names:
+            # every circuit is open, trying them beats showing nothing
+            names = list(self.backends)
+
+        errors = []
+
+        def attempt(name):
+            try:
+                return self._attempt(name, method, args, kwargs)
+            except Exception as e:
+                logging.warning(f"Chain backend {name} failed on {method}: {e}")
+                errors.append(e)
+                raise
+
+        if self.hedge_delay is not None:
+            result = hedged_call(self._executor, [partial(attempt, name) for name in names], self.hedge_delay)
+        else:
+            result = None
+            for name in names:
+                try:
+                    result = attempt(name)
+                    break
+                except Exception:
+                    continue
+
+        if result is None:
+            # callers handle ApiError only, transport errors of the backends are converted
+            error = errors[-1] if errors else None
+            if isinstance(error, ApiError):
+                raise error
+            raise api_error(None, f"Every chain backend failed on {method}: {error}") from error
+        if isinstance(result, ApiError):
+            raise result
+        return result
+
+    def epoch_latest(self, return_type=None):
+        return self._call("epoch_latest")
+
+    def network(self, return_type=None):
+        return self._call("network")
+
+    def block_latest(self, return_type=None):
+        return self._call("block_latest")
+
+    def blocks_next(self, hash_or_number, **kwargs):
+        return self._call("blocks_next", hash_or_number, **kwargs)
+
+    def blocks_previous(self, hash_or_number, **kwargs):
+        return self._call("blocks_previous", hash_or_number, **kwargs)
+
+    def pool(self, pool_id, return_type=None):
+        return self._call("pool", pool_id)
+
+    def pool_metadata(self, pool_id, return_type=None):
+        return self._call("pool_metadata", pool_id)
+
+    def pool_history(self, pool_id, **kwargs):
+        return self._call("pool_history", pool_id, **kwargs)
+
+    def pool_delegators(self, pool_id, **kwargs):
+        return self._call("pool_delegators", pool_id, **kwargs)
+
+    def pools(self, **kwargs):
+        return self._call("pools", **kwargs)
+
+    def pools_extended(self, **kwargs):
+        return self._call("pools_extended", **kwargs)
+
+    def pools_retired(self, **kwargs):
+        return self._call("pools_retired", **kwargs)
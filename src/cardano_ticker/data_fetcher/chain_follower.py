@@ -0,0 +1,166 @@
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime
+
+from blockfrost import ApiError
+
+logging.basicConfig(level=logging.INFO)
+
+
+class ChainFollower:
+    """
+    Follows the chain tip and keeps the blocks of a rolling time window with their transaction counts.
+    The window is filled once by paging backwards from the tip, then each sync only fetches the blocks after
+    the last known one with the batched blocks/{hash}/next endpoint, usually a single call.
+    The per-minute transaction counts are updated as blocks enter and leave the window.
+    A block that is no longer on the chain (rollback) is dropped together with its successors and re-fetched.
+    """
+
+    def __init__(self, api, window_s=30 * 60, page_size=100, min_sync_interval=20, max_rollback=20, cache=None):
+        """
+        Initialize the follower
+        Args:
+            api: The Blockfrost client
+            window_s: Seconds of chain kept before the tip
+            page_size: Number of blocks per page of the block listings, at most 100
+            min_sync_interval: Seconds between two syncs, about one block
+            max_rollback: Number of blocks dropped while looking for the fork point before starting over
+            cache: Optional PersistentCache keeping the window across restarts
+        """
+        self.api = api
+        self.window_s = window_s
+        self.page_size = page_size
+        self.min_sync_interval = min_sync_interval
+        self.max_rollback = max_rollback
+        self.cache = cache
+
+        self._blocks = deque()  # (hash, height, time, tx_count), oldest first
+        self._per_minute = defaultdict(int)
+        self._last_sync = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+        if cache is not None:
+            entry = cache.get("chain_window")
+            if entry is not None:
+                for block in entry[0]:
+                    self._push(*block)
+
+    @staticmethod
+    def _minute(block_time):
+        return datetime.fromtimestamp(block_time).strftime("%Y-%m-%d %H:%M")
+
+    def _push(self, block_hash, height, block_time, tx_count):
+        self._blocks.append((block_hash, height, block_time, tx_count))
+        self._per_minute[self._minute(block_time)] += tx_count
+
+    def _pop(self, newest=True):
+        block = self._blocks.pop() if newest else self._blocks.popleft()
+        minute = self._minute(block[2])
+        self._per_minute[minute] -= block[3]
+        if self._per_minute[minute] <= 0:
+            del self._per_minute[minute]
+        return block
+
+    def _push_json(self, blocks):
+        for block in blocks:
+            self._push(block["hash"], block["height"], block["time"], block["tx_count"])
+
+    def _reset(self):
+        self._blocks.clear()
+        self._per_minute.clear()
+
+    def _bootstrap(self, tip):
+        """
+        Fill the window by paging backwards from the tip
+        """
+        self._reset()
+        blocks = [tip]
+        page = 1
+        while blocks[0]["time"] >= tip["time"] - self.window_s:
+            self.calls += 1
+            previous = self.api.blocks_previous(tip["hash"], count=self.page_size, page=page, return_type="json")
+            if not previous:
+                break
+            # each page is ordered oldest first and ends right before the previous page
+            blocks = previous + blocks
+            if len(previous) < self.page_size:
+                break
+            page += 1
+        self._push_json(blocks)
+
+    def _follow(self, tip):
+        """
+        Fetch the blocks after the last known one up to the tip, rolling back blocks that left the chain
+        Returns False if the fork point could not be found
+        """
+        rolled_back = 0
+        while self._blocks and self._blocks[-1][0] != tip["hash"]:
+            last_hash, last_height = self._blocks[-1][0], self._blocks[-1][1]
+            try:
+                self.calls += 1
+                following = self.api.blocks_next(last_hash, count=self.page_size, return_type="json")
+            except ApiError as e:
+                if e.status_code != 404:
+                    raise
+                following = None
+
+            if following is None or (following and following[0]["previous_block"] != last_hash):
+                # the last known block is not on the chain anymore
+                if rolled_back >= self.max_rollback:
+                    return False
+                logging.info(f"Rolling back block {last_height} {last_hash}")
+                self._pop()
+                rolled_back += 1
+                continue
+
+            if not following:
+                # the tip moved on while we were paging, the next sync picks the rest
+                break
+            self._push_json(following)
+            if len(following) < self.page_size:
+                break
+        return True
+
+    def _evict(self, tip_time):
+        while self._blocks and self._blocks[0][2] < tip_time - self.window_s:
+            self._pop(newest=False)
+
+    def sync(self, force=False):
+        """
+        Bring the window up to the current tip
+        Args:
+            force: Sync even if the last sync is recent
+        """
+        with self._lock:
+            now = time.time()
+            if not force and now - self._last_sync < self.min_sync_interval:
+                return
+            self._last_sync = now
+
+            self.calls += 1
+            tip = self.api.block_latest(return_type="json")
+            if not self._blocks or self._blocks[-1][2] < tip["time"] - self.window_s:
+                # nothing known, or too old to follow from
+                self._bootstrap(tip)
+            elif not self._follow(tip):
+                logging.warning("Fork point not found, reloading the chain window")
+                self._bootstrap(tip)
+            self._evict(tip["time"])
+
+            if self.cache is not None:
+                self.cache.set("chain_window", list(self._blocks), self.window_s)
+
+    def transactions_data(self):
+        """
+        Get the number of transactions per minute over the window
+        Returns a dict with the sorted "dates" (minutes) and their "transactions" counts
+        """
+        with self._lock:
+            per_minute = dict(sorted(self._per_minute.items()))
+        return {
+            "dates": list(per_minute.keys()),
+            "transactions": list(per_minute.values()),
+        }
@@ -1,206 +1,685 @@
+import json
 import logging
 import time
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
 import pandas as pd
-import requests
+
+from cardano_ticker.data_fetcher.async_fetcher import AsyncCryptoPriceFetcher
+from cardano_ticker.data_fetcher.candle_store import (
+    INTERVAL_SECONDS,
+    CandleStore,
+    candle_count,
+    pick_interval,
+)
+from cardano_ticker.data_fetcher.hedging import hedged_call, is_not_none
+from cardano_ticker.data_fetcher.http_session import get_shared_session
+from cardano_ticker.data_fetcher.provider_health import ProviderHealthRegistry
+from cardano_ticker.data_fetcher.quote_matrix import QuoteMatrix
+from cardano_ticker.data_fetcher.symbol_resolver import (
+    BINANCE,
+    COINGECKO,
+    CRYPTOCOMPARE,
+    EXCHANGERATE,
+    PROVIDER_OHLC,
+    SymbolResolver,
+)
 
 logging.basicConfig(level=logging.INFO)
 
+OHLC_COLUMNS = ["open", "high", "low", "close"]
+
+# Maximum number of candles per request
+BINANCE_KLINES_LIMIT = 1000
+CRYPTOCOMPARE_HISTO_LIMIT = 2000
+
+# Messages of the CryptoCompare errors saying that a market does not exist
+CRYPTOCOMPARE_NO_MARKET_MESSAGES = ("market does not exist", "there is no data for")
+
 
 class CryptoPriceFetcher:
-    def __init__(self, api_key):
+    def __init__(self, api_key, hedge_delay=None, session=None, cache=None):
+        """
+        Initialize the price fetcher
+        Args:
+            api_key: The CryptoCompare api key
+            hedge_delay: Seconds to wait for a provider before racing the next one, None to query them one by one
+            session: The HttpSession used for the requests, defaults to the shared session
+            cache: Optional PersistentCache keeping prices and charts across restarts
+        """
         self.api_key = api_key
+        self.session = session or get_shared_session()
         self.max_cache_age = 60  # 1 minute
         self.current_prices_cache = defaultdict(dict)
-        self.current_chart_cache = defaultdict(dict)
+        self.current_chart_cache = {}  # (symbol, currency, days) -> (chart, fetch time)
+        self.cache = cache
+        # OHLC candles are fetched incrementally and kept locally
+        self.candles = CandleStore(cache=cache)
+        self.hedge_delay = hedge_delay
+        self._executor = ThreadPoolExecutor(max_workers=6, thread_name_prefix="price_fetcher")
+        # asyncio counterpart sharing this fetcher's caches
+        self.aio = AsyncCryptoPriceFetcher(self)
 
-    def get_realtime(self, symbol, currency):
-        fetched_time = time.time()
+        # providers in order of preference, the actual order follows their health
+        self.health = ProviderHealthRegistry()
+        self.symbols = SymbolResolver(self._request_json)
+        # every realtime price is derived from USD quotes and one FX table
+        self.quotes = QuoteMatrix(
+            self._fetch_usd_quotes, self._fetch_fx_table, fetch_pair=self._fetch_pair, max_age=self.max_cache_age
+        )
+        self._price_providers = {
+            BINANCE: self._get_from_binance,
+            COINGECKO: self._get_from_coingecko,
+            CRYPTOCOMPARE: self._get_from_cryptocompare,
+        }
+        self._batch_price_providers = {
+            BINANCE: self._get_many_from_binance,
+            COINGECKO: self._get_many_from_coingecko,
+            CRYPTOCOMPARE: self._get_many_from_cryptocompare,
+        }
 
-        # check if the price is in the cache
+    def provider_health(self):
+        """
+        Get the health of the price providers, keyed by provider name
+        """
+        return self.health.snapshot()
+
+    def _ordered(self, providers, symbol=None, currency=None, require_ohlc=False):
+        """
+        Get the provider functions in the order they should be tried
+        Args:
+            providers: Dict mapping provider names to functions, in order of preference
+            symbol: If given with currency, leave out the providers known not to support the pair
+            currency: The currency of the pair
+            require_ohlc: Leave out the providers without full OHLC candles
+        """
+        names = [
+            name
+            for name in providers
+            if (not require_ohlc or PROVIDER_OHLC[name])
+            and (symbol is None or self.symbols.supports(name, symbol, currency))
+        ]
+        return [providers[name] for name in self.health.order(names)]
+
+    def _request_json(self, provider, api_url, params=None):
+        """
+        Send a request to a provider and record the outcome in its health
+        Rate limiting (429), server errors (5xx) and transport errors count as failures of the provider
+        Args:
+            provider: The provider name
+            api_url: The url to request
+            params: Optional query parameters
+        """
+        health = self.health.get(provider)
+        start = time.time()
+        try:
+            response = self.session.get(api_url, params=params)
+        except Exception:
+            health.record_failure()
+            raise
+
+        if response.status_code == 429 or response.status_code >= 500:
+            health.record_failure(response.status_code)
+            raise ValueError(f"{provider} answered with HTTP {response.status_code}")
+
+        health.record_success(time.time() - start)
+        return response.json()
+
+    def _first_valid(self, calls, is_valid=is_not_none):
+        """
+        Return the first valid result of the provider calls, ordered by preference
+        Args:
+            calls: Callables without arguments, one per provider
+            is_valid: Predicate telling whether a result is a usable answer
+        """
+        if self.hedge_delay is not None:
+            return hedged_call(self._executor, calls, self.hedge_delay, is_valid)
+
+        for call in calls:
+            result = call()
+            if is_valid(result):
+                return result
+        return None
+
+    def _cached_price(self, symbol, currency, now):
+        """
+        Get a price from the memory cache, falling back to the persistent cache, None if it has to be fetched
+        """
         if symbol in self.current_prices_cache and currency in self.current_prices_cache[symbol]:
             price, timestamp = self.current_prices_cache[symbol][currency]
-            if fetched_time - timestamp < self.max_cache_age:
+            if now - timestamp < self.max_cache_age:
                 return price
 
-        # Final fallback to Binance
-        price = self._get_from_binance(symbol, currency)
-        if price:
-            self.current_prices_cache[symbol][currency] = price, fetched_time
-            return price
+        if self.cache is not None:
+            entry = self.cache.get_warm(f"price:{symbol}:{currency}", self.max_cache_age)
+            if entry is not None:
+                self.current_prices_cache[symbol][currency] = entry
+                return entry[0]
+        return None
 
-        # Try CoinGecko
-        price = self._get_from_coingecko(symbol, currency)
-        if price:
-            self.current_prices_cache[symbol][currency] = price, fetched_time
+    def _store_price(self, symbol, currency, price, fetched_time):
+        self.current_prices_cache[symbol][currency] = price, fetched_time
+        if self.cache is not None:
+            self.cache.set(f"price:{symbol}:{currency}", price, self.max_cache_age, fetched_time)
+
+    def _last_known(self, key):
+        """
+        Get the last value stored in the persistent cache whatever its age, None if there is none
+        """
+        if self.cache is None:
+            return None
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+        logging.warning(f"Using last known {key}, fetched {int(time.time() - entry[1])}s ago")
+        return entry[0]
+
+    def get_realtime(self, symbol, currency):
+        """
+        Get the realtime price of a pair, derived from the quote matrix
+        Returns the price, 0 if it could not be fetched
+        """
+        return self.quotes.rates([(symbol, currency)])[(symbol, currency)]
+
+    def get_realtime_many(self, pairs):
+        """
+        Get the realtime price of several (symbol, currency) pairs, derived from the quote matrix
+        so every pair of the same assets shares the same few requests
+        Args:
+            pairs: An iterable of (symbol, currency) tuples
+        Returns a dict mapping each (symbol, currency) pair to its price, 0 if it could not be fetched
+        """
+        return self.quotes.rates(pairs)
+
+    def _fetch_pair(self, symbol, currency, skip=()):
+        """
+        Fetch the price of a pair as quoted by the providers
+        Args:
+            symbol: The asset symbol
+            currency: The quote currency
+            skip: Names of the providers not to ask, e.g. because they already answered without the pair
+        Returns the price, the last known one if every provider fails, 0 if there is none
+        """
+        fetched_time = time.time()
+
+        # check if the price is in the cache
+        price = self._cached_price(symbol, currency, fetched_time)
+        if price is not None:
             return price
 
-        # Fall back to CryptoCompare
-        price = self._get_from_cryptocompare(symbol, currency)
+        # Binance first, then CoinGecko, then CryptoCompare, unless their health says otherwise
+        providers = {name: fetch for name, fetch in self._price_providers.items() if name not in skip}
+        price = self._first_valid(
+            [partial(fetch, symbol, currency) for fetch in self._ordered(providers, symbol, currency)],
+            is_valid=bool,
+        )
         if price:
-            self.current_prices_cache[symbol][currency] = price, fetched_time
+            self._store_price(symbol, currency, price, fetched_time)
             return price
 
-        # last resort is to try symbol with USD and currency with USD
-        if currency != "USD":
-            symbol_price = self.get_realtime(symbol, "USD")
-            if symbol_price:
-                currency_price = self.get_realtime(currency, "USD")
-                if currency_price:
-                    self.current_prices_cache[symbol][currency] = symbol_price / currency_price, fetched_time
-                    return symbol_price / currency_price
-
         logging.error(f"Failed to fetch {symbol}/{currency} from all sources.")
-        return 0
+        price = self._last_known(f"price:{symbol}:{currency}")
+        return price if price is not None else 0
+
+    def _fetch_many(self, pairs):
+        """
+        Fetch the price of several (symbol, currency) pairs as quoted by the providers, with as few requests as possible
+        Args:
+            pairs: An iterable of (symbol, currency) tuples
+        Returns a dict mapping each (symbol, currency) pair to its price, 0 if it could not be fetched
+        """
+        fetched_time = time.time()
+        prices = {}
+        missing = []
+        # providers whose batch answer left a pair out, asking them for it alone would not do better
+        answered = defaultdict(set)
+
+        # serve what we can from the cache
+        for symbol, currency in dict.fromkeys(pairs):
+            price = self._cached_price(symbol, currency, fetched_time)
+            if price is not None:
+                prices[(symbol, currency)] = price
+            else:
+                missing.append((symbol, currency))
+
+        # each provider gets one batched request for the supported pairs the previous ones could not serve
+        for name in self.health.order(list(self._batch_price_providers)):
+            supported = [pair for pair in missing if self.symbols.supports(name, *pair)]
+            if not supported:
+                continue
+            batch_prices = self._batch_price_providers[name](supported)
+            if batch_prices is None:
+                continue
+            for pair in supported:
+                answered[pair].add(name)
+            for pair, price in batch_prices.items():
+                self._store_price(pair[0], pair[1], price, fetched_time)
+                prices[pair] = price
+            missing = [pair for pair in missing if pair not in prices]
+
+        # whatever is left goes through the single pair path, with the providers that did not answer it yet
+        for symbol, currency in missing:
+            prices[(symbol, currency)] = self._fetch_pair(symbol, currency, skip=answered[(symbol, currency)])
+
+        return prices
+
+    def _fetch_usd_quotes(self, assets):
+        """
+        Fetch the USD price of crypto assets for the quote matrix
+        Returns a dict mapping each asset to a (price, fetch time) tuple, the assets without price are left out
+        """
+        prices = self._fetch_many([(asset, "USD") for asset in assets])
+        quotes = {}
+        for (asset, _), price in prices.items():
+            if price:
+                # a last known price from the persistent cache has no fresh entry, its time 0 keeps it stale
+                quotes[asset] = price, self.current_prices_cache[asset].get("USD", (price, 0))[1]
+        return quotes
+
+    def _fetch_fx_table(self):
+        """
+        Fetch the exchange rates of the fiat currencies against USD for the quote matrix
+        Returns a dict mapping each currency to its units per USD, the last known table if the fetch fails
+        """
+        try:
+            raw = self._request_json(EXCHANGERATE, "https://api.exchangerate-api.com/v4/latest/USD")
+            rates = raw.get("rates")
+            if rates:
+                if self.cache is not None:
+                    self.cache.set("fx:USD", rates, self.quotes.fx_max_age)
+                return rates
+        except Exception as e:
+            logging.error(f"Exchange rate error: {e}")
+        return self._last_known("fx:USD")
+
+    def _cryptocompare_error(self, raw, pairs):
+        """
+        Handle an error answer of CryptoCompare, marking the pairs unsupported when it says their market does not
+        exist. Rate limit and API key errors are answered the same way, they are only logged.
+        Args:
+            raw: The parsed answer
+            pairs: The (symbol, currency) pairs asked for
+        Returns True if the answer is an error
+        """
+        if raw.get("Response") != "Error":
+            return False
+        message = str(raw.get("Message", ""))
+        if any(no_market in message.lower() for no_market in CRYPTOCOMPARE_NO_MARKET_MESSAGES):
+            for symbol, currency in pairs:
+                self.symbols.mark_unsupported(CRYPTOCOMPARE, symbol, currency)
+        else:
+            logging.error(f"CryptoCompare error: {message}")
+        return True
 
     def _get_from_cryptocompare(self, symbol, currency):
         """Fetch price from CryptoCompare"""
         api_url = f"https://min-api.cryptocompare.com/data/price?fsym={symbol}&tsyms={currency}&api_key={self.api_key}"
         try:
-            raw = requests.get(api_url, timeout=5).json()
+            raw = self._request_json(CRYPTOCOMPARE, api_url)
             if currency in raw:
                 return raw[currency]
+            self._cryptocompare_error(raw, [(symbol, currency)])
         except Exception as e:
             logging.error(f"CryptoCompare error: {e}")
         return None
 
     def _get_from_coingecko(self, symbol, currency):
         """Fetch price from CoinGecko"""
-        api_url = f"https://api.coingecko.com/api/v3/simple/price?ids={symbol.lower()}&vs_currencies={currency.lower()}"
+        coin_id = self.symbols.coingecko_id(symbol)
+        api_url = f"https://api.coingecko.com/api/v3/simple/price?ids={coin_id}&vs_currencies={currency.lower()}"
         try:
-            raw = requests.get(api_url, timeout=5).json()
-            if symbol.lower() in raw and currency.lower() in raw[symbol.lower()]:
-                return raw[symbol.lower()][currency.lower()]
+            raw = self._request_json(COINGECKO, api_url)
+            if coin_id in raw and currency.lower() in raw[coin_id]:
+                return raw[coin_id][currency.lower()]
+            self.symbols.mark_unsupported(COINGECKO, symbol, currency)
         except Exception as e:
             logging.error(f"CoinGecko error: {e}")
         return None
 
     def _get_from_binance(self, symbol, currency):
         """Fetch price from Binance"""
-        currency = currency.upper()
-        if currency == "USD":
-            currency = "USDT"
-
-        pair = f"{symbol}{currency}".upper()
+        pair = self.symbols.binance_pair(symbol, currency)
         api_url = f"https://api.binance.com/api/v3/ticker/price?symbol={pair}"
         try:
-            raw = requests.get(api_url, timeout=5).json()
+            raw = self._request_json(BINANCE, api_url)
             if "price" in raw:
                 return float(raw["price"])
+            self.symbols.mark_unsupported(BINANCE, symbol, currency)
         except Exception as e:
             logging.error(f"Binance error: {e}")
         return None
 
-    def get_chart_data(self, symbol, currency, days=7):
+    def _get_many_from_cryptocompare(self, pairs):
+        """Fetch several prices from CryptoCompare in a single request, None if the request failed"""
+        fsyms = ",".join(dict.fromkeys(symbol for symbol, _ in pairs))
+        tsyms = ",".join(dict.fromkeys(currency for _, currency in pairs))
+        api_url = (
+            f"https://min-api.cryptocompare.com/data/pricemulti?fsyms={fsyms}&tsyms={tsyms}&api_key={self.api_key}"
+        )
+        prices = {}
+        try:
+            raw = self._request_json(CRYPTOCOMPARE, api_url)
+            if self._cryptocompare_error(raw, pairs):
+                return None
+            for symbol, currency in pairs:
+                if symbol in raw and currency in raw[symbol]:
+                    prices[(symbol, currency)] = raw[symbol][currency]
+                else:
+                    # the pairs without a market are left out of the answer
+                    self.symbols.mark_unsupported(CRYPTOCOMPARE, symbol, currency)
+        except Exception as e:
+            logging.error(f"CryptoCompare error: {e}")
+            return None
+        return prices
 
-        fetch_time = time.time()
-        # check if the chart data is in the cache
-        if symbol in self.current_chart_cache and currency in self.current_chart_cache[symbol]:
-            df, timestamp = self.current_chart_cache[symbol][currency]
-            if fetch_time - timestamp < self.max_cache_age:
-                return df
+    def _get_many_from_coingecko(self, pairs):
+        """Fetch several prices from CoinGecko in a single request, None if the request failed"""
+        coin_ids = {symbol: self.symbols.coingecko_id(symbol) for symbol, _ in pairs}
+        ids = ",".join(dict.fromkeys(coin_ids.values()))
+        vs_currencies = ",".join(dict.fromkeys(currency.lower() for _, currency in pairs))
+        api_url = f"https://api.coingecko.com/api/v3/simple/price?ids={ids}&vs_currencies={vs_currencies}"
+        prices = {}
+        try:
+            raw = self._request_json(COINGECKO, api_url)
+            for symbol, currency in pairs:
+                coin_id = coin_ids[symbol]
+                if coin_id in raw and currency.lower() in raw[coin_id]:
+                    prices[(symbol, currency)] = raw[coin_id][currency.lower()]
+                else:
+                    self.symbols.mark_unsupported(COINGECKO, symbol, currency)
+        except Exception as e:
+            logging.error(f"CoinGecko error: {e}")
+            return None
+        return prices
 
-        # Try CoinGecko
-        df = self._get_chart_from_coingecko(symbol, currency, days)
-        if df is not None:
-            self.current_chart_cache[symbol][currency] = (df, fetch_time)
-            return df
+    def _get_many_from_binance(self, pairs):
+        """Fetch several prices from Binance in a single request, None if the request failed"""
+        binance_pairs = {self.symbols.binance_pair(symbol, currency): (symbol, currency) for symbol, currency in pairs}
 
-        # Fall back to CryptoCompare
-        df = self._get_chart_from_cryptocompare(symbol, currency, days)
-        if df is not None:
-            self.current_chart_cache[symbol][currency] = (df, fetch_time)
+        # Binance rejects the whole request if one of the symbols is not listed
+        api_url = "https://api.binance.com/api/v3/ticker/price"
+        params = {"symbols": json.dumps(list(binance_pairs), separators=(",", ":"))}
+        prices = {}
+        try:
+            raw = self._request_json(BINANCE, api_url, params)
+            if not isinstance(raw, list):
+                logging.error(f"Binance error: {raw}")
+                return None
+            for ticker in raw:
+                if ticker.get("symbol") in binance_pairs and "price" in ticker:
+                    prices[binance_pairs[ticker["symbol"]]] = float(ticker["price"])
+            for pair in binance_pairs.values():
+                if pair not in prices:
+                    self.symbols.mark_unsupported(BINANCE, *pair)
+        except Exception as e:
+            logging.error(f"Binance error: {e}")
+            return None
+        return prices
+
+    def get_chart_data(self, symbol, currency, days=7, require_ohlc=True):
+        """
+        Fetch the daily chart of a pair
+        Args:
+            symbol: The symbol of the coin
+            currency: The currency to compare the coin to
+            days: Number of days in the chart
+            require_ohlc: Only use providers returning open/high/low/close candles, otherwise close prices are enough
+        Returns a DataFrame indexed by time, None if the chart could not be fetched
+        """
+        fetch_time = time.time()
+        # check if the chart data is in the cache
+        df = self._cached_chart(symbol, currency, days, fetch_time)
+        if df is not None and (not require_ohlc or self._has_ohlc(df)):
             return df
 
-        # Final fallback to Binance
-        df = self._get_chart_from_binance(symbol, currency, days)
+        df = self._fetch_chart(symbol, currency, days, require_ohlc)
         if df is not None:
-            self.current_chart_cache[symbol][currency] = (df, fetch_time)
+            self._store_chart(symbol, currency, days, df, fetch_time)
             return df
 
-        # last resort is to try symbol with USD and currency with USD
+        # last resort is to convert the USD chart of the symbol to the currency
         if currency != "USD":
-            symbol_df = self.get_chart_data(symbol, "USD", days)
+            symbol_df = self.get_chart_data(symbol, "USD", days, require_ohlc)
             if symbol_df is not None:
-                currency_df = self.get_chart_data(currency, "USD", days)
-                if currency_df is not None:
-                    # Combine the two dataframes to get the final chart
-                    new_df = symbol_df.join(currency_df, how="inner", lsuffix="_symbol", rsuffix="_currency")
-                    new_df["close"] = new_df["close_symbol"] / new_df["close_currency"]
-                    new_df['high'] = new_df['high_symbol'] / new_df['close_currency']
-                    new_df['low'] = new_df['low_symbol'] / new_df['close_currency']
-                    new_df['open'] = new_df['open_symbol'] / new_df['close_currency']
-                    new_df['time'] = new_df['time_symbol']
-                    combined_df = new_df[["time", "high", "low", "open", "close"]]
-                    self.current_chart_cache[symbol][currency] = (combined_df, fetch_time)
+                divisor = None
+                self.quotes.refresh([currency])
+                if self.quotes.is_fiat(currency):
+                    # fiat rates barely move over a chart window, the current rate converts the whole chart
+                    quote = self.quotes.usd_price(currency)
+                    divisor = quote[0] if quote is not None else None
+                else:
+                    # only the close price of the currency is used
+                    currency_df = self.get_chart_data(currency, "USD", days, require_ohlc=False)
+                    if currency_df is not None:
+                        # providers do not all stamp their candles at the same time of day
+                        divisor = currency_df["close"].sort_index().reindex(symbol_df.index, method="nearest")
+                if divisor is not None:
+                    columns = [column for column in ["high", "low", "open", "close"] if column in symbol_df.columns]
+                    combined_df = symbol_df[columns].div(divisor, axis=0)
+                    self._store_chart(symbol, currency, days, combined_df, fetch_time)
                     return combined_df
 
         logging.error(f"Failed to fetch chart data for {symbol}/{currency} from all sources.")
-        return None
+        return self._last_known(f"chart:{symbol}:{currency}:{days}")
 
-    def _get_chart_from_cryptocompare(self, symbol, currency, days):
-        """Fetch historical data from CryptoCompare"""
-        api_url = f"https://min-api.cryptocompare.com/data/v2/histoday?fsym={symbol}&tsym={currency}&limit={days}&api_key={self.api_key}"
-        try:
-            raw = requests.get(api_url, timeout=5).json()
-            if "Data" in raw and "Data" in raw["Data"]:
-                df = pd.DataFrame(raw["Data"]["Data"])[["time", "high", "low", "open", "close"]].set_index("time")
-                df.index = pd.to_datetime(df.index, unit="s")
+    def _fetch_chart(self, symbol, currency, days, require_ohlc):
+        """
+        Fetch the daily chart of a pair from the first provider that answers
+        CryptoCompare and Binance only fetch the daily candles missing from the candle store. The race only runs
+        the provider requests, the candles of the winner are the only ones merged into the store
+        Returns a DataFrame indexed by time, None if every provider failed
+        """
+        start, limit = self.candles.fetch_plan(symbol, currency, "1d", days, max_age=self.max_cache_age)
+        if limit == 0:
+            return self.candles.window(symbol, currency, "1d", days)
+
+        # CoinGecko first, then CryptoCompare, then Binance, unless their health says otherwise
+        calls = {
+            COINGECKO: partial(self._get_chart_from_coingecko, symbol, currency, days),
+            CRYPTOCOMPARE: partial(self._get_candles_from_cryptocompare, symbol, currency, "1d", start, limit),
+            BINANCE: partial(self._get_candles_from_binance, symbol, currency, "1d", start, limit),
+        }
+        providers = {name: partial(self._named_call, name, call) for name, call in calls.items()}
+        answer = self._first_valid(self._ordered(providers, symbol, currency, require_ohlc))
+        if answer is None:
+            return None
+
+        provider, df = answer
+        if provider == COINGECKO:
+            return df
+        self.candles.merge(symbol, currency, "1d", df, replace=start is None)
+        return self.candles.window(symbol, currency, "1d", days)
+
+    @staticmethod
+    def _named_call(name, call):
+        """
+        Run a provider call, returning (name, result) so the winner of a race is known, None without a result
+        """
+        result = call()
+        return (name, result) if result is not None else None
+
+    def _cached_chart(self, symbol, currency, days, now):
+        """
+        Get a chart from the memory cache, falling back to the persistent cache, None if it has to be fetched
+        """
+        if (symbol, currency, days) in self.current_chart_cache:
+            df, timestamp = self.current_chart_cache[(symbol, currency, days)]
+            if now - timestamp < self.max_cache_age:
                 return df
-        except Exception as e:
-            logging.error(f"CryptoCompare error: {e}")
+
+        if self.cache is not None:
+            entry = self.cache.get_warm(f"chart:{symbol}:{currency}:{days}", self.max_cache_age)
+            if entry is not None:
+                self.current_chart_cache[(symbol, currency, days)] = entry
+                return entry[0]
         return None
 
+    def _store_chart(self, symbol, currency, days, df, fetched_time):
+        self.current_chart_cache[(symbol, currency, days)] = (df, fetched_time)
+        if self.cache is not None:
+            self.cache.set(f"chart:{symbol}:{currency}:{days}", df, self.max_cache_age, fetched_time)
+
+    @staticmethod
+    def _has_ohlc(df):
+        return set(OHLC_COLUMNS).issubset(df.columns)
+
+    def _get_candles_from_cryptocompare(self, symbol, currency, interval, start, limit):
+        """
+        Fetch candles from CryptoCompare, the last limit ones or the ones opened since start
+        CryptoCompare returns the candles up to toTs, so long windows are paged backwards from now
+        """
+        endpoint, aggregate = {"1m": ("histominute", 1), "15m": ("histominute", 15), "1h": ("histohour", 1)}.get(
+            interval, ("histoday", 1)
+        )
+        step = INTERVAL_SECONDS[interval]
+        frames = []
+        to_ts = None
+        while limit > 0:
+            page = min(limit, CRYPTOCOMPARE_HISTO_LIMIT)
+            api_url = (
+                f"https://min-api.cryptocompare.com/data/v2/{endpoint}?fsym={symbol}&tsym={currency}"
+                f"&limit={page}&aggregate={aggregate}&api_key={self.api_key}"
+            )
+            if to_ts is not None:
+                api_url += f"&toTs={to_ts}"
+            try:
+                raw = self._request_json(CRYPTOCOMPARE, api_url)
+                if "Data" not in raw or "Data" not in raw["Data"]:
+                    self._cryptocompare_error(raw, [(symbol, currency)])
+                    return None
+            except Exception as e:
+                logging.error(f"CryptoCompare error: {e}")
+                return None
+
+            rows = raw["Data"]["Data"]
+            df = pd.DataFrame(rows, columns=["time", "high", "low", "open", "close"]).set_index("time")
+            # candles before the pair was listed are filled with zeros
+            df = df[df["close"] > 0]
+            if df.empty:
+                break
+            frames.append(df)
+            limit -= len(df)
+            if start is not None and df.index[0] <= start:
+                break
+            to_ts = int(df.index[0] - step)
+
+        if not frames:
+            return None
+        df = pd.concat(frames).sort_index()
+        df = df[~df.index.duplicated(keep="last")]
+        if start is not None:
+            df = df[df.index >= start]
+        df.index = pd.to_datetime(df.index, unit="s")
+        return df
+
     def _get_chart_from_coingecko(self, symbol, currency, days):
         """Fetch historical data from CoinGecko"""
-        api_url = f"https://api.coingecko.com/api/v3/coins/{symbol.lower()}/market_chart?vs_currency={currency.lower()}&days={days}&interval=daily"
+        coin_id = self.symbols.coingecko_id(symbol)
+        api_url = f"https://api.coingecko.com/api/v3/coins/{coin_id}/market_chart?vs_currency={currency.lower()}&days={days}&interval=daily"
         try:
-            raw = requests.get(api_url, timeout=5).json()
+            raw = self._request_json(COINGECKO, api_url)
             if "prices" in raw:
                 df = pd.DataFrame(raw["prices"], columns=["time", "close"])
                 df["time"] = pd.to_datetime(df["time"], unit="ms")
                 return df.set_index("time")
+            self.symbols.mark_unsupported(COINGECKO, symbol, currency)
         except Exception as e:
             logging.error(f"CoinGecko error: {e}")
         return None
 
-    def _get_chart_from_binance(self, symbol, currency, days):
-        """Fetch historical data from Binance"""
-        currency = currency.upper()
-        if currency == "USD":
-            currency = "USDT"
+    def _get_candles_from_binance(self, symbol, currency, interval, start, limit):
+        """
+        Fetch candles from Binance, the last limit ones or the ones opened since start
+        Long windows are paged forwards with startTime
+        """
+        pair = self.symbols.binance_pair(symbol, currency)
+        step = INTERVAL_SECONDS[interval]
+        if start is None:
+            start = (time.time() // step - limit + 1) * step
 
-        pair = f"{symbol}{currency}".upper()
-        interval = "1d"  # Daily candles
-        limit = days
+        frames = []
+        while limit > 0:
+            page = min(limit, BINANCE_KLINES_LIMIT)
+            api_url = (
+                f"https://api.binance.com/api/v3/klines?symbol={pair}&interval={interval}"
+                f"&startTime={int(start * 1000)}&limit={page}"
+            )
+            try:
+                raw = self._request_json(BINANCE, api_url)
+                if not isinstance(raw, list):
+                    self.symbols.mark_unsupported(BINANCE, symbol, currency)
+                    return None
+            except Exception as e:
+                logging.error(f"Binance error: {e}")
+                return None
 
-        api_url = f"https://api.binance.com/api/v3/klines?symbol={pair}&interval={interval}&limit={limit}"
-        try:
-            raw = requests.get(api_url, timeout=5).json()
-            if isinstance(raw, list):
-                df = pd.DataFrame(
-                    raw,
-                    columns=[
-                        "time",
-                        "open",
-                        "high",
-                        "low",
-                        "close",
-                        "volume",
-                        "close_time",
-                        "quote_asset_volume",
-                        "trades",
-                        "taker_buy_base",
-                        "taker_buy_quote",
-                        "ignore",
-                    ],
-                )
-                df = df[["time", "high", "low", "open", "close"]].set_index("time")
-                # convert column to numeric
-                df[['high', 'low', 'open', 'close']] = df[['high', 'low', 'open', 'close']].apply(pd.to_numeric)
-                df.index = pd.to_datetime(df.index, unit="ms")
-                return df
-        except Exception as e:
-            logging.error(f"Binance error: {e}")
-        return None
+            if not raw:
+                break
+            df = pd.DataFrame(
+                raw,
+                columns=[
+                    "time",
+                    "open",
+                    "high",
+                    "low",
+                    "close",
+                    "volume",
+                    "close_time",
+                    "quote_asset_volume",
+                    "trades",
+                    "taker_buy_base",
+                    "taker_buy_quote",
+                    "ignore",
+                ],
+            )
+            df = df[["time", "high", "low", "open", "close"]].set_index("time")
+            # convert column to numeric
+            df[['high', 'low', 'open', 'close']] = df[['high', 'low', 'open', 'close']].apply(pd.to_numeric)
+            frames.append(df)
+            if len(raw) < page:
+                break
+            limit -= len(raw)
+            start = raw[-1][0] / 1000 + step
+
+        if not frames:
+            return None
+        df = pd.concat(frames)
+        df.index = pd.to_datetime(df.index, unit="ms")
+        return df
+
+    def get_candles(self, symbol, currency, days, width=None, interval=None):
+        """
+        Fetch the OHLC candles of a pair over a window, at a resolution fitting the chart
+        Daily candles go through get_chart_data, finer ones are only fetched from providers with OHLC candles
+        Args:
+            symbol: The symbol of the coin
+            currency: The currency to compare the coin to
+            days: Length of the window in days, fractions of a day are allowed
+            width: Width of the chart in pixels, used to pick the interval
+            interval: The candle interval, picked from days and width when None
+        Returns a DataFrame indexed by time, None if the candles could not be fetched
+        """
+        if interval is None:
+            interval = pick_interval(days, width) if width else "1d"
+        count = min(candle_count(days, interval), self.candles.limit(interval))
+        if interval == "1d":
+            return self.get_chart_data(symbol, currency, count)
+
+        # only the candles missing from the store are fetched, the race only runs the provider requests and the
+        # candles of the winner are the only ones merged into the store
+        start, limit = self.candles.fetch_plan(symbol, currency, interval, count, max_age=self.max_cache_age)
+        if limit > 0:
+            candle_providers = {
+                BINANCE: self._get_candles_from_binance,
+                CRYPTOCOMPARE: self._get_candles_from_cryptocompare,
+            }
+            providers = self._ordered(candle_providers, symbol, currency, require_ohlc=True)
+            df = self._first_valid([partial(fetch, symbol, currency, interval, start, limit) for fetch in providers])
+            if df is not None:
+                self.candles.merge(symbol, currency, interval, df, replace=start is None)
+            else:
+                # serve whatever is stored, even if it could not be brought up to date
+                logging.error(f"Failed to fetch {interval} candles for {symbol}/{currency} from all sources.")
+        return self.candles.window(symbol, currency, interval, count)
@@ -1,132 +1,225 @@
 import logging
 import os
-from collections import defaultdict
-from datetime import datetime, timedelta
 
-from blockfrost import ApiError, ApiUrls, BlockFrostApi
+from blockfrost import ApiError
 
+from cardano_ticker.data_fetcher.async_fetcher import AsyncDataFetcher
+from cardano_ticker.data_fetcher.blockfrost_client import (
+    LOCAL_CHAIN_URL,
+    BlockfrostClient,
+    LocalHttpBackend,
+)
+from cardano_ticker.data_fetcher.chain_backend import FailoverChainBackend
+from cardano_ticker.data_fetcher.chain_follower import ChainFollower
 from cardano_ticker.data_fetcher.crypto_price_fetcher import CryptoPriceFetcher
+from cardano_ticker.data_fetcher.epoch_cache import EpochCache
+from cardano_ticker.data_fetcher.epoch_clock import EpochClock
+from cardano_ticker.data_fetcher.http_session import get_shared_session
+from cardano_ticker.data_fetcher.koios_backend import KoiosBackend
+from cardano_ticker.data_fetcher.pool_history_store import PoolHistoryStore
+from cardano_ticker.data_fetcher.pool_index import PoolIndex
+from cardano_ticker.data_fetcher.single_flight import SingleFlight
 
 logging.basicConfig(level=logging.INFO)
 
 
 class DataFetcher:
-    def __init__(self, api_key="", blockfrost_project_id=""):
+    def __init__(
+        self,
+        api_key="",
+        blockfrost_project_id="",
+        hedge_delay=None,
+        session=None,
+        cache=None,
+        coalesce_window=2.0,
+        pool_index_path=":memory:",
+        pool_history_dir=None,
+        chain_backends=("blockfrost",),
+        chain_hedge_delay=None,
+        local_chain_url=LOCAL_CHAIN_URL,
+    ):
         blockfrost_id = os.getenv("BLOCKFROST_PROJECT_ID", default=blockfrost_project_id)
 
-        self.blockfrost_api = BlockFrostApi(
-            project_id=blockfrost_id,
-            base_url=ApiUrls.mainnet.value,
+        self.session = session or get_shared_session()
+        backends = {
+            # pooled connections, concurrent pages and rate limiting for every chain call
+            "blockfrost": lambda: BlockfrostClient(blockfrost_id, session=self.session),
+            "koios": lambda: KoiosBackend(token=os.getenv("KOIOS_TOKEN"), session=self.session),
+            "local": lambda: LocalHttpBackend(local_chain_url, session=self.session),
+        }
+        chain_backends = [backends[name]() if isinstance(name, str) else name for name in chain_backends]
+        if len(chain_backends) == 1:
+            self.blockfrost_api = chain_backends[0]
+        else:
+            # the healthiest backend answers, the others take over when it fails
+            self.blockfrost_api = FailoverChainBackend(chain_backends, hedge_delay=chain_hedge_delay)
+        self.cache = cache
+        self.price_fetcher = CryptoPriceFetcher(api_key, hedge_delay=hedge_delay, session=self.session, cache=cache)
+        # realtime prices of every widget are derived from the same base quotes
+        self.quotes = self.price_fetcher.quotes
+        # data changing only at epoch boundaries is kept until the next one
+        self.epochs = EpochCache(lambda: self.blockfrost_api.epoch_latest(return_type="json"), cache=cache)
+        # epoch progress computed locally, checked against Blockfrost once per epoch
+        self.clock = EpochClock()
+        # identical calls from several widgets or threads share one fetch
+        self.flight = SingleFlight(share_window=coalesce_window)
+        # recent blocks, followed incrementally from the tip
+        self.chain = ChainFollower(self.blockfrost_api, cache=cache)
+        # registered pools, synced from the last pages of the listings
+        self.pool_index = PoolIndex(self.blockfrost_api, pool_index_path)
+        # pool histories as arrays, extended by the new epochs only
+        self.pool_histories = PoolHistoryStore(self.blockfrost_api, pool_history_dir)
+        # asyncio counterpart sharing this fetcher's caches
+        self.aio = AsyncDataFetcher(self)
+
+    def get_chart_data(self, symbol, currency, days=7, require_ohlc=True):
+        return self.flight.do(
+            ("get_chart_data", symbol, currency, days, require_ohlc),
+            self.price_fetcher.get_chart_data,
+            symbol,
+            currency,
+            days,
+            require_ohlc,
         )
 
-        self.price_fetcher = CryptoPriceFetcher(api_key)
-        self.cached_stats = None
-
-    def get_chart_data(self, symbol, currency, days=7):
-        return self.price_fetcher.get_chart_data(symbol, currency, days)
+    def get_candles(self, symbol, currency, days, width=None, interval=None):
+        return self.flight.do(
+            ("get_candles", symbol, currency, days, width, interval),
+            self.price_fetcher.get_candles,
+            symbol,
+            currency,
+            days,
+            width,
+            interval,
+        )
 
     def get_realtime(self, symbol, currency):
-        return self.price_fetcher.get_realtime(symbol, currency)
+        return self.flight.do(("get_realtime", symbol, currency), self.price_fetcher.get_realtime, symbol, currency)
+
+    def get_realtime_many(self, pairs):
+        pairs = tuple(dict.fromkeys(pairs))
+        return self.flight.do(("get_realtime_many", pairs), self.price_fetcher.get_realtime_many, pairs)
+
+    def provider_health(self):
+        return {
+            "prices": self.price_fetcher.provider_health(),
+            "unsupported_pairs": self.price_fetcher.symbols.unsupported(),
+            "quotes": self.quotes.snapshot(),
+            "single_flight": self.flight.stats(),
+            "epoch_cache": self.epochs.stats(),
+            "chain_backends": self.blockfrost_api.health.snapshot()
+            if isinstance(self.blockfrost_api, FailoverChainBackend)
+            else {self.blockfrost_api.name: {"calls": self.blockfrost_api.calls}},
+        }
 
     def pool(self, pool_id):
-        return self.blockfrost_api.pool(pool_id, return_type="json")
+        return self.flight.do(("pool", pool_id), self.blockfrost_api.pool, pool_id, return_type="json")
 
     def pool_history(self, pool_id):
-        return self.blockfrost_api.pool_history(pool_id, return_type="json")
+        """
+        Get the history of a pool as a dict of arrays: "epoch", "active_stake", "rewards" (lovelace) and "blocks"
+        """
+        return self.flight.do(("pool_history", pool_id), self._pool_history, pool_id)
+
+    def _pool_history(self, pool_id):
+        # synced when Blockfrost moves to a new epoch
+        return self.pool_histories.history(pool_id, self.epochs.epoch()["epoch"])
 
     def pool_name_and_ticker(self, pool_id):
-        pool_data = self.blockfrost_api.pool_metadata(pool_id, return_type="json")
+        pool_data = self.flight.do(
+            ("pool_metadata", pool_id),
+            self.epochs.get,
+            f"pool_metadata:{pool_id}",
+            self.blockfrost_api.pool_metadata,
+            pool_id,
+            return_type="json",
+        )
         return pool_data["name"], pool_data["ticker"]
 
     def network(self):
-        return self.blockfrost_api.network(return_type="json")
+        return self.flight.do(("network",), self.epochs.get, "network", self.blockfrost_api.network, return_type="json")
 
     def cardano_transactions_data(self):
-        try:
-            # Get the latest block
-            latest_block = self.blockfrost_api.block_latest(return_type="json")
-            latest_time = datetime.fromtimestamp(latest_block["time"])
-
-            # Initialize variables
-            transactions_per_min = defaultdict(int)
-            current_block = latest_block["hash"]
+        return self.flight.do(("cardano_transactions_data",), self._cardano_transactions_data)
 
-            # Traverse blocks to gather data for the past 30 minutes
-            idx = 0
-            while True:
-                idx += 1
-                block_data = self.blockfrost_api.block(current_block, return_type="json")
-                block_time = datetime.fromtimestamp(block_data["time"])
-
-                # Get the minute of the block
-                minute = block_time.strftime("%Y-%m-%d %H:%M")
-
-                # Accumulate transactions for each day
-                transactions_per_min[minute] += block_data["tx_count"]
-
-                # Break if we exceed 30 minutes
-                if block_time < latest_time - timedelta(minutes=30):
-                    break
-
-                # Move to the previous block
-                current_block = block_data["previous_block"]
+    def _cardano_transactions_data(self):
+        try:
+            self.chain.sync()
+        except ApiError as e:
+            # keep serving the blocks already in the window
+            print(f"Blockfrost API error: {e}")
+        return self.chain.transactions_data()
 
-            # Ensure data is sorted by date
-            transactions_per_min = dict(sorted(transactions_per_min.items()))
-            return {
-                "dates": list(transactions_per_min.keys()),
-                "transactions": list(transactions_per_min.values()),
-            }
+    def blockchain_stats(self):
+        return self.flight.do(("blockchain_stats",), self._blockchain_stats)
 
+    def _blockchain_stats(self):
+        stats = self._epoch_stats()
+        if stats is None:
+            return None
+        # the transactions are followed block by block, so they are always fresh
+        return {**stats, "transactions": self.cardano_transactions_data()}
+
+    def pool_ranking(self, limit=10, by="active_stake"):
+        """
+        Get the largest pools of the current epoch from the pool index
+        Args:
+            limit: Number of pools returned
+            by: Column to rank by: active_stake, live_stake, live_saturation or blocks_minted
+        """
+        return self.flight.do(("pool_ranking", limit, by), self._pool_ranking, limit, by)
+
+    def _pool_ranking(self, limit, by):
+        epoch = self._current_epoch()
+        self.pool_index.sync_epoch(epoch)
+        return self.pool_index.ranking(epoch, limit, by)
+
+    def compare_pools(self, pool_ids):
+        """
+        Get the stake, saturation and rank of several pools in the current epoch from the pool index
+        """
+        return self.flight.do(("compare_pools", tuple(pool_ids)), self._compare_pools, pool_ids)
+
+    def _compare_pools(self, pool_ids):
+        epoch = self._current_epoch()
+        self.pool_index.sync_epoch(epoch)
+        return self.pool_index.compare(pool_ids, epoch)
+
+    def _current_epoch(self):
+        return self.epoch_progress()["epoch_number"]
+
+    def epoch_progress(self):
+        """
+        Get the current epoch, slot, progress and remaining time from the local epoch clock
+        """
+        try:
+            # fetched once per epoch, the check is local
+            self.clock.check(self.epochs.epoch())
         except ApiError as e:
             print(f"Blockfrost API error: {e}")
-            return {"dates": [], "transactions": []}
+        return self.clock.progress()
 
-    def blockchain_stats(self):
+    def _epoch_stats(self):
+        progress = self.epoch_progress()
         try:
-            current_time = datetime.now().timestamp()  # Current UNIX timestamp
-
-            if self.cached_stats is not None:
-                last_time, stats = self.cached_stats
-                # If the data is less than 30 minute old, return the cached data
-                if current_time - last_time < 29 * 60:
-                    return stats
-
-            api = self.blockfrost_api
-            # Fetch current epoch
-            current_epoch = api.epoch_latest(return_type="json")
-            epoch_number = current_epoch["epoch"]
-
-            epoch_start_time = current_epoch["start_time"]  # UNIX timestamp
-            epoch_end_time = current_epoch["end_time"]  # UNIX timestamp
-            # Calculate progress percentage
-            total_epoch_duration = epoch_end_time - epoch_start_time
-            elapsed_time = current_time - epoch_start_time
-            percentage_progress = (elapsed_time / total_epoch_duration) * 100
-
-            remaining_seconds = epoch_end_time - current_time
-            remaining_time = str(timedelta(seconds=int(remaining_seconds)))
-
-            # Fetch active stake and convert to billions ADA
-            active_stake = round(int(current_epoch["active_stake"]) / 1e15, 2)
-
-            # Fetch total stake pools
-            stake_pools = api.pools(gather_pages=True)
-            total_stake_pools = len(stake_pools)
-
-            transaction_data = self.cardano_transactions_data()
-
-            stats = {
-                "epoch_number": epoch_number,
-                "remaining_time": remaining_time,
-                "percentage_progress": percentage_progress,
-                "active_stake": active_stake,
-                "total_stake_pools": total_stake_pools,
-                "transactions": transaction_data,
-            }
-
-            self.cached_stats = (current_time, stats)
-            return stats
+            # Active stake of the latest epoch, converted to billions ADA
+            active_stake = round(int(self.epochs.epoch()["active_stake"]) / 1e15, 2)
         except ApiError as e:
             print(f"Blockfrost API error: {e}")
             return None
+
+        try:
+            self.pool_index.sync()
+        except ApiError as e:
+            # keep counting from the pools already indexed
+            print(f"Blockfrost API error: {e}")
+        # Count the stake pools from the local index
+        total_stake_pools = self.pool_index.count()
+
+        return {
+            "epoch_number": progress["epoch_number"],
+            "remaining_time": progress["remaining_time"],
+            "percentage_progress": progress["percentage_progress"],
+            "active_stake": active_stake,
+            "total_stake_pools": total_stake_pools,
+        }
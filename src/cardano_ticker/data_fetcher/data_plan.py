@@ -0,0 +1,166 @@
+"""
+Up-front data fetching for a whole dashboard.
+
+Widgets declare the data their next update needs as DataRequest objects. A DataPlan collects the requests of
+every widget once, removes the duplicates, merges the realtime price requests of each fetcher into one batched
+call, and runs everything concurrently before the widgets update from the results.
+With a RequestBudget, the calls that are not due or do not fit in their provider's budget are held back and
+their widgets update from the last results.
+"""
+import asyncio
+import logging
+import time
+from collections import namedtuple
+
+from cardano_ticker.data_fetcher.async_fetcher import get_fetch_executor
+
+logging.basicConfig(level=logging.INFO)
+
+# A call of a fetcher method, e.g. DataRequest(data_fetcher, "pool", (pool_id,))
+DataRequest = namedtuple("DataRequest", ["fetcher", "method", "args"])
+
+# Price requests merged into one get_realtime_many call per fetcher
+PRICE_METHODS = ("get_realtime", "get_realtime_many")
+
+
+class PlanResults(dict):
+    """
+    Results of a data plan, keyed by DataRequest
+    A request that failed holds its exception, which is raised again when the result is read
+    """
+
+    def value(self, request):
+        result = self[request]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+class DataPlan:
+    def __init__(self, widgets, budget=None):
+        """
+        Build the plan of a set of widgets
+        Args:
+            widgets: The widgets to fetch data for, the ones declaring no request are left out of the plan
+            budget: Optional RequestBudget pacing the calls
+        """
+        self.widgets = []
+        requests = {}
+        for widget in widgets:
+            widget_requests = widget.data_requests()
+            if widget_requests:
+                self.widgets.append(widget)
+                requests.update(dict.fromkeys(widget_requests))
+        self.requests = list(requests)
+        self.declared = sum(len(widget.data_requests()) for widget in self.widgets)
+        self.last_stats = None
+        # last result of every request, served for the calls held back by the budget
+        self._results = PlanResults()
+
+        self.budget = budget
+        self.requests_per_hour = None
+        if budget is not None:
+            self.requests_per_hour = budget.fit([call.method for _, call in self._calls()])
+            estimate = ", ".join(f"{int(n)} {provider}" for provider, n in self.requests_per_hour.items())
+            logging.info(f"Data plan: about {estimate or 'no'} requests per hour")
+
+    def _calls(self):
+        """
+        Group the requests into the calls to make
+        Returns a list of (request, call) tuples, where call is (fetcher, method, args) and request is the
+        request answered by the call, None for batched price calls answering several requests
+        """
+        calls = []
+        prices = {}
+        for request in self.requests:
+            if request.method in PRICE_METHODS:
+                prices.setdefault(request.fetcher, []).append(request)
+            else:
+                calls.append((request, request))
+
+        for fetcher, price_requests in prices.items():
+            pairs = []
+            for request in price_requests:
+                pairs.extend([request.args] if request.method == "get_realtime" else request.args[0])
+            calls.append((None, DataRequest(fetcher, "get_realtime_many", (tuple(dict.fromkeys(pairs)),))))
+        return calls
+
+    def _due_calls(self):
+        """
+        Get the calls to make now, leaving out the ones held back by the budget
+        """
+        calls = self._calls()
+        if self.budget is None:
+            return calls
+        now = time.time()
+        return [(request, call) for request, call in calls if self.budget.allow(call, call.method, now)]
+
+    def _store(self, results, request, call, result):
+        if request is not None:
+            results[request] = result
+            return
+
+        # spread the batched prices over the requests they answer
+        for price_request in self.requests:
+            if price_request.method not in PRICE_METHODS or price_request.fetcher is not call.fetcher:
+                continue
+            if isinstance(result, Exception):
+                results[price_request] = result
+            elif price_request.method == "get_realtime":
+                results[price_request] = result.get(tuple(price_request.args), 0)
+            else:
+                results[price_request] = {tuple(pair): result.get(tuple(pair), 0) for pair in price_request.args[0]}
+
+    def _log_stats(self, calls, start):
+        self.last_stats = {
+            "widgets": len(self.widgets),
+            "requests": self.declared,
+            "unique_requests": len(self.requests),
+            "calls": len(calls),
+            "duration_s": round(time.time() - start, 3),
+            "requests_per_hour": self.requests_per_hour,
+        }
+        logging.info(
+            f"Data plan: {self.declared} requests from {len(self.widgets)} widgets fetched in {len(calls)} calls, "
+            f"{self.last_stats['duration_s']}s"
+        )
+
+    async def execute_async(self):
+        """
+        Run every call of the plan concurrently
+        Returns the PlanResults
+        """
+        start = time.time()
+        calls = self._due_calls()
+        loop = asyncio.get_running_loop()
+        executor = get_fetch_executor()
+
+        async def run(call):
+            try:
+                return await loop.run_in_executor(executor, lambda: getattr(call.fetcher, call.method)(*call.args))
+            except Exception as e:
+                logging.error(f"Data plan call {call.method}{call.args} failed: {e}")
+                return e
+
+        outcomes = await asyncio.gather(*(run(call) for _, call in calls))
+        for (request, call), result in zip(calls, outcomes):
+            self._store(self._results, request, call, result)
+        self._log_stats(calls, start)
+        return PlanResults(self._results)
+
+    def execute(self):
+        """
+        Run every call of the plan one after the other, for callers already inside an event loop
+        Returns the PlanResults
+        """
+        start = time.time()
+        calls = self._due_calls()
+        for request, call in calls:
+            try:
+                result = getattr(call.fetcher, call.method)(*call.args)
+            except Exception as e:
+                logging.error(f"Data plan call {call.method}{call.args} failed: {e}")
+                result = e
+            self._store(self._results, request, call, result)
+        self._log_stats(calls, start)
+        return PlanResults(self._results)
@@ -0,0 +1,117 @@
+import logging
+import random
+import threading
+import time
+
+logging.basicConfig(level=logging.INFO)
+
+
+class EpochCache:
+    """
+    Cache policy for chain data that only changes at epoch boundaries, like pool history, pool metadata,
+    the supply or the active stake. A value is kept until the end of the epoch it was fetched in, as given by
+    the start and end times of the latest epoch, which are themselves fetched once per epoch.
+    Values expire a few random seconds after the boundary rather than on it, so Blockfrost has settled on the
+    new epoch and several tickers do not all refresh at the same moment.
+    """
+
+    def __init__(self, fetch_epoch, cache=None, jitter=(30, 300), retry_interval=60):
+        """
+        Initialize the cache
+        Args:
+            fetch_epoch: Callable returning the latest epoch, with its "start_time" and "end_time"
+            cache: Optional PersistentCache keeping the values across restarts
+            jitter: Range of seconds after the boundary at which the values expire
+            retry_interval: Seconds before refetching the epoch when its end is already past, while the
+                new epoch is not published yet
+        """
+        self._fetch_epoch = fetch_epoch
+        self.cache = cache
+        self.jitter = jitter
+        self.retry_interval = retry_interval
+
+        self._entries = {}  # key -> (value, expiry time)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self, key):
+        entry = self._entries.get(key)
+        if entry is None and self.cache is not None:
+            stored = self.cache.get(f"epoch:{key}")
+            if stored is not None:
+                entry = stored[0]
+                self._entries[key] = entry
+        return entry
+
+    def _store(self, key, value, expires_at):
+        self._entries[key] = (value, expires_at)
+        if self.cache is not None:
+            self.cache.set(f"epoch:{key}", (value, expires_at), max(expires_at - time.time(), 1))
+
+    def _latest(self):
+        """
+        Get the latest epoch and the time it expires, fetching it again only after its end
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._load("epoch_latest")
+            if entry is not None and now < entry[1]:
+                return entry
+
+        try:
+            epoch = self._fetch_epoch()
+        except Exception as e:
+            if entry is None:
+                raise
+            logging.warning(f"Keeping epoch {entry[0]['epoch']}: {e}")
+            return entry
+        expires_at = max(epoch["end_time"] + random.uniform(*self.jitter), now + self.retry_interval)
+        with self._lock:
+            self._store("epoch_latest", epoch, expires_at)
+        return epoch, expires_at
+
+    def epoch(self):
+        """
+        Get the latest epoch, fetched once per epoch
+        """
+        return self._latest()[0]
+
+    def get(self, key, fetch, *args, **kwargs):
+        """
+        Get a value, calling fetch only if it was not fetched in the current epoch
+        If the fetch fails, the value of a previous epoch is returned when there is one
+        Args:
+            key: Key of the value
+            fetch: Function fetching the value
+            args: Positional arguments of fetch
+            kwargs: Keyword arguments of fetch
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._load(key)
+            if entry is not None and now < entry[1]:
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        try:
+            # the values fetched now hold until the end of the latest epoch
+            epoch, expires_at = self._latest()
+            value = fetch(*args, **kwargs)
+        except Exception as e:
+            if entry is None:
+                raise
+            logging.warning(f"Keeping {key} from the previous epoch: {e}")
+            return entry[0]
+
+        with self._lock:
+            self._store(key, value, expires_at)
+        logging.info(f"Fetched {key} for epoch {epoch['epoch']}")
+        return value
+
+    def stats(self):
+        """
+        Count the values served from the cache and the ones fetched
+        """
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
@@ -0,0 +1,105 @@
+import logging
+import time
+from datetime import timedelta
+
+logging.basicConfig(level=logging.INFO)
+
+# Start of the Shelley era on mainnet, since when epochs last 5 days of 1 second slots
+SHELLEY_START_EPOCH = 208
+SHELLEY_START_TIME = 1596059091
+SHELLEY_START_SLOT = 4492800
+EPOCH_LENGTH = 432000
+SLOT_LENGTH = 1
+
+
+class EpochClock:
+    """
+    Computes the current epoch, slot, progress and remaining time locally from the genesis parameters,
+    so progress widgets are exact to the second without any request.
+    The clock is anchored on the start of an epoch and can be checked against the epoch reported by Blockfrost:
+    if the parameters ever change (hard fork), the clock is anchored again on the reported epoch.
+    """
+
+    def __init__(
+        self,
+        start_epoch=SHELLEY_START_EPOCH,
+        start_time=SHELLEY_START_TIME,
+        start_slot=SHELLEY_START_SLOT,
+        epoch_length=EPOCH_LENGTH,
+        slot_length=SLOT_LENGTH,
+    ):
+        """
+        Initialize the clock
+        Args:
+            start_epoch: Number of the anchor epoch
+            start_time: UNIX time the anchor epoch started
+            start_slot: Absolute slot the anchor epoch started at
+            epoch_length: Seconds per epoch
+            slot_length: Seconds per slot
+        """
+        self.start_epoch = start_epoch
+        self.start_time = start_time
+        self.start_slot = start_slot
+        self.epoch_length = epoch_length
+        self.slot_length = slot_length
+
+    def epoch(self, now=None):
+        now = time.time() if now is None else now
+        return self.start_epoch + int((now - self.start_time) // self.epoch_length)
+
+    def epoch_bounds(self, epoch):
+        """
+        Get the start and end UNIX times of an epoch
+        """
+        start = self.start_time + (epoch - self.start_epoch) * self.epoch_length
+        return start, start + self.epoch_length
+
+    def slot(self, now=None):
+        """
+        Get the absolute slot at a time
+        """
+        now = time.time() if now is None else now
+        return self.start_slot + int((now - self.start_time) // self.slot_length)
+
+    def progress(self, now=None):
+        """
+        Get the state of the current epoch
+        Returns a dict with the epoch number, absolute slot, slot in the epoch, start and end times,
+        progress percentage and remaining seconds and time
+        """
+        now = time.time() if now is None else now
+        epoch = self.epoch(now)
+        start, end = self.epoch_bounds(epoch)
+        remaining_seconds = int(end - now)
+        return {
+            "epoch_number": epoch,
+            "slot": self.slot(now),
+            "epoch_slot": int((now - start) // self.slot_length),
+            "start_time": start,
+            "end_time": end,
+            "percentage_progress": (now - start) / self.epoch_length * 100,
+            "remaining_seconds": remaining_seconds,
+            "remaining_time": str(timedelta(seconds=remaining_seconds)),
+        }
+
+    def check(self, epoch):
+        """
+        Check the clock against an epoch reported by Blockfrost, and anchor it on that epoch if they differ
+        Args:
+            epoch: The epoch JSON, with its "epoch", "start_time" and "end_time"
+        Returns True if the clock agreed with the epoch
+        """
+        start, end = self.epoch_bounds(epoch["epoch"])
+        if (start, end) == (epoch["start_time"], epoch["end_time"]):
+            return True
+
+        logging.warning(
+            f"Epoch clock off for epoch {epoch['epoch']}: computed {start}-{end}, "
+            f"reported {epoch['start_time']}-{epoch['end_time']}, re-anchoring"
+        )
+        # keep the slot numbering continuous across the re-anchoring
+        self.start_slot = self.slot(epoch["start_time"])
+        self.start_epoch = epoch["epoch"]
+        self.start_time = epoch["start_time"]
+        self.epoch_length = epoch["end_time"] - epoch["start_time"]
+        return False
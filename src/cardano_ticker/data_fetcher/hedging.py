@@ -0,0 +1,47 @@
+import logging
+from concurrent.futures import FIRST_COMPLETED, wait
+
+logging.basicConfig(level=logging.INFO)
+
+
+def is_not_none(result):
+    return result is not None
+
+
+def hedged_call(executor, calls, hedge_delay, is_valid=is_not_none):
+    """
+    Race several equivalent calls, starting the next one only when the previous ones are slow or failed
+    Args:
+        executor: The executor running the calls
+        calls: Callables without arguments, in order of preference
+        hedge_delay: Seconds to wait for the running calls before starting the next one
+        is_valid: Predicate telling whether a result is a usable answer
+    Returns the first valid result, or None if every call failed
+    """
+    calls = list(calls)
+    pending = set()
+    next_call = 0
+
+    while next_call < len(calls) or pending:
+        if next_call < len(calls):
+            pending.add(executor.submit(calls[next_call]))
+            next_call += 1
+
+        # wait for an answer, or for the hedge delay when there is another call left to start
+        timeout = hedge_delay if next_call < len(calls) else None
+        done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+        for future in done:
+            try:
+                result = future.result()
+            except Exception as e:
+                logging.error(f"Hedged call failed: {e}")
+                continue
+
+            if is_valid(result):
+                # calls that did not start yet are dropped, running ones finish in the background
+                for loser in pending:
+                    loser.cancel()
+                return result
+
+    return None
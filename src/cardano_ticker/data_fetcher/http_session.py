@@ -0,0 +1,102 @@
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logging.basicConfig(level=logging.INFO)
+
+
+class HttpSession:
+    """
+    Pooled HTTP session shared by the data fetchers.
+    Connections are kept alive per host, so consecutive requests skip the DNS lookup and the TCP/TLS handshakes.
+    The underlying urllib3 pools are thread-safe, so a single instance can be used from any thread.
+    """
+
+    def __init__(self, timeout=5, pool_connections=10, pool_maxsize=4, host_pool_sizes=None):
+        """
+        Initialize the session
+        Args:
+            timeout: Default timeout in seconds for requests that do not pass their own
+            pool_connections: Number of hosts to keep a connection pool for
+            pool_maxsize: Default number of connections kept alive per host
+            host_pool_sizes: Optional dict mapping a host name to its own number of connections
+        """
+        self.timeout = timeout
+        self._session = requests.Session()
+        self._session.headers.update({"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"})
+
+        default_adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self._adapters = [default_adapter]
+        self._session.mount("http://", default_adapter)
+        self._session.mount("https://", default_adapter)
+
+        for host, size in (host_pool_sizes or {}).items():
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size)
+            self._adapters.append(adapter)
+            self._session.mount(f"https://{host}", adapter)
+            self._session.mount(f"http://{host}", adapter)
+
+    def request(self, method, url, **kwargs):
+        """
+        Send a request through the pooled connections
+        Args:
+            method: The HTTP method
+            url: The url to request
+            kwargs: Extra arguments forwarded to requests, timeout defaults to the session timeout
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        return self._session.request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def connection_stats(self):
+        """
+        Count the requests sent through the session and how many of them needed a new connection
+        Returns a dict with the totals and a per host breakdown
+        """
+        hosts = {}
+        for adapter in self._adapters:
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                stats = hosts.setdefault(pool.host, {"requests": 0, "new_connections": 0})
+                stats["requests"] += pool.num_requests
+                stats["new_connections"] += pool.num_connections
+
+        for stats in hosts.values():
+            stats["reused_connections"] = max(stats["requests"] - stats["new_connections"], 0)
+
+        return {
+            "requests": sum(s["requests"] for s in hosts.values()),
+            "new_connections": sum(s["new_connections"] for s in hosts.values()),
+            "reused_connections": sum(s["reused_connections"] for s in hosts.values()),
+            "hosts": hosts,
+        }
+
+    def close(self):
+        self._session.close()
+
+
+_shared_session = None
+_shared_session_lock = threading.Lock()
+
+
+def get_shared_session(**kwargs):
+    """
+    Get the session shared by every fetcher of the process, created on first use
+    Args:
+        kwargs: Arguments for HttpSession, only used when the session is created
+    """
+    global _shared_session
+    with _shared_session_lock:
+        if _shared_session is None:
+            _shared_session = HttpSession(**kwargs)
+        return _shared_session
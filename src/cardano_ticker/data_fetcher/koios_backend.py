@@ -0,0 +1,242 @@
+import logging
+
+import requests
+from blockfrost import ApiError
+
+from cardano_ticker.data_fetcher.chain_backend import ChainBackend, api_error
+from cardano_ticker.data_fetcher.http_session import get_shared_session
+from cardano_ticker.data_fetcher.rate_limiter import TokenBucket
+
+logging.basicConfig(level=logging.INFO)
+
+KOIOS_URL = "https://api.koios.rest/api/v1"
+# Maximum ADA supply in lovelace, Koios does not report it
+MAX_SUPPLY = "45000000000000000"
+
+
+def _block(block):
+    """
+    Convert a Koios block to the fields of a Blockfrost block used by the fetchers
+    """
+    return {
+        "hash": block["hash"],
+        "height": block["block_height"],
+        "time": block["block_time"],
+        "slot": block["abs_slot"],
+        "epoch": block["epoch_no"],
+        "epoch_slot": block["epoch_slot"],
+        "tx_count": block["tx_count"],
+        "previous_block": block["parent_hash"],
+    }
+
+
+class KoiosBackend(ChainBackend):
+    """
+    Chain backend reading Koios, a community run API over db-sync, and converting its answers to the shape
+    of the Blockfrost answers. Fields Koios does not serve are None.
+    Koios listings are paged with offset and limit, the Blockfrost count and page arguments are translated.
+    """
+
+    name = "koios"
+
+    def __init__(self, base_url=KOIOS_URL, token=None, session=None, rate=10, burst=10):
+        """
+        Initialize the backend
+        Args:
+            base_url: The Koios API url, mainnet by default
+            token: Optional Koios bearer token, for a higher rate limit
+            session: The HttpSession sending the requests, the shared session by default
+            rate: Sustained requests per second
+            burst: Requests that can be sent at once after a quiet period
+        """
+        self.url = base_url
+        self.session = session or get_shared_session()
+        self.limiter = TokenBucket(rate, burst)
+        self._headers = {"Accept": "application/json"}
+        if token:
+            self._headers["Authorization"] = f"Bearer {token}"
+        self.calls = 0
+
+    def _request(self, method, path, params=None, json=None):
+        self.limiter.acquire()
+        self.calls += 1
+        try:
+            response = self.session.request(
+                method, f"{self.url}/{path}", params=params, json=json, headers=self._headers
+            )
+        except requests.RequestException as e:
+            # timeouts and connection errors have no status code
+            raise api_error(None, str(e)) from e
+        if response.status_code not in (200, 206):
+            raise ApiError(response)
+        return response.json()
+
+    def _list(self, path, params, order, count=100, page=1, gather_pages=False, return_type=None):
+        """
+        Get a listing, paged like the Blockfrost listings
+        Args:
+            path: The endpoint path
+            params: Query parameters selecting the rows
+            order: The PostgREST order of the rows, e.g. "epoch_no.asc"
+            count: Number of rows per page
+            page: The page to get, or the first one with gather_pages
+            gather_pages: Get every page from page to the last one
+        """
+        rows = []
+        while True:
+            page_rows = self._request(
+                "GET", path, params={**params, "order": order, "limit": count, "offset": (page - 1) * count}
+            )
+            rows.extend(page_rows)
+            if not gather_pages or len(page_rows) < count:
+                return rows
+            page += 1
+
+    def _tip(self):
+        return self._request("GET", "tip")[0]
+
+    def _epoch_info(self, epoch):
+        rows = self._request("GET", "epoch_info", params={"_epoch_no": epoch})
+        if not rows:
+            raise api_error(404, f"Epoch {epoch} not found")
+        return rows[0]
+
+    def _pool_info(self, pool_id):
+        rows = self._request("POST", "pool_info", json={"_pool_bech32_ids": [pool_id]})
+        if not rows:
+            raise api_error(404, f"Pool {pool_id} not found")
+        return rows[0]
+
+    def _block_height(self, hash_or_number):
+        if isinstance(hash_or_number, int) or str(hash_or_number).isdigit():
+            return int(hash_or_number)
+        rows = self._request("POST", "block_info", json={"_block_hashes": [hash_or_number]})
+        if not rows:
+            raise api_error(404, f"Block {hash_or_number} not found")
+        return rows[0]["block_height"]
+
+    def epoch_latest(self, return_type=None):
+        info = self._epoch_info(self._tip()["epoch_no"])
+        return {
+            "epoch": info["epoch_no"],
+            "start_time": info["start_time"],
+            "end_time": info["end_time"],
+            "block_count": info["blk_count"],
+            "tx_count": info["tx_count"],
+            "active_stake": info["active_stake"],
+        }
+
+    def network(self, return_type=None):
+        epoch = self._tip()["epoch_no"]
+        totals = self._request("GET", "totals", params={"_epoch_no": epoch})[0]
+        return {
+            "supply": {
+                "max": MAX_SUPPLY,
+                "total": totals["supply"],
+                "circulating": totals["circulation"],
+                # Koios does not report the ADA locked by scripts
+                "locked": "0",
+                "treasury": totals["treasury"],
+                "reserves": totals["reserves"],
+            },
+            "stake": {"live": None, "active": self._epoch_info(epoch)["active_stake"]},
+        }
+
+    def block_latest(self, return_type=None):
+        return _block(self._request("GET", "blocks", params={"order": "block_height.desc", "limit": 1})[0])
+
+    def blocks_next(self, hash_or_number, **kwargs):
+        height = self._block_height(hash_or_number)
+        blocks = self._list("blocks", {"block_height": f"gt.{height}"}, "block_height.asc", **kwargs)
+        return [_block(block) for block in blocks]
+
+    def blocks_previous(self, hash_or_number, **kwargs):
+        height = self._block_height(hash_or_number)
+        # pages go backwards from the block, each one ordered oldest first like Blockfrost
+        blocks = self._list("blocks", {"block_height": f"lt.{height}"}, "block_height.desc", **kwargs)
+        return [_block(block) for block in reversed(blocks)]
+
+    def pool(self, pool_id, return_type=None):
+        info = self._pool_info(pool_id)
+        return {
+            "pool_id": info["pool_id_bech32"],
+            "hex": info["pool_id_hex"],
+            "active_stake": info["active_stake"],
+            "live_stake": info["live_stake"],
+            # Koios reports the saturation in percent, Blockfrost as a ratio
+            "live_saturation": (info["live_saturation"] or 0) / 100,
+            "live_delegators": info["live_delegators"],
+            "blocks_minted": info["block_count"],
+            "live_pledge": info["live_pledge"],
+            "declared_pledge": info["pledge"],
+            "margin_cost": info["margin"],
+            "fixed_cost": info["fixed_cost"],
+        }
+
+    def pool_metadata(self, pool_id, return_type=None):
+        meta = self._pool_info(pool_id)["meta_json"] or {}
+        return {
+            "pool_id": pool_id,
+            "name": meta.get("name"),
+            "ticker": meta.get("ticker"),
+            "homepage": meta.get("homepage"),
+            "description": meta.get("description"),
+        }
+
+    def pool_history(self, pool_id, order=None, **kwargs):
+        rows = self._list("pool_history", {"_pool_bech32": pool_id}, f"epoch_no.{order or 'asc'}", **kwargs)
+        return [
+            {
+                "epoch": row["epoch_no"],
+                "blocks": row["block_cnt"] or 0,
+                "active_stake": row["active_stake"] or "0",
+                "active_size": (row["active_stake_pct"] or 0) / 100,
+                "delegators_count": row["delegator_cnt"] or 0,
+                # total rewards of the pool before they are split between the operator and the delegators
+                "rewards": str(int(row["deleg_rewards"] or 0) + int(row["pool_fees"] or 0)),
+                "fees": row["pool_fees"] or "0",
+            }
+            for row in rows
+        ]
+
+    def pool_delegators(self, pool_id, order=None, **kwargs):
+        rows = self._list("pool_delegators", {"_pool_bech32": pool_id}, f"stake_address.{order or 'asc'}", **kwargs)
+        return [{"address": row["stake_address"], "live_stake": row["amount"]} for row in rows]
+
+    def pools(self, order=None, **kwargs):
+        rows = self._list(
+            "pool_list",
+            {"pool_status": "eq.registered", "select": "pool_id_bech32"},
+            f"active_epoch_no.{order or 'asc'},pool_id_bech32.asc",
+            **kwargs,
+        )
+        return [row["pool_id_bech32"] for row in rows]
+
+    def pools_extended(self, order=None, **kwargs):
+        rows = self._list(
+            "pool_list",
+            {"pool_status": "eq.registered", "select": "pool_id_bech32,pool_id_hex,active_stake"},
+            f"active_epoch_no.{order or 'asc'},pool_id_bech32.asc",
+            **kwargs,
+        )
+        # the pool list has no live figures, the active stake stands in for the live stake
+        return [
+            {
+                "pool_id": row["pool_id_bech32"],
+                "hex": row["pool_id_hex"],
+                "active_stake": row["active_stake"] or "0",
+                "live_stake": row["active_stake"] or "0",
+                "live_saturation": None,
+                "blocks_minted": None,
+            }
+            for row in rows
+        ]
+
+    def pools_retired(self, order=None, **kwargs):
+        rows = self._list(
+            "pool_list",
+            {"pool_status": "eq.retired", "select": "pool_id_bech32,retiring_epoch"},
+            f"retiring_epoch.{order or 'asc'},pool_id_bech32.asc",
+            **kwargs,
+        )
+        return [{"pool_id": row["pool_id_bech32"], "epoch": row["retiring_epoch"]} for row in rows]
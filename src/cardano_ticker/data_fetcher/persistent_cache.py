@@ -0,0 +1,173 @@
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+logging.basicConfig(level=logging.INFO)
+
+
+class PersistentCache:
+    """
+    Key/value cache stored in a SQLite file, so fetched data survives restarts of the provider.
+    Every value is stored with its fetch time and TTL. Entries are kept past their TTL, up to max_stale_age,
+    so the first frame after a restart can be rendered from the last known data while fresh data is fetched.
+    The file is bounded in size and compacted regularly, to limit the writes on SD cards.
+    """
+
+    def __init__(
+        self,
+        path,
+        max_bytes=16 * 1024 * 1024,
+        max_entries=5000,
+        max_stale_age=7 * 24 * 60 * 60,
+        compact_every=200,
+    ):
+        """
+        Initialize the cache
+        Args:
+            path: Path of the SQLite file, created if missing
+            max_bytes: Upper bound of the total size of the stored values
+            max_entries: Upper bound of the number of stored values
+            max_stale_age: Seconds an entry is kept after its TTL expired
+            compact_every: Number of writes between two compactions
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.max_stale_age = max_stale_age
+        self.compact_every = compact_every
+        self.stale_served = 0
+
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._warm_keys = set()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        # WAL with relaxed syncing keeps the number of fsyncs on the SD card low
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, stored_at REAL NOT NULL, ttl REAL NOT NULL, size INTEGER NOT NULL)"
+        )
+        self._db.commit()
+        self.compact()
+
+        # every key already on disk may be served once without being fresh, see get_warm
+        with self._lock:
+            self._warm_keys = {row[0] for row in self._db.execute("SELECT key FROM entries")}
+        logging.info(f"Persistent cache {path} opened with {len(self._warm_keys)} entries")
+
+    def set(self, key, value, ttl, stored_at=None):
+        """
+        Store a value
+        Args:
+            key: The key of the value
+            value: Any picklable value
+            ttl: Seconds the value stays fresh
+            stored_at: Fetch time of the value, defaults to now
+        """
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        stored_at = time.time() if stored_at is None else stored_at
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (key, value, stored_at, ttl, size) VALUES (?, ?, ?, ?, ?)",
+                (key, blob, stored_at, ttl, len(blob)),
+            )
+            self._db.commit()
+            self._warm_keys.discard(key)
+            self._writes += 1
+            compact = self._writes % self.compact_every == 0
+        if compact:
+            self.compact()
+
+    def get(self, key):
+        """
+        Get a value whatever its age
+        Returns a (value, stored_at) tuple, None if the key is unknown
+        """
+        with self._lock:
+            row = self._db.execute("SELECT value, stored_at FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        try:
+            return pickle.loads(row[0]), row[1]
+        except Exception as e:
+            logging.error(f"Dropping unreadable cache entry {key}: {e}")
+            self.delete(key)
+            return None
+
+    def get_fresh(self, key, max_age):
+        """
+        Get a value if it is younger than max_age seconds, None otherwise
+        """
+        entry = self.get(key)
+        if entry is None or time.time() - entry[1] >= max_age:
+            return None
+        return entry
+
+    def get_warm(self, key, max_age):
+        """
+        Get a value if it is fresh, or if it was stored before the cache was opened and was not served yet.
+        The latter lets the first frame after a restart use the last known data instead of waiting for the network.
+        Returns a (value, stored_at) tuple, None if the caller has to fetch the value
+        """
+        entry = self.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry[1] < max_age:
+            return entry
+
+        with self._lock:
+            if key not in self._warm_keys:
+                return None
+            self._warm_keys.discard(key)
+            self.stale_served += 1
+        logging.info(f"Serving {key} from the persistent cache, fetched {int(time.time() - entry[1])}s ago")
+        return entry
+
+    def delete(self, key):
+        with self._lock:
+            self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._db.commit()
+
+    def compact(self):
+        """
+        Drop the entries expired for longer than max_stale_age, then the oldest ones until the size bounds hold,
+        and give the freed pages back to the file system
+        """
+        with self._lock:
+            db = self._db
+            db.execute("DELETE FROM entries WHERE stored_at + ttl + ? < ?", (self.max_stale_age, time.time()))
+
+            count, total_size = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            if count > self.max_entries or total_size > self.max_bytes:
+                rows = db.execute("SELECT key, size FROM entries ORDER BY stored_at ASC").fetchall()
+                dropped = []
+                for key, size in rows:
+                    if count <= self.max_entries and total_size <= self.max_bytes:
+                        break
+                    dropped.append((key,))
+                    count -= 1
+                    total_size -= size
+                db.executemany("DELETE FROM entries WHERE key = ?", dropped)
+                logging.info(f"Persistent cache over its bounds, dropped {len(dropped)} entries")
+            db.commit()
+
+            # only rewrite the file when a good part of it is free
+            page_count = db.execute("PRAGMA page_count").fetchone()[0]
+            free_pages = db.execute("PRAGMA freelist_count").fetchone()[0]
+            if page_count and free_pages > page_count // 4:
+                db.execute("VACUUM")
+
+    def stats(self):
+        with self._lock:
+            count, total_size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"entries": count, "bytes": total_size, "stale_served": self.stale_served}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
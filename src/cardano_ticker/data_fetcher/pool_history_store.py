@@ -0,0 +1,113 @@
+import logging
+import os
+import threading
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+
+# Columns kept for every epoch of a pool, with their array types (stakes and rewards in lovelace)
+HISTORY_COLUMNS = {
+    "epoch": np.int32,
+    "active_stake": np.int64,
+    "rewards": np.int64,
+    "blocks": np.int32,
+}
+
+
+class PoolHistoryStore:
+    """
+    Per-pool history kept as columnar NumPy arrays, one row per epoch, persisted as a .npz file per pool.
+    The history only grows by one epoch at a time, so a sync fetches the page holding the last stored epochs
+    and the ones after it, instead of the whole history. The last refetch_epochs stored epochs are read again,
+    as Blockfrost fills in their rewards after the epoch ended.
+    """
+
+    def __init__(self, api, directory=None, page_size=100, refetch_epochs=3):
+        """
+        Initialize the store
+        Args:
+            api: The Blockfrost client
+            directory: Directory of the .npz files, the histories are only kept in memory if None
+            page_size: Number of epochs per page of the pool history listing, at most 100
+            refetch_epochs: Number of last stored epochs read again on each sync
+        """
+        self.api = api
+        self.directory = directory
+        self.page_size = page_size
+        self.refetch_epochs = refetch_epochs
+
+        self._histories = {}  # pool id -> (columns, synced epoch)
+        self._lock = threading.Lock()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, pool_id):
+        return os.path.join(self.directory, f"pool_history_{pool_id}.npz")
+
+    @staticmethod
+    def _empty():
+        return {name: np.empty(0, dtype=dtype) for name, dtype in HISTORY_COLUMNS.items()}
+
+    def _load(self, pool_id):
+        if pool_id in self._histories:
+            return self._histories[pool_id]
+        entry = (self._empty(), -1)
+        if self.directory is not None and os.path.exists(self._path(pool_id)):
+            try:
+                with np.load(self._path(pool_id)) as stored:
+                    entry = ({name: stored[name] for name in HISTORY_COLUMNS}, int(stored["synced_epoch"]))
+            except (OSError, KeyError, ValueError) as e:
+                logging.warning(f"Dropping unreadable pool history of {pool_id}: {e}")
+        self._histories[pool_id] = entry
+        return entry
+
+    def _save(self, pool_id, columns, synced_epoch):
+        self._histories[pool_id] = (columns, synced_epoch)
+        if self.directory is None:
+            return
+        path = self._path(pool_id)
+        # write next to the file and swap, so a crash never leaves a truncated history
+        with open(path + ".tmp", "wb") as f:
+            np.savez(f, synced_epoch=synced_epoch, **columns)
+        os.replace(path + ".tmp", path)
+
+    def _fetch_from(self, pool_id, index):
+        """
+        Fetch the history entries from the one at index (0 based, oldest first) to the last one
+        """
+        return self.api.pool_history(
+            pool_id,
+            count=self.page_size,
+            page=index // self.page_size + 1,
+            order="asc",
+            gather_pages=True,
+            return_type="json",
+        )
+
+    def history(self, pool_id, epoch):
+        """
+        Get the history of a pool, synced at most once per epoch
+        Args:
+            pool_id: The pool id
+            epoch: The latest epoch known to Blockfrost, the history is synced when it moves past the synced one
+        Returns a dict mapping each of HISTORY_COLUMNS to an array, ordered by epoch
+        """
+        with self._lock:
+            columns, synced_epoch = self._load(pool_id)
+            if synced_epoch >= epoch:
+                return columns
+
+            start = max(len(columns["epoch"]) - self.refetch_epochs, 0)
+            entries = self._fetch_from(pool_id, start)
+            fetched = {
+                name: np.array([int(entry[name]) for entry in entries], dtype=dtype)
+                for name, dtype in HISTORY_COLUMNS.items()
+            }
+            # the fetched epochs replace the stored ones they overlap
+            if len(fetched["epoch"]):
+                keep = columns["epoch"] < fetched["epoch"][0]
+                columns = {name: np.concatenate([columns[name][keep], fetched[name]]) for name in HISTORY_COLUMNS}
+            self._save(pool_id, columns, epoch)
+            logging.info(f"Pool history of {pool_id} synced to epoch {epoch}, {len(entries)} epochs fetched")
+            return columns
@@ -0,0 +1,247 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logging.basicConfig(level=logging.INFO)
+
+# Number of last pages of the listings re-read on each sync, and seconds between two syncs
+TAIL_PAGES = 2
+SYNC_INTERVAL = 20 * 60
+
+
+class PoolIndex:
+    """
+    Local SQLite index of the network's stake pools.
+    The pool and retirement listings of Blockfrost are ordered by registration, so after the first full sync only
+    their last pages can change: each sync re-reads those pages, and a full sync now and then catches the rest.
+    A pool leaving the listing shifts its pages, so a sync whose active pool count does not match the length of the
+    listing is redone in full.
+    A retired pool registered again is listed as active while its retirement stays in the retirement listing: the
+    full sync clears its retirement and remembers it as superseded, so the next syncs do not retire it again.
+    Per-epoch stake and saturation of every pool can be stored as well, for ranking and comparison queries.
+    """
+
+    def __init__(
+        self,
+        api,
+        path=":memory:",
+        page_size=100,
+        tail_pages=TAIL_PAGES,
+        sync_interval=SYNC_INTERVAL,
+        full_sync_interval=7 * 24 * 60 * 60,
+    ):
+        """
+        Initialize the index
+        Args:
+            api: The Blockfrost client
+            path: Path of the SQLite file, in memory by default
+            page_size: Number of items per page of the listings, at most 100
+            tail_pages: Number of last pages re-read on each sync
+            sync_interval: Seconds between two syncs
+            full_sync_interval: Seconds between two full syncs
+        """
+        self.api = api
+        self.page_size = page_size
+        self.tail_pages = tail_pages
+        self.sync_interval = sync_interval
+        self.full_sync_interval = full_sync_interval
+
+        # sync holds the lock while reading the index
+        self._lock = threading.RLock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS pools (pool_id TEXT PRIMARY KEY, retired_epoch INTEGER);
+            CREATE TABLE IF NOT EXISTS superseded_retirements (
+                pool_id TEXT PRIMARY KEY,
+                retired_epoch INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS pool_epochs (
+                pool_id TEXT NOT NULL,
+                epoch INTEGER NOT NULL,
+                active_stake INTEGER,
+                live_stake INTEGER,
+                live_saturation REAL,
+                blocks_minted INTEGER,
+                PRIMARY KEY (pool_id, epoch)
+            );
+            CREATE INDEX IF NOT EXISTS pool_epochs_by_epoch ON pool_epochs (epoch, active_stake);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value REAL NOT NULL);
+            """
+        )
+        self._db.commit()
+
+    def _meta(self, key, default=0):
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row is not None else default
+
+    def _set_meta(self, key, value):
+        self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _read_pages(self, listing, first_page):
+        """
+        Read a listing from first_page to its end
+        Returns the items and the number of the last page
+        """
+        first_page = max(first_page, 1)
+        items = listing(count=self.page_size, page=first_page, gather_pages=True, return_type="json")
+        return items, first_page + max(len(items) - 1, 0) // self.page_size
+
+    def _sync_listings(self, full):
+        """
+        Read the pool and retirement listings into the index, from their first page or their last pages
+        Returns the number of pools in the pool listing
+        """
+        pools_page = 1 if full else max(int(self._meta("pools_last_page", 1)) - self.tail_pages + 1, 1)
+        retired_page = 1 if full else int(self._meta("retired_last_page", 1)) - self.tail_pages + 1
+
+        pool_ids, pools_last_page = self._read_pages(self.api.pools, pools_page)
+        retired, retired_last_page = self._read_pages(self.api.pools_retired, retired_page)
+
+        db = self._db
+        db.executemany("INSERT OR IGNORE INTO pools (pool_id) VALUES (?)", [(pool_id,) for pool_id in pool_ids])
+        # a retirement followed by a new registration of the pool does not retire it again
+        db.executemany(
+            "INSERT INTO pools (pool_id, retired_epoch) VALUES (?, ?) "
+            "ON CONFLICT(pool_id) DO UPDATE SET retired_epoch = excluded.retired_epoch "
+            "WHERE NOT EXISTS (SELECT 1 FROM superseded_retirements AS s "
+            "WHERE s.pool_id = excluded.pool_id AND s.retired_epoch = excluded.retired_epoch)",
+            [(pool["pool_id"], pool["epoch"]) for pool in retired],
+        )
+        if full:
+            db.execute("CREATE TEMP TABLE IF NOT EXISTS listed_pools (pool_id TEXT PRIMARY KEY)")
+            db.execute("DELETE FROM listed_pools")
+            db.executemany("INSERT OR IGNORE INTO listed_pools VALUES (?)", [(pool_id,) for pool_id in pool_ids])
+            # listed pools are active, a retirement of theirs was superseded by a new registration
+            db.execute(
+                "INSERT OR REPLACE INTO superseded_retirements SELECT pool_id, retired_epoch FROM pools "
+                "WHERE retired_epoch IS NOT NULL AND pool_id IN (SELECT pool_id FROM listed_pools)"
+            )
+            db.execute(
+                "UPDATE pools SET retired_epoch = NULL "
+                "WHERE retired_epoch IS NOT NULL AND pool_id IN (SELECT pool_id FROM listed_pools)"
+            )
+            # pools that left the listing without a retirement are not active anymore
+            db.execute(
+                "DELETE FROM pools WHERE retired_epoch IS NULL AND pool_id NOT IN (SELECT pool_id FROM listed_pools)"
+            )
+        self._set_meta("pools_last_page", pools_last_page)
+        self._set_meta("retired_last_page", retired_last_page)
+        return (pools_page - 1) * self.page_size + len(pool_ids)
+
+    def sync(self, force=False):
+        """
+        Bring the index up to date with the pool and retirement listings
+        Args:
+            force: Sync even if the last sync is recent
+        """
+        with self._lock:
+            now = time.time()
+            if not force and now - self._meta("last_sync") < self.sync_interval:
+                return
+
+            full = now - self._meta("last_full_sync") >= self.full_sync_interval
+            listed = self._sync_listings(full)
+            if not full and self.count() != listed:
+                logging.info(f"Pool index has {self.count()} active pools, the listing {listed}, syncing it in full")
+                full = True
+                self._sync_listings(full)
+
+            self._set_meta("last_sync", now)
+            if full:
+                self._set_meta("last_full_sync", now)
+            self._db.commit()
+            logging.info(f"Pool index synced ({'full' if full else 'tail'}), {self.count()} active pools")
+
+    def count(self):
+        """
+        Get the number of registered pools that are not retired
+        """
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM pools WHERE retired_epoch IS NULL").fetchone()[0]
+
+    def has_epoch(self, epoch):
+        with self._lock:
+            cursor = self._db.execute("SELECT 1 FROM pool_epochs WHERE epoch = ? LIMIT 1", (epoch,))
+            return cursor.fetchone() is not None
+
+    def sync_epoch(self, epoch):
+        """
+        Store the stake and saturation of every pool for an epoch, once per epoch
+        This reads the whole extended pool listing, so it is only done when a ranking or comparison is needed
+        Args:
+            epoch: The epoch the figures are stored for, normally the current one
+        """
+        with self._lock:
+            if self.has_epoch(epoch):
+                return
+            pools, _ = self._read_pages(self.api.pools_extended, 1)
+            rows = [
+                (
+                    pool["pool_id"],
+                    epoch,
+                    int(pool["active_stake"]),
+                    int(pool["live_stake"]),
+                    pool.get("live_saturation"),
+                    pool.get("blocks_minted"),
+                )
+                for pool in pools
+            ]
+            self._db.executemany("INSERT OR IGNORE INTO pools (pool_id) VALUES (?)", [(row[0],) for row in rows])
+            self._db.executemany("INSERT OR REPLACE INTO pool_epochs VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._db.commit()
+            logging.info(f"Pool index stored epoch {epoch} for {len(rows)} pools")
+
+    def ranking(self, epoch, limit=10, by="active_stake"):
+        """
+        Get the largest pools of an epoch
+        Args:
+            epoch: The epoch
+            limit: Number of pools returned
+            by: Column to rank by: active_stake, live_stake, live_saturation or blocks_minted
+        Returns a list of dicts, largest first
+        """
+        if by not in ("active_stake", "live_stake", "live_saturation", "blocks_minted"):
+            raise ValueError(f"Cannot rank pools by {by}")
+        with self._lock:
+            cursor = self._db.execute(
+                f"SELECT pool_id, active_stake, live_stake, live_saturation, blocks_minted FROM pool_epochs "
+                f"WHERE epoch = ? ORDER BY {by} DESC LIMIT ?",
+                (epoch, limit),
+            )
+            return [self._row_dict(row) for row in cursor]
+
+    def compare(self, pool_ids, epoch):
+        """
+        Get the figures of several pools for an epoch, keyed by pool id, with their rank by active stake
+        """
+        placeholders = ", ".join("?" for _ in pool_ids)
+        with self._lock:
+            cursor = self._db.execute(
+                f"SELECT pool_id, active_stake, live_stake, live_saturation, blocks_minted, rank FROM ("
+                f"SELECT *, RANK() OVER (ORDER BY active_stake DESC) AS rank FROM pool_epochs WHERE epoch = ?"
+                f") WHERE pool_id IN ({placeholders})",
+                (epoch, *pool_ids),
+            )
+            return {row[0]: {**self._row_dict(row[:5]), "rank": row[5]} for row in cursor}
+
+    @staticmethod
+    def _row_dict(row):
+        pool_id, active_stake, live_stake, live_saturation, blocks_minted = row
+        return {
+            "pool_id": pool_id,
+            "active_stake": active_stake,
+            "live_stake": live_stake,
+            "live_saturation": live_saturation,
+            "blocks_minted": blocks_minted,
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
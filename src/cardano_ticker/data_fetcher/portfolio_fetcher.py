@@ -1,14 +1,38 @@
 """
 Portfolio Data Fetcher - connects to portfolio-tracker-web API
 """
+import hashlib
 import logging
+import threading
+import time
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 
+import numpy as np
 import requests
 
+from cardano_ticker.data_fetcher.async_fetcher import AsyncPortfolioDataFetcher
+from cardano_ticker.data_fetcher.crypto_price_fetcher import CryptoPriceFetcher
+from cardano_ticker.data_fetcher.http_session import HttpSession, get_shared_session
+from cardano_ticker.data_fetcher.portfolio_history import PortfolioHistory
+from cardano_ticker.data_fetcher.quote_matrix import QuoteMatrix
+from cardano_ticker.data_fetcher.symbol_resolver import DEFAULT_COINGECKO_IDS
+from cardano_ticker.data_fetcher.transaction_ledger import TransactionLedger
+
 logging.basicConfig(level=logging.INFO)
 
+# Seconds a ticker API snapshot is served to every widget before it is fetched again
+SNAPSHOT_TTL = 60
+# Seconds between two fetches of the holdings when they are valued locally, quantities rarely change
+HOLDINGS_TTL = 15 * 60
+TICKER_PATH = "/api/ticker/portfolio"
+HISTORY_PATH = "/api/ticker/portfolio/history"
+TRANSACTIONS_PATH = "/api/transactions"
+# Seconds between two EUR rate fetches
+EUR_RATE_TTL = 60 * 60
+# A local quote more than this factor away from the server price is taken for another token with the same symbol
+MAX_QUOTE_RATIO = 2.0
+
 
 @dataclass
 class PortfolioHolding:
@@ -90,7 +114,13 @@ class PortfolioDataFetcher:
         api_base_url: Optional[str] = None,
         portfolio_id: int = 1,
         api_key: Optional[str] = None,
-        user_id: Optional[str] = None  # Deprecated: userId is now derived from API key
+        user_id: Optional[str] = None,  # Deprecated: userId is now derived from API key
+        session: Optional[HttpSession] = None,
+        quotes: Optional[QuoteMatrix] = None,
+        snapshot_ttl: float = SNAPSHOT_TTL,
+        holdings_ttl: float = HOLDINGS_TTL,
+        price_fetcher: Optional[CryptoPriceFetcher] = None,
+        quote_symbols: Optional[Dict[str, str]] = None,
     ):
         """
         Initialize the portfolio data fetcher.
@@ -101,14 +131,52 @@ class PortfolioDataFetcher:
             portfolio_id: The portfolio ID to fetch data for
             api_key: API key for authentication (required for API access)
             user_id: Deprecated - userId is now derived from the API key on the server
+            session: HttpSession used for the requests, defaults to the shared session
+            quotes: QuoteMatrix of the dashboard, the EUR rate is read from its FX table when given
+            snapshot_ttl: Seconds the ticker API snapshot is reused before it is fetched again
+            holdings_ttl: Seconds the snapshot is reused by the calls valuing it locally, and the transactions with
+                          the local history
+            price_fetcher: CryptoPriceFetcher of the dashboard, its daily candles value the local history
+            quote_symbols: Symbols the holdings are quoted as when valued locally, keyed by holding label
+                           (e.g. {"WBTC": "BTC"}). Only these and the common assets of the symbol resolver are
+                           valued locally, other holdings keep the server price.
         """
         self.api_base_url = api_base_url.rstrip('/') if api_base_url else None
         self.portfolio_id = portfolio_id
         self.api_key = api_key
+        self.session = session or get_shared_session()
+        self.quotes = quotes
+        self.quote_symbols = {asset.upper(): symbol.upper() for asset, symbol in (quote_symbols or {}).items()}
         self._cached_holdings: Optional[List[PortfolioHolding]] = None
         self._cached_prices: Dict[str, float] = {}
         self._cached_btc_price: float = 0
         self._cached_eur_rate: Optional[float] = None
+        self._eur_rate_time: float = 0
+        # running holdings of the transactions fetched so far
+        self.ledger = TransactionLedger()
+        self.snapshot_ttl = snapshot_ttl
+        self.holdings_ttl = holdings_ttl
+        # holdings arrays of the current snapshot and the last local valuation
+        self._positions: Optional[Dict] = None
+        self._valuation: Optional[Dict] = None
+        self._valuation_key: Optional[Tuple] = None
+        # daily values computed from the ledger and the daily candles, when the price fetcher is given
+        self.price_fetcher = price_fetcher
+        self.history = None
+        if price_fetcher is not None:
+            self.history = PortfolioHistory(self.ledger, self._daily_closes, self._usd_prices)
+        self._transactions_time: float = 0
+        self._transactions_lock = threading.Lock()
+        # the transactions endpoint may require a session and refuse the API key
+        self._transactions_denied = False
+        self._snapshot: Optional[Dict] = None
+        self._snapshot_time: float = 0
+        self._snapshot_lock = threading.Lock()
+        # validators, parsed payload and digest of the last answer of each ticker API request
+        self._answers: Dict[Tuple, Dict] = {}
+        self._answers_lock = threading.Lock()
+        # asyncio counterpart sharing this fetcher's caches
+        self.aio = AsyncPortfolioDataFetcher(self)
 
     def set_manual_holdings(self, holdings: List[Dict]) -> None:
         """
@@ -150,16 +218,7 @@ class PortfolioDataFetcher:
             return None
 
         try:
-            url = f"{self.api_base_url}/api/ticker/portfolio"
-            params = {
-                'portfolioId': self.portfolio_id
-            }
-            headers = {
-                'X-API-Key': self.api_key
-            }
-            response = requests.get(url, params=params, headers=headers, timeout=15)
-            response.raise_for_status()
-            return response.json()
+            return self._conditional_get(TICKER_PATH, {'portfolioId': self.portfolio_id})
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 401:
                 logging.error("Ticker API authentication failed. Check your API key.")
@@ -172,6 +231,210 @@ class PortfolioDataFetcher:
             logging.error(f"Failed to fetch from ticker API: {e}")
             return None
 
+    @staticmethod
+    def _answer_key(path: str, params: Dict) -> Tuple:
+        return (path, tuple(sorted(params.items())))
+
+    def _conditional_get(self, path: str, params: Dict):
+        """
+        GET a ticker API endpoint, sending the ETag and Last-Modified validators of its previous answer.
+        On 304 Not Modified, or when the payload hashes like the previous one, the previously parsed payload
+        is returned as is.
+        Raises requests.exceptions.HTTPError on error answers.
+
+        Args:
+            path: The endpoint path
+            params: The query parameters
+        """
+        key = self._answer_key(path, params)
+        with self._answers_lock:
+            previous = self._answers.get(key)
+
+        headers = {'X-API-Key': self.api_key}
+        if previous is not None:
+            if previous['etag']:
+                headers['If-None-Match'] = previous['etag']
+            if previous['last_modified']:
+                headers['If-Modified-Since'] = previous['last_modified']
+
+        response = self.session.get(f"{self.api_base_url}{path}", params=params, headers=headers, timeout=15)
+        if response.status_code == 304 and previous is not None:
+            return previous['data']
+        response.raise_for_status()
+
+        digest = hashlib.sha256(response.content).hexdigest()
+        if previous is not None and previous['digest'] == digest:
+            data = previous['data']
+        else:
+            data = response.json()
+        with self._answers_lock:
+            self._answers[key] = {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'data': data,
+                'digest': digest,
+            }
+        return data
+
+    def _digest(self, path: str, params: Dict) -> Optional[str]:
+        with self._answers_lock:
+            answer = self._answers.get(self._answer_key(path, params))
+        return answer['digest'] if answer else None
+
+    def _server_digest(self) -> Optional[str]:
+        return self._digest(TICKER_PATH, {'portfolioId': self.portfolio_id})
+
+    def snapshot_digest(self, local: bool = False) -> Optional[str]:
+        """
+        Get the hash of the last ticker API payload, None before the first one.
+        Unchanged as long as the portfolio is, so widgets can skip re-rendering the same data.
+
+        Args:
+            local: Also cover the prices of the last local valuation
+        """
+        digest = self._server_digest()
+        key = self._valuation_key
+        if digest is None or not self._valued_locally(local) or key is None or key[0] != digest:
+            return digest
+        return hashlib.sha256(repr(key).encode()).hexdigest()
+
+    def history_digest(self, days: int = 7) -> Optional[str]:
+        """
+        Get the hash of the last portfolio history payload for a number of days, None before the first one.
+        """
+        return self._digest(HISTORY_PATH, {'portfolioId': self.portfolio_id, 'days': days})
+
+    def _valued_locally(self, local: bool) -> bool:
+        return local and self.quotes is not None
+
+    def get_snapshot(self, local: bool = False) -> Optional[Dict]:
+        """
+        Get the ticker API data shared by the portfolio widgets.
+        The data is fetched at most once per snapshot_ttl seconds, concurrent callers wait for the same fetch.
+        When a fetch fails, the previous snapshot is served until the next attempt.
+
+        Args:
+            local: Value the holdings at the current quotes, the snapshot is then only needed for the quantities
+                   and cost basis and is fetched every holdings_ttl seconds. Ignored without the dashboard quotes.
+        """
+        with self._snapshot_lock:
+            now = time.time()
+            ttl = self.holdings_ttl if self._valued_locally(local) else self.snapshot_ttl
+            if now - self._snapshot_time >= ttl:
+                # stamp the attempt, so a failing API is not retried by every widget of the frame
+                self._snapshot_time = now
+                data = self.fetch_from_ticker_api()
+                if data is not None:
+                    self._snapshot = data
+                    self._positions = None
+                    self._cached_btc_price = data.get('summary', {}).get('btcPrice', 0)
+            if not self._valued_locally(local) or not self._snapshot or not self._snapshot.get('holdings'):
+                return self._snapshot
+            return self._revalue()
+
+    def _quote_symbol(self, asset: str) -> Optional[str]:
+        """
+        Get the symbol a holding is quoted as locally, None for the holdings only the server can value
+        """
+        if asset in self.quote_symbols:
+            return self.quote_symbols[asset]
+        return asset if asset in DEFAULT_COINGECKO_IDS else None
+
+    def _holdings_arrays(self) -> Dict:
+        """
+        Get the holdings of the current snapshot as arrays, built once per snapshot
+        """
+        if self._positions is None:
+            holdings = self._snapshot['holdings']
+            self._positions = {
+                'asset': [h['asset'].upper() for h in holdings],
+                'symbol': [self._quote_symbol(h['asset'].upper()) for h in holdings],
+                'color': [h.get('color') or get_asset_color(h['asset']) for h in holdings],
+                'quantity': np.array([float(h['quantity']) for h in holdings]),
+                'cost_basis': np.array([float(h['costBasis']) for h in holdings]),
+                'server_price': np.array([float(h.get('currentPrice') or 0) for h in holdings]),
+            }
+        return self._positions
+
+    def _revalue(self) -> Dict:
+        """
+        Value the snapshot holdings at the current USD quotes, in the shape of the ticker API data.
+        Only the holdings with a known quote symbol are revalued, see quote_symbols. Holdings without a quote, or
+        with a quote too far from the server price to be the same token, keep the price of the server valuation.
+        The 7-day performance is the server's.
+        """
+        positions = self._holdings_arrays()
+        assets = positions['asset']
+        symbols = positions['symbol']
+        quoted_symbols = sorted({symbol for symbol in symbols if symbol is not None} | {'BTC'})
+        rates = self.quotes.rates([(symbol, 'USD') for symbol in quoted_symbols])
+        quoted = np.array([rates[(symbol, 'USD')] if symbol else 0.0 for symbol in symbols], dtype=float)
+        server_price = positions['server_price']
+        plausible = (server_price <= 0) | (
+            (quoted <= server_price * MAX_QUOTE_RATIO) & (quoted * MAX_QUOTE_RATIO >= server_price)
+        )
+        price = np.where((quoted > 0) & plausible, quoted, server_price)
+        btc_price = rates[('BTC', 'USD')] or self._cached_btc_price
+
+        key = (self._server_digest(), tuple(price), btc_price)
+        if key == self._valuation_key:
+            return self._valuation
+
+        for i in np.flatnonzero((quoted > 0) & ~plausible):
+            logging.warning(
+                f"Local quote {quoted[i]} of {assets[i]} is too far from the server price {server_price[i]}, "
+                "keeping the server price"
+            )
+
+        value = positions['quantity'] * price
+        cost_basis = positions['cost_basis']
+        pnl = value - cost_basis
+        pnl_percent = np.divide(pnl * 100, cost_basis, out=np.zeros_like(pnl), where=cost_basis > 0)
+        total_value = float(value.sum())
+        total_cost = float(cost_basis.sum())
+        total_pnl = total_value - total_cost
+        by_value = np.argsort(-value, kind='stable')
+        by_pnl = np.argsort(-np.abs(pnl), kind='stable')
+
+        snapshot = self._snapshot
+        self._valuation = {
+            **snapshot,
+            'summary': {
+                **snapshot.get('summary', {}),
+                'totalValue': total_value,
+                'totalCost': total_cost,
+                'totalPnl': total_pnl,
+                'totalPnlPercent': total_pnl / total_cost * 100 if total_cost > 0 else 0,
+                'btcPrice': btc_price,
+            },
+            'holdings': [
+                {
+                    'asset': assets[i],
+                    'quantity': float(positions['quantity'][i]),
+                    'currentPrice': float(price[i]),
+                    'currentValue': float(value[i]),
+                    'costBasis': float(cost_basis[i]),
+                    'pnl': float(pnl[i]),
+                    'pnlPercent': float(pnl_percent[i]),
+                    'color': positions['color'][i],
+                }
+                for i in by_value
+            ],
+            'allocation': [
+                {'asset': assets[i], 'value': float(value[i]), 'color': positions['color'][i]}
+                for i in by_value
+                if value[i] > 0
+            ],
+            'pnlData': [
+                {'asset': assets[i], 'pnl': float(pnl[i]), 'color': EINK_GREEN if pnl[i] >= 0 else EINK_RED}
+                for i in by_pnl
+                if value[i] > 0
+            ],
+        }
+        self._valuation_key = key
+        self._cached_btc_price = btc_price
+        return self._valuation
+
     def fetch_current_prices(self, symbols: List[str]) -> Dict[str, float]:
         """Fetch current prices from the portfolio-tracker API"""
         if not self.api_base_url:
@@ -181,7 +444,7 @@ class PortfolioDataFetcher:
         try:
             url = f"{self.api_base_url}/api/prices/current"
             params = {'symbols': ','.join(symbols)}
-            response = requests.get(url, params=params, timeout=10)
+            response = self.session.get(url, params=params, timeout=10)
             response.raise_for_status()
             data = response.json()
             self._cached_prices = data.get('prices', {})
@@ -191,66 +454,62 @@ class PortfolioDataFetcher:
             return self._cached_prices
 
     def fetch_transactions(self) -> List[Dict]:
-        """Fetch transactions from the portfolio-tracker API"""
+        """
+        Fetch transactions from the portfolio-tracker API.
+        A 401 or 403 answer is remembered, the endpoint may only accept session auth and not the API key.
+        """
         if not self.api_base_url:
             logging.warning("No API URL configured")
             return []
 
         try:
-            url = f"{self.api_base_url}/api/transactions"
-            params = {'portfolioId': self.portfolio_id}
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
+            transactions = self._conditional_get(TRANSACTIONS_PATH, {'portfolioId': self.portfolio_id})
+        except requests.exceptions.HTTPError as e:
+            if e.response is not None and e.response.status_code in (401, 403):
+                if not self._transactions_denied:
+                    logging.warning(
+                        f"The transactions endpoint refused the API key (HTTP {e.response.status_code}), "
+                        "the local portfolio history falls back to the ticker API history"
+                    )
+                self._transactions_denied = True
+            else:
+                logging.error(f"Failed to fetch transactions: {e}")
+            return []
         except Exception as e:
             logging.error(f"Failed to fetch transactions: {e}")
             return []
+        self._transactions_denied = False
+        return transactions
 
     def calculate_holdings_from_transactions(self, transactions: List[Dict], prices: Dict[str, float]) -> List[PortfolioHolding]:
-        """Calculate current holdings from transaction history"""
-        holdings_map: Dict[str, Dict] = {}
-
-        for tx in transactions:
-            asset = tx['asset'].upper()
-            tx_type = tx.get('type', 'Buy')
-            quantity = float(tx.get('quantity', 0))
-            cost_usd = float(tx.get('costUsd', 0) or 0)
-            proceeds_usd = float(tx.get('proceedsUsd', 0) or 0)
-
-            if asset not in holdings_map:
-                holdings_map[asset] = {'quantity': 0, 'cost_basis': 0}
-
-            if tx_type in ('Buy', 'Deposit'):
-                holdings_map[asset]['quantity'] += quantity
-                holdings_map[asset]['cost_basis'] += cost_usd
-            elif tx_type in ('Sell', 'Withdrawal'):
-                # For sells, reduce quantity and proportionally reduce cost basis
-                if holdings_map[asset]['quantity'] > 0:
-                    ratio = quantity / holdings_map[asset]['quantity']
-                    holdings_map[asset]['cost_basis'] -= holdings_map[asset]['cost_basis'] * ratio
-                holdings_map[asset]['quantity'] -= quantity
-
-        holdings = []
-        for asset, data in holdings_map.items():
-            if data['quantity'] <= 0:
-                continue
-
-            current_price = prices.get(asset, 0)
-            current_value = data['quantity'] * current_price
-            cost_basis = data['cost_basis']
-            pnl = current_value - cost_basis
-            pnl_percent = (pnl / cost_basis * 100) if cost_basis > 0 else 0
+        """
+        Calculate current holdings from transaction history.
+        Only the transactions added since the previous call are applied to the ledger.
+        """
+        self.ledger.update(transactions)
+        positions = self.ledger.positions()
 
-            holdings.append(PortfolioHolding(
+        current_price = positions.index.map(lambda asset: prices.get(asset, 0)).to_numpy(dtype=float)
+        current_value = positions['quantity'].to_numpy() * current_price
+        cost_basis = positions['cost_basis'].to_numpy()
+        pnl = current_value - cost_basis
+        pnl_percent = np.divide(pnl * 100, cost_basis, out=np.zeros_like(pnl), where=cost_basis > 0)
+
+        holdings = [
+            PortfolioHolding(
                 asset=asset,
-                quantity=data['quantity'],
-                current_price=current_price,
-                current_value=current_value,
-                cost_basis=cost_basis,
-                pnl=pnl,
-                pnl_percent=pnl_percent,
+                quantity=float(quantity),
+                current_price=float(price),
+                current_value=float(value),
+                cost_basis=float(cost),
+                pnl=float(asset_pnl),
+                pnl_percent=float(percent),
                 color=get_asset_color(asset)
-            ))
+            )
+            for asset, quantity, price, value, cost, asset_pnl, percent in zip(
+                positions.index, positions['quantity'], current_price, current_value, cost_basis, pnl, pnl_percent
+            )
+        ]
 
         # Sort by value descending
         holdings.sort(key=lambda h: h.current_value, reverse=True)
@@ -271,7 +530,7 @@ class PortfolioDataFetcher:
 
         # Try the dedicated ticker API first (if API key is configured)
         if self.api_key:
-            data = self.fetch_from_ticker_api()
+            data = self.get_snapshot()
             if data and 'holdings' in data:
                 self._cached_holdings = [
                     PortfolioHolding(
@@ -286,7 +545,6 @@ class PortfolioDataFetcher:
                     )
                     for h in data['holdings']
                 ]
-                self._cached_btc_price = data.get('summary', {}).get('btcPrice', 0)
                 return self._cached_holdings
 
         # Fallback to transaction-based calculation (requires session auth - won't work externally)
@@ -330,17 +588,25 @@ class PortfolioDataFetcher:
         Get EUR/USD exchange rate.
         
         Args:
-            refresh: If True, fetch fresh rate. If False, use cached rate.
+            refresh: If True, fetch a fresh rate once the cached one is EUR_RATE_TTL seconds old.
+                     If False, use cached rate.
             
         Returns:
             EUR/USD exchange rate (e.g., 0.92 means 1 USD = 0.92 EUR), or None if fetch fails.
         """
-        if not refresh and self._cached_eur_rate is not None:
+        if self._cached_eur_rate is not None and (not refresh or time.time() - self._eur_rate_time < EUR_RATE_TTL):
             return self._cached_eur_rate
-        
+        self._eur_rate_time = time.time()
+
+        if self.quotes is not None:
+            # the FX table is shared with the price widgets and refreshed on its own schedule
+            rate = self.quotes.rates([("USD", "EUR")])[("USD", "EUR")]
+            self._cached_eur_rate = rate or None
+            return self._cached_eur_rate
+
         try:
             # Try to get EUR/USD rate from a free API
-            response = requests.get('https://api.exchangerate-api.com/v4/latest/USD', timeout=5)
+            response = self.session.get('https://api.exchangerate-api.com/v4/latest/USD', timeout=5)
             if response.status_code == 200:
                 data = response.json()
                 rate = data.get('rates', {}).get('EUR')
@@ -369,35 +635,71 @@ class PortfolioDataFetcher:
             return []
 
         try:
-            url = f"{self.api_base_url}/api/ticker/portfolio/history"
-            params = {
-                'portfolioId': self.portfolio_id,
-                'days': days,
-            }
-            headers = {
-                'X-API-Key': self.api_key
-            }
-            response = requests.get(url, params=params, headers=headers, timeout=15)
-            response.raise_for_status()
-            data = response.json()
+            data = self._conditional_get(HISTORY_PATH, {'portfolioId': self.portfolio_id, 'days': days})
             history = data.get('history', [])
             return [(entry['date'], entry['totalValue']) for entry in history]
         except Exception as e:
             logging.error(f"Failed to fetch portfolio history: {e}")
             return []
 
-    def get_allocation_data(self, refresh: bool = False) -> List[Tuple[str, float, str]]:
+    def _daily_closes(self, asset: str, days: int):
+        return self.price_fetcher.get_chart_data(asset, 'USD', days, require_ohlc=False)
+
+    def _usd_prices(self, assets: List[str]) -> Dict[str, float]:
+        prices = self.price_fetcher.get_realtime_many([(asset, 'USD') for asset in assets])
+        return {asset: price for (asset, _), price in prices.items()}
+
+    def get_local_history(self, days: int = 7) -> List[Tuple[str, float]]:
+        """
+        Get historical daily portfolio values computed locally from the transactions and the daily candles.
+        The transactions are fetched at most once per holdings_ttl seconds and only the new ones are applied.
+        While the transactions endpoint refuses the API key, the history of the ticker API is served instead.
+
+        Args:
+            days: Number of days of history, any window is served from the values kept so far
+
+        Returns:
+            List of (date_string, total_value_usd) tuples, sorted by date ascending, like fetch_portfolio_history.
+            Returns empty list without a price fetcher or transactions.
+        """
+        if self.history is None:
+            logging.warning("No price fetcher configured for the local portfolio history")
+            return []
+
+        with self._transactions_lock:
+            now = time.time()
+            if now - self._transactions_time >= self.holdings_ttl:
+                self._transactions_time = now
+                transactions = self.fetch_transactions()
+                if transactions:
+                    self.ledger.update(transactions)
+        if self._transactions_denied:
+            return self.fetch_portfolio_history(days)
+        return self.history.history(days)
+
+    def local_history_digest(self, days: int = 7) -> Optional[str]:
+        """
+        Get the hash of the last local history served for a number of days, None before the first one.
+        """
+        if self._transactions_denied:
+            return self.history_digest(days)
+        return self.history.digest(days) if self.history is not None else None
+
+    def get_allocation_data(self, refresh: bool = False, local: bool = False) -> List[Tuple[str, float, str]]:
         """
         Get allocation data for pie chart.
 
+        Args:
+            refresh: Read the shared ticker API snapshot
+            local: Read the snapshot valued at the current quotes, see get_snapshot
+
         Returns:
             List of tuples: (asset_name, value_usd, color)
         """
-        # Try ticker API first for fresh data
+        # Try the shared ticker API snapshot first
         if refresh and self.api_key and self.api_base_url:
-            data = self.fetch_from_ticker_api()
+            data = self.get_snapshot(local)
             if data and 'allocation' in data:
-                self._cached_btc_price = data.get('summary', {}).get('btcPrice', 0)
                 return [
                     (a['asset'], a['value'], a['color'])
                     for a in data['allocation']
@@ -407,19 +709,22 @@ class PortfolioDataFetcher:
         holdings = self.get_holdings(refresh)
         return [(h.asset, h.current_value, h.color) for h in holdings if h.current_value > 0]
 
-    def get_pnl_data(self, refresh: bool = False) -> List[Tuple[str, float, str]]:
+    def get_pnl_data(self, refresh: bool = False, local: bool = False) -> List[Tuple[str, float, str]]:
         """
         Get P&L data for treemap/heatmap.
 
+        Args:
+            refresh: Read the shared ticker API snapshot
+            local: Read the snapshot valued at the current quotes, see get_snapshot
+
         Returns:
             List of tuples: (asset_name, pnl_value, color)
             Color is green for profit, red for loss
         """
-        # Try ticker API first for fresh data
+        # Try the shared ticker API snapshot first
         if refresh and self.api_key and self.api_base_url:
-            data = self.fetch_from_ticker_api()
+            data = self.get_snapshot(local)
             if data and 'pnlData' in data:
-                self._cached_btc_price = data.get('summary', {}).get('btcPrice', 0)
                 return [
                     (p['asset'], p['pnl'], p['color'])
                     for p in data['pnlData']
@@ -437,19 +742,24 @@ class PortfolioDataFetcher:
         result.sort(key=lambda x: abs(x[1]), reverse=True)
         return result
 
-    def get_performance_7d_data(self, refresh: bool = False) -> List[Tuple[str, float, float, str]]:
+    def get_performance_7d_data(
+        self, refresh: bool = False, local: bool = False
+    ) -> List[Tuple[str, float, float, str]]:
         """
         Get 7-day performance data for treemap/heatmap.
 
+        Args:
+            refresh: Read the shared ticker API snapshot
+            local: Read the snapshot valued at the current quotes, see get_snapshot
+
         Returns:
             List of tuples: (asset_name, value_change, percent_change, color)
             Color is green for gains, red for losses
         """
-        # Try ticker API first for fresh data
+        # Try the shared ticker API snapshot first
         if refresh and self.api_key and self.api_base_url:
-            data = self.fetch_from_ticker_api()
+            data = self.get_snapshot(local)
             if data and 'performance7d' in data:
-                self._cached_btc_price = data.get('summary', {}).get('btcPrice', 0)
                 return [
                     (p['asset'], p['change'], p['changePercent'], p['color'])
                     for p in data['performance7d']
@@ -457,3 +767,42 @@ class PortfolioDataFetcher:
 
         # Fallback: return empty list if no API data
         return []
+
+
+class PortfolioFetcherRegistry:
+    """
+    Fetchers of the portfolios shown by one dashboard, created on first use.
+    Widgets of the same portfolio with the same options share one fetcher, so a frame fetches its ticker API
+    snapshot once. Widgets asking for other options get their own fetcher instead of the options of the first one.
+    """
+
+    def __init__(self):
+        self._fetchers: Dict[Tuple, PortfolioDataFetcher] = {}
+        self._lock = threading.Lock()
+
+    def get(self, api_base_url: str, portfolio_id: int = 1, api_key: Optional[str] = None, **kwargs):
+        """
+        Get the fetcher of a portfolio
+        Args:
+            api_base_url: Base URL for the portfolio-tracker API
+            portfolio_id: The portfolio ID to fetch data for
+            api_key: API key for authentication
+            kwargs: Other arguments for PortfolioDataFetcher, part of the identity of the fetcher
+        """
+        portfolio = (api_base_url.rstrip('/'), portfolio_id, api_key)
+        # mappings such as quote_symbols are made hashable to be part of the key
+        options = {
+            name: tuple(sorted(value.items())) if isinstance(value, dict) else value for name, value in kwargs.items()
+        }
+        key = (portfolio, tuple(sorted(options.items())))
+        with self._lock:
+            if key not in self._fetchers:
+                if any(other == portfolio for other, _ in self._fetchers):
+                    logging.warning(
+                        f"Portfolio {portfolio_id} of {api_base_url} is shown with other options, "
+                        "its widgets do not share one snapshot"
+                    )
+                self._fetchers[key] = PortfolioDataFetcher(
+                    api_base_url=api_base_url, portfolio_id=portfolio_id, api_key=api_key, **kwargs
+                )
+            return self._fetchers[key]
@@ -0,0 +1,203 @@
+import hashlib
+import logging
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+logging.basicConfig(level=logging.INFO)
+
+# Seconds before the closes of an asset are asked again to a provider that did not have them
+CLOSES_RETRY_INTERVAL = 5 * 60
+# Day of the transactions without a date, before any window
+UNDATED_DAY = pd.Timestamp("1970-01-01")
+
+
+def _today():
+    return pd.Timestamp.now(tz="UTC").tz_localize(None).normalize()
+
+
+def _days(index):
+    """
+    Get the UTC days of a time index
+    """
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_convert(None)
+    return index.floor("D")
+
+
+class PortfolioHistory:
+    """
+    Daily value of a portfolio computed locally from its transaction ledger and the daily candles of its assets.
+    The value of a day is the quantity of each asset held at the end of the day times its close, summed over the
+    assets: the row-wise product of a days x assets holdings matrix and a days x assets price matrix.
+    Closed days do not change, so their values are kept and only recomputed when a transaction dated on or before
+    them is applied. The closes of an asset are fetched once, then only the days closed since, and today is valued
+    at the current quotes. Windows of any length are served from the kept values, a longer window only fetches the
+    older closes once.
+    """
+
+    def __init__(self, ledger, fetch_closes, current_prices, retry_interval=CLOSES_RETRY_INTERVAL):
+        """
+        Initialize the history
+        Args:
+            ledger: The TransactionLedger of the portfolio
+            fetch_closes: Callable (asset, days) returning the daily USD candles of the last days, a DataFrame
+                          indexed by time with a close column, None on failure
+            current_prices: Callable (assets) returning a dict mapping each asset to its USD price, 0 if unknown
+            retry_interval: Seconds before asking again for closes a provider did not have
+        """
+        self.ledger = ledger
+        self.fetch_closes = fetch_closes
+        self.current_prices = current_prices
+        self.retry_interval = retry_interval
+        self._closes = {}  # asset -> daily closes, indexed by day
+        self._closes_from = {}  # asset -> first day of the closes asked to the providers
+        self._fetch_time = {}
+        self._failure_time = {}
+        self._values = pd.Series(dtype=float)  # value of the closed days, indexed by day
+        self._generation = None
+        self._rows = 0
+        self._digests = {}
+        self._lock = threading.Lock()
+
+    def _sync_ledger(self, frame):
+        """
+        Drop the kept values of the days changed by the ledger rows applied since the last call
+        """
+        if self._generation != self.ledger.generation or len(frame) < self._rows:
+            self._values = self._values.iloc[:0]
+        elif len(frame) > self._rows:
+            times = frame["time"].iloc[self._rows :]
+            if times.isna().any():
+                self._values = self._values.iloc[:0]
+            else:
+                self._values = self._values[self._values.index < _days(times).min()]
+        self._generation = self.ledger.generation
+        self._rows = len(frame)
+
+    @staticmethod
+    def _holdings(frame, days, assets):
+        """
+        Get the quantity of each asset held at the end of each day, a days x assets array
+        """
+        day = pd.Series(_days(frame["time"]), index=frame.index).fillna(UNDATED_DAY)
+        per_day = frame.groupby([day, frame["asset"]])["quantity"].sum().unstack(fill_value=0.0)
+        held = per_day.reindex(columns=assets, fill_value=0.0).sort_index().cumsum()
+        return held.reindex(days, method="ffill").fillna(0.0).clip(lower=0.0).to_numpy()
+
+    def _asset_closes(self, asset, first_day, today):
+        """
+        Get the daily closes of an asset from first_day, fetching the ones that are not kept yet
+        Returns a Series indexed by day, None if no close is known
+        """
+        if asset == "USD":
+            return pd.Series([1.0], index=pd.DatetimeIndex([UNDATED_DAY]))
+
+        stored = self._closes.get(asset)
+        closes_from = self._closes_from.get(asset)
+        now = time.time()
+        needs_older = closes_from is None or first_day < closes_from
+        needs_newer = stored is not None and stored.index[-1] < today - pd.Timedelta(days=1)
+        if needs_older:
+            if now - self._failure_time.get(asset, 0) < self.retry_interval:
+                return stored
+            since = first_day
+        elif needs_newer and now - self._fetch_time.get(asset, 0) >= self.retry_interval:
+            since = stored.index[-1]
+        else:
+            return stored
+
+        self._fetch_time[asset] = now
+        df = self.fetch_closes(asset, (today - since).days + 1)
+        if df is None or df.empty:
+            logging.warning(f"No daily closes for {asset} since {since.date()}")
+            self._failure_time[asset] = now
+            return stored
+
+        closes = pd.Series(df["close"].to_numpy(dtype=float), index=_days(df.index))
+        # the candle of today is still open
+        closes = closes[closes.index < today]
+        if stored is not None:
+            closes = pd.concat([stored, closes])
+        closes = closes[~closes.index.duplicated(keep="last")].sort_index()
+        self._closes[asset] = closes
+        if needs_older:
+            self._closes_from[asset] = first_day
+        return closes
+
+    def _last_close(self, asset):
+        closes = self._closes.get(asset)
+        return closes.iloc[-1] if closes is not None and not closes.empty else 0.0
+
+    def _price_matrix(self, assets, days, today):
+        """
+        Get the close of each asset on each day, a days x assets array, NaN where the close is unknown
+        """
+        columns = []
+        for asset in assets:
+            closes = self._asset_closes(asset, days[0], today)
+            if closes is None or closes.empty:
+                columns.append(np.full(len(days), np.nan))
+            else:
+                columns.append(closes.reindex(days, method="ffill").to_numpy(dtype=float))
+        return np.column_stack(columns)
+
+    def _value_closed_days(self, frame, days, assets, today):
+        """
+        Compute and keep the value of closed days, the days with an unknown close of a held asset are left out
+        """
+        held = self._holdings(frame, days, assets)
+        # assets not held on any of the days need no closes
+        needed = held.any(axis=0)
+        prices = np.zeros_like(held)
+        if needed.any():
+            prices[:, needed] = self._price_matrix([a for a, n in zip(assets, needed) if n], days, today)
+        known = ~(np.isnan(prices) & (held > 0)).any(axis=1)
+        values = np.einsum("ij,ij->i", held, np.nan_to_num(prices))
+        computed = pd.Series(values[known], index=days[known])
+        self._values = pd.concat([self._values, computed]).sort_index() if len(self._values) else computed
+
+    def history(self, days=7):
+        """
+        Get the value of the portfolio over the last days, today included
+        Args:
+            days: Number of days in the window
+        Returns a list of (date string, total value in USD) tuples sorted by date, without the days whose value is
+        unknown, empty when the ledger has no transactions
+        """
+        today = _today()
+        window = pd.date_range(end=today, periods=days, freq="D")
+        frame = self.ledger.transactions()
+        with self._lock:
+            self._sync_ledger(frame)
+            if frame.empty:
+                return []
+            assets = sorted(frame["asset"].unique())
+
+            closed = window[:-1]
+            missing = closed[~closed.isin(self._values.index)]
+            if len(missing):
+                self._value_closed_days(frame, missing, assets, today)
+
+            # today is valued at the current quotes, or the last close of the assets without one
+            held_today = self._holdings(frame, window[-1:], assets)[0]
+            held = held_today > 0
+            held_assets = [asset for asset, is_held in zip(assets, held) if is_held]
+            current = self.current_prices(held_assets) if held_assets else {}
+            prices = np.array([current.get(asset) or self._last_close(asset) for asset in held_assets], dtype=float)
+            today_value = float(held_today[held] @ prices) if held_assets else 0.0
+
+            kept = self._values[self._values.index.isin(closed)]
+            result = [(day.strftime("%Y-%m-%d"), float(value)) for day, value in kept.items()]
+            result.append((today.strftime("%Y-%m-%d"), float(today_value)))
+            self._digests[days] = hashlib.sha256(repr(result).encode()).hexdigest()
+            return result
+
+    def digest(self, days=7):
+        """
+        Get the hash of the last history served for a window, None before the first one
+        """
+        return self._digests.get(days)
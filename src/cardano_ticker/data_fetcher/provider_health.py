@@ -0,0 +1,150 @@
+import logging
+import threading
+import time
+
+logging.basicConfig(level=logging.INFO)
+
+
+class ProviderHealth:
+    """
+    Health of a single data provider, with a circuit breaker that stops calling it while it keeps failing.
+    After failure_threshold consecutive failures the circuit opens for a backoff period that doubles on every
+    failed retry, up to max_backoff. Once the backoff expires the provider gets a trial call (half-open),
+    and a success closes the circuit again.
+    """
+
+    def __init__(self, name, failure_threshold=3, base_backoff=30, max_backoff=30 * 60, ewma_alpha=0.3):
+        """
+        Initialize the provider health
+        Args:
+            name: The provider name
+            failure_threshold: Consecutive failures opening the circuit
+            base_backoff: Seconds the circuit stays open after it first opens
+            max_backoff: Upper bound of the backoff in seconds
+            ewma_alpha: Weight of the newest sample in the moving average of the answer latency
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.ewma_alpha = ewma_alpha
+
+        self.successes = 0
+        self.failures = 0
+        self.rate_limited = 0
+        self.server_errors = 0
+        self.latency_ewma = None
+        self.consecutive_failures = 0
+        self.backoff = 0
+        self.open_until = 0
+        self._lock = threading.Lock()
+
+    def record_success(self, latency=None):
+        """
+        Record a call that got an answer from the provider
+        Args:
+            latency: Duration of the call in seconds
+        """
+        with self._lock:
+            self.successes += 1
+            if latency is not None:
+                if self.latency_ewma is None:
+                    self.latency_ewma = latency
+                else:
+                    self.latency_ewma = self.ewma_alpha * latency + (1 - self.ewma_alpha) * self.latency_ewma
+            if self.consecutive_failures >= self.failure_threshold:
+                logging.info(f"Provider {self.name} recovered, closing its circuit")
+            self.consecutive_failures = 0
+            self.backoff = 0
+            self.open_until = 0
+
+    def record_failure(self, status_code=None):
+        """
+        Record a call that failed, opening the circuit when the provider keeps failing
+        Args:
+            status_code: The HTTP status code, None for transport errors
+        """
+        with self._lock:
+            self.failures += 1
+            if status_code == 429:
+                self.rate_limited += 1
+            elif status_code is not None and status_code >= 500:
+                self.server_errors += 1
+
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= self.failure_threshold:
+                self.backoff = min(self.backoff * 2 if self.backoff else self.base_backoff, self.max_backoff)
+                self.open_until = time.time() + self.backoff
+                logging.warning(f"Provider {self.name} keeps failing, skipping it for {self.backoff}s")
+
+    def is_open(self, now=None):
+        """
+        Check whether the circuit is open, i.e. the provider must not be called
+        """
+        now = time.time() if now is None else now
+        return now < self.open_until
+
+    @property
+    def success_rate(self):
+        calls = self.successes + self.failures
+        return self.successes / calls if calls else 1.0
+
+    def as_dict(self):
+        now = time.time()
+        return {
+            "successes": self.successes,
+            "failures": self.failures,
+            "success_rate": round(self.success_rate, 3),
+            "rate_limited": self.rate_limited,
+            "server_errors": self.server_errors,
+            "latency_ewma_s": None if self.latency_ewma is None else round(self.latency_ewma, 3),
+            "consecutive_failures": self.consecutive_failures,
+            "circuit_open": self.is_open(now),
+            "retry_in_s": max(round(self.open_until - now), 0),
+        }
+
+
+class ProviderHealthRegistry:
+    """
+    Health of a group of interchangeable providers, used to pick the order in which they are tried
+    """
+
+    def __init__(self, **health_kwargs):
+        """
+        Initialize the registry
+        Args:
+            health_kwargs: Arguments for every ProviderHealth created by the registry
+        """
+        self._health_kwargs = health_kwargs
+        self._providers = {}
+        self._lock = threading.Lock()
+
+    def get(self, name) -> ProviderHealth:
+        with self._lock:
+            if name not in self._providers:
+                self._providers[name] = ProviderHealth(name, **self._health_kwargs)
+            return self._providers[name]
+
+    def order(self, names):
+        """
+        Order the providers for the next call: providers that answered their last call first, fastest first,
+        then the ones that just failed, open circuits left out.
+        Providers without latency samples yet are tried early, so each one gets measured
+        Args:
+            names: Provider names in order of preference
+        """
+        now = time.time()
+        healthy = [name for name in names if not self.get(name).is_open(now)]
+        if names and not healthy:
+            logging.warning(f"All providers ({', '.join(names)}) have an open circuit")
+        return sorted(
+            healthy, key=lambda name: (self.get(name).consecutive_failures > 0, self.get(name).latency_ewma or 0.0)
+        )
+
+    def snapshot(self):
+        """
+        Get the health of every provider, keyed by name
+        """
+        with self._lock:
+            providers = list(self._providers.values())
+        return {provider.name: provider.as_dict() for provider in providers}
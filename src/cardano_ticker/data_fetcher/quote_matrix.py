@@ -0,0 +1,169 @@
+import logging
+import threading
+import time
+
+logging.basicConfig(level=logging.INFO)
+
+# Seconds a crypto quote that could not be refreshed is still served
+MAX_STALENESS = 60 * 60
+# Seconds before fetching the FX table again after a failed fetch
+FX_RETRY_INTERVAL = 5 * 60
+
+
+class QuoteMatrix:
+    """
+    Derives the price of any (symbol, currency) pair from a small set of base quotes:
+    the USD price of every crypto asset involved and one table of fiat exchange rates against USD.
+    A pair is the ratio of the USD prices of its two assets, so showing N assets in M currencies needs
+    one batched crypto request and one FX request instead of N x M pair requests.
+    Every base quote keeps its fetch time, so the age of a derived rate is known, and a crypto quote that could not
+    be refreshed for max_staleness seconds is no longer served.
+    """
+
+    def __init__(
+        self,
+        fetch_usd_quotes,
+        fetch_fx_table,
+        fetch_pair=None,
+        max_age=60,
+        fx_max_age=60 * 60,
+        max_staleness=MAX_STALENESS,
+        fx_retry_interval=FX_RETRY_INTERVAL,
+    ):
+        """
+        Initialize the matrix
+        Args:
+            fetch_usd_quotes: Callable (assets) returning a dict mapping assets to (USD price, fetch time) tuples
+            fetch_fx_table: Callable returning a dict mapping fiat currencies to their units per USD, None on failure
+            fetch_pair: Optional callable (symbol, currency) returning a direct quote, used for pairs without USD price
+            max_age: Seconds a crypto quote stays fresh
+            fx_max_age: Seconds the FX table stays fresh, fiat rates move much slower than crypto prices
+            max_staleness: Seconds a crypto quote is served when it cannot be refreshed, its pairs are 0 after that
+            fx_retry_interval: Seconds before fetching the FX table again after a failed fetch
+        """
+        self._fetch_usd_quotes = fetch_usd_quotes
+        self._fetch_fx_table = fetch_fx_table
+        self._fetch_pair = fetch_pair
+        self.max_age = max_age
+        self.fx_max_age = fx_max_age
+        self.max_staleness = max_staleness
+        self.fx_retry_interval = fx_retry_interval
+
+        self._usd = {}  # asset -> (USD price, fetch time)
+        self._fx = {}  # fiat -> units per USD
+        self._fx_time = 0
+        self._fx_attempt_time = 0
+        self._lock = threading.Lock()
+
+    def is_fiat(self, asset):
+        return asset == "USD" or asset in self._fx
+
+    def _refresh_fx(self, now):
+        self._fx_attempt_time = now
+        table = self._fetch_fx_table()
+        if table:
+            with self._lock:
+                self._fx = {currency.upper(): rate for currency, rate in table.items() if rate and rate > 0}
+                self._fx_time = now
+        elif self._fx:
+            logging.warning(f"Keeping the FX table fetched {int(now - self._fx_time)}s ago")
+
+    def refresh(self, assets):
+        """
+        Fetch the base quotes of the assets that are missing or stale
+        Args:
+            assets: Iterable of asset symbols, crypto or fiat
+        """
+        now = time.time()
+        assets = set(assets) - {"USD"}
+
+        # the FX table is needed to tell fiat currencies from crypto assets never seen before
+        fx_stale = now - self._fx_time >= self.fx_max_age and now - self._fx_attempt_time >= self.fx_retry_interval
+        if fx_stale and any(asset in self._fx or asset not in self._usd for asset in assets):
+            self._refresh_fx(now)
+
+        stale = [
+            asset
+            for asset in assets
+            if not self.is_fiat(asset) and (asset not in self._usd or now - self._usd[asset][1] >= self.max_age)
+        ]
+        if stale:
+            quotes = self._fetch_usd_quotes(sorted(stale))
+            with self._lock:
+                for asset, (price, fetched_time) in quotes.items():
+                    if price:
+                        self._usd[asset] = (price, fetched_time)
+
+    def usd_price(self, asset):
+        """
+        Get the USD price of an asset and the time it was fetched, None if unknown or older than max_staleness
+        """
+        if asset == "USD":
+            return 1.0, time.time()
+        with self._lock:
+            if asset in self._fx:
+                return 1 / self._fx[asset], self._fx_time
+            quote = self._usd.get(asset)
+        if quote is not None and time.time() - quote[1] > self.max_staleness:
+            return None
+        return quote
+
+    def _unquoted(self, asset):
+        """
+        Tell whether an asset has no USD price at all, not even a stale one
+        """
+        return not self.is_fiat(asset) and asset not in self._usd
+
+    def rate(self, symbol, currency):
+        """
+        Derive the price of a symbol in a currency from the stored base quotes, None if one of them is missing
+        """
+        symbol_quote = self.usd_price(symbol)
+        currency_quote = self.usd_price(currency)
+        if symbol_quote is None or currency_quote is None:
+            return None
+        return symbol_quote[0] / currency_quote[0]
+
+    def age(self, symbol, currency):
+        """
+        Get the age in seconds of the oldest base quote behind a pair, None if the pair cannot be derived
+        """
+        symbol_quote = self.usd_price(symbol)
+        currency_quote = self.usd_price(currency)
+        if symbol_quote is None or currency_quote is None:
+            return None
+        return time.time() - min(symbol_quote[1], currency_quote[1])
+
+    def rates(self, pairs):
+        """
+        Get the price of several (symbol, currency) pairs, fetching the missing or stale base quotes first
+        Args:
+            pairs: An iterable of (symbol, currency) tuples
+        Returns a dict mapping each pair to its price, 0 if it could not be derived nor fetched directly, or if a
+        base quote behind it is older than max_staleness
+        """
+        pairs = list(dict.fromkeys(pairs))
+        self.refresh({asset for pair in pairs for asset in pair})
+
+        prices = {}
+        for symbol, currency in pairs:
+            price = self.rate(symbol, currency) if symbol != currency else 1.0
+            # no USD price for one of the assets, the pair may still be listed on its own
+            # the USD pairs are left out, the refresh just asked for them
+            if price is None and self._fetch_pair is not None and currency != "USD":
+                if self._unquoted(symbol) or self._unquoted(currency):
+                    price = self._fetch_pair(symbol, currency)
+            prices[(symbol, currency)] = price or 0
+        return prices
+
+    def snapshot(self):
+        """
+        Get the stored base quotes with their age, and the age of the FX table
+        """
+        now = time.time()
+        with self._lock:
+            quotes = {
+                asset: {"usd": price, "age_s": round(now - fetched)} for asset, (price, fetched) in self._usd.items()
+            }
+            fx_age = round(now - self._fx_time) if self._fx_time else None
+        return {"usd_quotes": quotes, "fx_currencies": len(self._fx), "fx_age_s": fx_age}
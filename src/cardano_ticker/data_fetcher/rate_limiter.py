@@ -0,0 +1,62 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter: tokens are added at a steady rate up to a capacity, and every request takes one.
+    The capacity is the burst allowed after a quiet period, the rate is the sustained request rate.
+    """
+
+    def __init__(self, rate, capacity):
+        """
+        Initialize the bucket, full
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum number of tokens
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def tokens(self):
+        """
+        Get the number of tokens currently available
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+    def try_acquire(self, tokens=1):
+        """
+        Take tokens if they are available
+        Returns True if they were taken
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens < tokens:
+                return False
+            self._tokens -= tokens
+            return True
+
+    def acquire(self, tokens=1):
+        """
+        Take tokens, waiting until they are available
+        Returns the number of seconds waited
+        """
+        waited = 0
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
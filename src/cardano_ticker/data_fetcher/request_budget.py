@@ -0,0 +1,193 @@
+import logging
+import threading
+import time
+
+from cardano_ticker.data_fetcher.epoch_clock import EPOCH_LENGTH
+from cardano_ticker.data_fetcher.pool_index import SYNC_INTERVAL, TAIL_PAGES
+from cardano_ticker.data_fetcher.portfolio_fetcher import EUR_RATE_TTL, HOLDINGS_TTL, SNAPSHOT_TTL
+from cardano_ticker.data_fetcher.rate_limiter import TokenBucket
+
+logging.basicConfig(level=logging.INFO)
+
+CHAIN = "chain"
+PRICES = "prices"
+PORTFOLIO = "portfolio"
+
+# Pages of the extended pool listing, about 3,500 registered pools at 100 per page
+EXTENDED_POOL_PAGES = 35
+# Assets held by a portfolio whose daily closes are fetched for its local history
+HISTORY_ASSETS = 10
+
+# Default daily budgets: the Blockfrost free tier and conservative shares of the price APIs free tiers
+DEFAULT_DAILY_BUDGETS = {CHAIN: 50000, PRICES: 20000, PORTFOLIO: 5000}
+
+# Cost of a call of each fetcher method: (provider, requests per call reaching the provider,
+# minimum seconds between two calls reaching it because of the fetcher caches)
+CALL_COSTS = {
+    # one batched quote request, the quotes are kept for a minute
+    "get_realtime": (PRICES, 1, 60),
+    "get_realtime_many": (PRICES, 1, 60),
+    # incremental candle updates once the cached candles are a minute old
+    "get_chart_data": (PRICES, 1, 60),
+    "get_candles": (PRICES, 1, 60),
+    "pool": (CHAIN, 1, 0),
+    # kept until the next epoch
+    "pool_history": (CHAIN, 1, EPOCH_LENGTH),
+    "network": (CHAIN, 1, EPOCH_LENGTH),
+    # tip and next blocks, the chain is followed at most every 20 seconds
+    "blockchain_stats": (CHAIN, 2, 20),
+    "cardano_transactions_data": (CHAIN, 2, 20),
+    # computed locally
+    "epoch_progress": (None, 0, 0),
+    "fetch_from_ticker_api": (PORTFOLIO, 1, 0),
+    "fetch_portfolio_history": (PORTFOLIO, 1, 0),
+    # the portfolio widgets share one snapshot, counting each of them is an upper bound
+    "get_snapshot": (PORTFOLIO, 1, SNAPSHOT_TTL),
+    "get_allocation_data": (PORTFOLIO, 1, SNAPSHOT_TTL),
+    "get_pnl_data": (PORTFOLIO, 1, SNAPSHOT_TTL),
+    "get_performance_7d_data": (PORTFOLIO, 1, SNAPSHOT_TTL),
+    "get_eur_rate": (PORTFOLIO, 1, EUR_RATE_TTL),
+    # transactions, the closed days come from the kept values and the daily candles
+    "get_local_history": (PORTFOLIO, 1, HOLDINGS_TTL),
+}
+
+# Requests made beneath a call by the caches behind it, on their own schedule: (provider, requests per refresh,
+# minimum seconds between two refreshes). The runtime buckets only meter the calls of the data plan, these requests
+# are counted in the estimates so the refresh intervals are fitted to them as well.
+NESTED_COSTS = {
+    # the pool index tail sync of the pool and retirement listings, and the latest epoch once per epoch
+    "blockchain_stats": [(CHAIN, 2 * TAIL_PAGES, SYNC_INTERVAL), (CHAIN, 1, EPOCH_LENGTH)],
+    "epoch_progress": [(CHAIN, 1, EPOCH_LENGTH)],
+    "pool_history": [(CHAIN, 1, EPOCH_LENGTH)],
+    # the extended pool listing, stored once per epoch
+    "pool_ranking": [(CHAIN, EXTENDED_POOL_PAGES, EPOCH_LENGTH), (CHAIN, 1, EPOCH_LENGTH)],
+    "compare_pools": [(CHAIN, EXTENDED_POOL_PAGES, EPOCH_LENGTH), (CHAIN, 1, EPOCH_LENGTH)],
+    # the current quotes of the held assets, their daily closes once a day, and the ticker API history served
+    # instead when the transactions endpoint refuses the API key
+    "get_local_history": [(PRICES, 1, 60), (PRICES, HISTORY_ASSETS, 24 * 60 * 60), (PORTFOLIO, 1, 0)],
+}
+
+
+class RequestBudget:
+    """
+    Daily request budgets of the data providers, for a dashboard refreshed every refresh_interval seconds.
+    Before a dashboard runs, its requests per hour are estimated from its data plan and the fetcher cache TTLs,
+    and the refresh interval of every provider whose estimate exceeds its daily budget is stretched to fit.
+    At runtime a token bucket per provider, refilled at the daily budget rate, holds back the calls that would
+    still exceed it; their widgets keep their last data until the next refresh.
+    The buckets meter the calls of the data plan only. The requests the fetcher caches make beneath them, like the
+    pool index syncs or the candles of the local portfolio history, are priced in NESTED_COSTS and only count in
+    the estimates.
+    """
+
+    def __init__(self, refresh_interval, daily_budgets=None, burst_hours=1):
+        """
+        Initialize the budget
+        Args:
+            refresh_interval: Seconds between two refreshes of the dashboard
+            daily_budgets: Dict mapping providers to their daily request budget, DEFAULT_DAILY_BUDGETS by default
+            burst_hours: Hours of budget a provider can spend at once after a quiet period
+        """
+        self.refresh_interval = refresh_interval
+        self.daily_budgets = {**DEFAULT_DAILY_BUDGETS, **(daily_budgets or {})}
+        self._buckets = {
+            provider: TokenBucket(budget / (24 * 60 * 60), budget * burst_hours / 24)
+            for provider, budget in self.daily_budgets.items()
+        }
+        self._stretch = {provider: 1.0 for provider in self.daily_budgets}
+        self._last_call = {}
+        self._lock = threading.Lock()
+        self.held_back = 0
+
+    @staticmethod
+    def cost(method):
+        """
+        Get the (provider, requests, minimum interval) cost of a fetcher method, unknown methods cost one request
+        """
+        return CALL_COSTS.get(method, (CHAIN, 1, 0))
+
+    def interval(self, method):
+        """
+        Get the seconds between two calls of a method, the refresh interval stretched for its provider
+        The fetcher caches already space out the requests of cached methods, so their calls are not held back
+        """
+        provider = self.cost(method)[0]
+        return self.refresh_interval * self._stretch.get(provider, 1.0)
+
+    def estimate(self, methods, stretched=True):
+        """
+        Estimate the requests per hour made by a set of calls, per provider
+        Args:
+            methods: The fetcher methods called on each refresh, once per distinct call
+            stretched: Use the stretched refresh intervals, or the configured one
+        """
+        per_hour = {}
+        for method in methods:
+            provider, requests, min_interval = self.cost(method)
+            stretch = self._stretch.get(provider, 1.0) if stretched else 1.0
+            interval = max(self.refresh_interval * stretch, min_interval, 1)
+            if provider is not None:
+                per_hour[provider] = per_hour.get(provider, 0) + requests * 3600 / interval
+            for nested_provider, nested_requests, nested_interval in NESTED_COSTS.get(method, ()):
+                # not refreshed more often than the call itself
+                nested_interval = max(interval, nested_interval)
+                per_hour[nested_provider] = per_hour.get(nested_provider, 0) + nested_requests * 3600 / nested_interval
+        return per_hour
+
+    def fit(self, methods):
+        """
+        Stretch the refresh interval of the providers whose estimated daily requests exceed their budget
+        Args:
+            methods: The fetcher methods called on each refresh, once per distinct call
+        Returns the estimated requests per hour after stretching, per provider
+        """
+        self._stretch = {provider: 1.0 for provider in self.daily_budgets}
+        for provider, per_hour in self.estimate(methods, stretched=False).items():
+            budget = self.daily_budgets.get(provider)
+            if budget and per_hour * 24 > budget:
+                # calls below their cache interval do not shrink with the stretch, so the fit is approximate
+                self._stretch[provider] = per_hour * 24 / budget
+                logging.warning(
+                    f"{provider} needs about {int(per_hour * 24)} requests a day for a budget of {budget}, "
+                    f"refreshing it every {int(self.refresh_interval * self._stretch[provider])}s"
+                )
+        return self.estimate(methods)
+
+    def allow(self, key, method, now=None):
+        """
+        Check whether a call is due and fits in its provider's budget, and spend its requests if so
+        Args:
+            key: Hashable key identifying the call
+            method: The fetcher method called
+        """
+        now = time.time() if now is None else now
+        provider, requests, _ = self.cost(method)
+        if provider is None:
+            # local data, always fresh
+            return True
+        with self._lock:
+            last_call = self._last_call.get(key)
+            # a little slack so a call is not pushed to the next refresh by the time the previous one took
+            if last_call is not None and now - last_call < self.interval(method) - min(5, self.refresh_interval / 10):
+                return False
+            bucket = self._buckets.get(provider)
+            if bucket is not None and requests and not bucket.try_acquire(requests):
+                if last_call is not None:
+                    self.held_back += 1
+                    return False
+                # never leave a widget without data, the first call always goes through
+            self._last_call[key] = now
+            return True
+
+    def snapshot(self):
+        """
+        Get the stretch factor and the remaining burst of every provider
+        """
+        return {
+            provider: {
+                "daily_budget": self.daily_budgets[provider],
+                "stretch": round(self._stretch.get(provider, 1.0), 2),
+                "tokens": int(self._buckets[provider].tokens()),
+            }
+            for provider in self.daily_budgets
+        }
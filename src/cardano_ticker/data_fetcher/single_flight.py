@@ -0,0 +1,98 @@
+import threading
+import time
+from collections import defaultdict
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.finished_at = None
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces identical calls: while a call for a key is running, other callers of the same key wait for it
+    and share its result instead of starting their own. A finished result is also shared for share_window seconds,
+    so widgets asking for the same data one after the other in a frame do a single fetch.
+    Errors are shared with the callers already waiting, but never with later ones.
+    """
+
+    def __init__(self, share_window=2.0):
+        """
+        Initialize the single flight group
+        Args:
+            share_window: Seconds a finished result is handed to identical calls
+        """
+        self.share_window = share_window
+        self.calls = 0
+        self.coalesced = 0
+        self._coalesced_by_key = defaultdict(int)
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func, *args, **kwargs):
+        """
+        Call func, unless an identical call is running or just finished, and return its result
+        Args:
+            key: Hashable key identifying identical calls
+            func: The function to call
+            args: Positional arguments of func
+            kwargs: Keyword arguments of func
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if (
+                call is not None
+                and call.finished_at is not None
+                and time.time() - call.finished_at >= self.share_window
+            ):
+                call = None
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.calls += 1
+            else:
+                self.coalesced += 1
+                self._coalesced_by_key[str(key[0]) if isinstance(key, tuple) else str(key)] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                # later callers retry instead of getting the error
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            raise
+        finally:
+            call.finished_at = time.time()
+            call.done.set()
+            self._forget_expired()
+        return call.result
+
+    def _forget_expired(self):
+        now = time.time()
+        with self._lock:
+            expired = [
+                key
+                for key, call in self._calls.items()
+                if call.finished_at is not None and now - call.finished_at >= self.share_window
+            ]
+            for key in expired:
+                del self._calls[key]
+
+    def stats(self):
+        """
+        Count the calls that ran and the ones that shared the result of another call
+        """
+        with self._lock:
+            return {"calls": self.calls, "coalesced": self.coalesced, "coalesced_by_call": dict(self._coalesced_by_key)}
@@ -0,0 +1,176 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+
+logging.basicConfig(level=logging.INFO)
+
+BINANCE = "binance"
+COINGECKO = "coingecko"
+CRYPTOCOMPARE = "cryptocompare"
+EXCHANGERATE = "exchangerate"
+
+# Providers returning full open/high/low/close candles, CoinGecko's market chart only has close prices
+PROVIDER_OHLC = {
+    BINANCE: True,
+    CRYPTOCOMPARE: True,
+    COINGECKO: False,
+}
+
+# CoinGecko ids of common assets, they win over the listing where several coins share a symbol
+DEFAULT_COINGECKO_IDS = {
+    "ADA": "cardano",
+    "BTC": "bitcoin",
+    "ETH": "ethereum",
+    "SOL": "solana",
+    "DOT": "polkadot",
+    "AVAX": "avalanche-2",
+    "MATIC": "matic-network",
+    "LINK": "chainlink",
+    "UNI": "uniswap",
+    "ATOM": "cosmos",
+    "XRP": "ripple",
+    "DOGE": "dogecoin",
+    "SHIB": "shiba-inu",
+    "LTC": "litecoin",
+    "BNB": "binancecoin",
+    "USDT": "tether",
+    "USDC": "usd-coin",
+}
+
+
+class SymbolResolver:
+    """
+    Translates (symbol, currency) pairs to the identifiers each price provider expects,
+    and remembers the pairs a provider does not support so they are not requested again.
+    The tables start from built-in defaults and are refreshed from the providers' listing endpoints.
+    """
+
+    def __init__(self, request_json, refresh_interval=24 * 60 * 60, negative_ttl=6 * 60 * 60):
+        """
+        Initialize the resolver
+        Args:
+            request_json: Callable (provider, url) returning the decoded json answer of a provider
+            refresh_interval: Seconds between two refreshes of the listings
+            negative_ttl: Seconds an unsupported (provider, pair) combination is remembered
+        """
+        self._request_json = request_json
+        self.refresh_interval = refresh_interval
+        self.negative_ttl = negative_ttl
+
+        self._coingecko_ids = dict(DEFAULT_COINGECKO_IDS)
+        self._coingecko_vs_currencies = None  # unknown until the listing is fetched
+        self._binance_symbols = None  # unknown until the listing is fetched
+        self._unsupported = defaultdict(dict)  # provider -> {(symbol, currency): expiry}
+        self._last_refresh = 0
+        self._refresh_lock = threading.Lock()
+
+    def refresh(self, force=False, wait=False):
+        """
+        Rebuild the symbol tables from the providers' listing endpoints, if they are older than the refresh interval
+        The listings are downloaded on a background thread, lookups keep using the current tables meanwhile.
+        A listing that cannot be fetched keeps its previous table
+        Args:
+            force: Refresh even if the tables are recent
+            wait: Block until the refresh is done
+        """
+        if not force and time.time() - self._last_refresh < self.refresh_interval:
+            return
+        # only one refresh runs at a time, released by the refresh thread
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        self._last_refresh = time.time()
+        thread = threading.Thread(target=self._refresh_listings, name="symbol_listings", daemon=True)
+        thread.start()
+        if wait:
+            thread.join()
+
+    def _refresh_listings(self):
+        try:
+            self._refresh_coingecko()
+            self._refresh_binance()
+        finally:
+            self._refresh_lock.release()
+
+    def _refresh_coingecko(self):
+        try:
+            coins = self._request_json(COINGECKO, "https://api.coingecko.com/api/v3/coins/list")
+            ids_by_symbol = defaultdict(set)
+            for coin in coins:
+                ids_by_symbol[coin["symbol"].upper()].add(coin["id"])
+            # keep only symbols naming a single coin, ambiguous ones stay resolvable through the defaults
+            ids = {symbol: next(iter(ids)) for symbol, ids in ids_by_symbol.items() if len(ids) == 1}
+            ids.update(DEFAULT_COINGECKO_IDS)
+            self._coingecko_ids = ids
+
+            vs_currencies = self._request_json(
+                COINGECKO, "https://api.coingecko.com/api/v3/simple/supported_vs_currencies"
+            )
+            self._coingecko_vs_currencies = {currency.upper() for currency in vs_currencies}
+        except Exception as e:
+            logging.error(f"Failed to refresh CoinGecko listing: {e}")
+
+    def _refresh_binance(self):
+        try:
+            # the price ticker lists every trading pair and is much smaller than exchangeInfo
+            tickers = self._request_json(BINANCE, "https://api.binance.com/api/v3/ticker/price")
+            self._binance_symbols = {ticker["symbol"] for ticker in tickers}
+        except Exception as e:
+            logging.error(f"Failed to refresh Binance listing: {e}")
+
+    def coingecko_id(self, symbol):
+        """
+        Get the CoinGecko id of a symbol, None if unknown
+        """
+        self.refresh()
+        return self._coingecko_ids.get(symbol.upper())
+
+    def binance_pair(self, symbol, currency):
+        """
+        Get the Binance trading pair of a (symbol, currency) pair, None if Binance does not list it
+        USD prices are taken from the USDT pairs
+        """
+        self.refresh()
+        quote = currency.upper()
+        if quote == "USD":
+            quote = "USDT"
+        pair = f"{symbol}{quote}".upper()
+        if self._binance_symbols is not None and pair not in self._binance_symbols:
+            return None
+        return pair
+
+    def mark_unsupported(self, provider, symbol, currency):
+        """
+        Remember that a provider answered without the pair, so it is skipped for a while
+        """
+        logging.info(f"{provider} does not support {symbol}/{currency}, skipping it for {self.negative_ttl}s")
+        self._unsupported[provider][(symbol, currency)] = time.time() + self.negative_ttl
+
+    def supports(self, provider, symbol, currency):
+        """
+        Check whether a provider is worth asking for a pair
+        """
+        expiry = self._unsupported[provider].get((symbol, currency))
+        if expiry is not None:
+            if time.time() < expiry:
+                return False
+            self._unsupported[provider].pop((symbol, currency), None)
+
+        if provider == COINGECKO:
+            if self.coingecko_id(symbol) is None:
+                return False
+            vs_currencies = self._coingecko_vs_currencies
+            return vs_currencies is None or currency.upper() in vs_currencies
+        if provider == BINANCE:
+            return self.binance_pair(symbol, currency) is not None
+        return True
+
+    def unsupported(self):
+        """
+        Get the pairs currently skipped, keyed by provider
+        """
+        now = time.time()
+        return {
+            provider: sorted(f"{symbol}/{currency}" for (symbol, currency), expiry in pairs.items() if expiry > now)
+            for provider, pairs in self._unsupported.items()
+        }
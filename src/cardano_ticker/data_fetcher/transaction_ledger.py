@@ -0,0 +1,144 @@
+import logging
+import threading
+
+import numpy as np
+import pandas as pd
+
+logging.basicConfig(level=logging.INFO)
+
+# Transaction types adding to a holding, and taking from it
+BUY_TYPES = ("Buy", "Deposit")
+SELL_TYPES = ("Sell", "Withdrawal")
+
+
+def _marker(tx):
+    """
+    Identity of a transaction, its id when the API gives one
+    """
+    return tx["id"] if "id" in tx else repr(sorted(tx.items()))
+
+
+def transactions_frame(transactions):
+    """
+    Convert portfolio-tracker transactions to ledger rows
+    Args:
+        transactions: The transactions, dicts with asset, type, quantity, costUsd and date keys
+    Returns a DataFrame with a row per transaction: its time (NaT when it has no date), asset, signed quantity,
+    the cost it adds to the cost basis and whether it takes a share of the cost basis out
+    """
+    types = pd.Series([tx.get("type", "Buy") for tx in transactions], dtype=object)
+    quantity = np.array([float(tx.get("quantity", 0)) for tx in transactions], dtype=float)
+    cost = np.array([float(tx.get("costUsd", 0) or 0) for tx in transactions], dtype=float)
+    buy = types.isin(BUY_TYPES).to_numpy()
+    sell = types.isin(SELL_TYPES).to_numpy()
+    return pd.DataFrame(
+        {
+            "time": pd.to_datetime([tx.get("date") for tx in transactions], utc=True, errors="coerce"),
+            "asset": np.array([tx["asset"].upper() for tx in transactions], dtype=object),
+            "quantity": np.where(buy, quantity, np.where(sell, -quantity, 0.0)),
+            "cost": np.where(buy, cost, 0.0),
+            "sell": sell,
+        }
+    )
+
+
+class TransactionLedger:
+    """
+    Columnar copy of the transactions of a portfolio, with the running quantity and cost basis of each asset.
+    The cost basis follows the average cost method: buys and deposits add their cost, sells and withdrawals take
+    out the share of the cost basis of the quantity they remove.
+    The transactions are listed oldest first and only the ones after the cursor are applied, with a vectorized
+    group-by over the new rows, so a refresh costs in proportion to the new activity instead of the history length.
+    When an applied transaction changed or was deleted, the ledger is rebuilt from scratch.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # number of rebuilds, so users of the rows can tell appended rows from a new history
+        self.generation = 0
+        self._reset()
+
+    def _reset(self):
+        self._batches = []
+        self._frame = None
+        self.cursor = 0
+        self._last_marker = None
+        self.state = pd.DataFrame({"quantity": pd.Series(dtype=float), "cost_basis": pd.Series(dtype=float)})
+
+    def update(self, transactions):
+        """
+        Apply the transactions after the cursor
+        Args:
+            transactions: Every transaction of the portfolio, oldest first
+        Returns the number of transactions applied
+        """
+        with self._lock:
+            if self.cursor and (
+                len(transactions) < self.cursor or _marker(transactions[self.cursor - 1]) != self._last_marker
+            ):
+                logging.info("Transactions changed before the ledger cursor, rebuilding the ledger")
+                self._reset()
+                self.generation += 1
+
+            new = transactions[self.cursor :]
+            if not new:
+                return 0
+            batch = transactions_frame(new)
+            self._apply(batch)
+            self._batches.append(batch)
+            self._frame = None
+            self.cursor = len(transactions)
+            self._last_marker = _marker(transactions[-1])
+            return len(new)
+
+    def _apply(self, batch):
+        """
+        Apply ledger rows to the per-asset state
+        Within an asset, a sell scales the cost basis by (1 - sold / quantity before the sell), so the cost basis at
+        the end of the batch is the starting one scaled by every factor, plus the cost of each buy scaled by the
+        factors of the sells after it.
+        """
+        assets = batch["asset"]
+        start = self.state.reindex(assets.unique(), fill_value=0.0)
+
+        after = batch.groupby("asset", sort=False)["quantity"].cumsum() + assets.map(start["quantity"])
+        before = after - batch["quantity"]
+        # sells of an empty or short holding leave the cost basis as is
+        factor = pd.Series(
+            np.where(batch["sell"] & (before > 0), 1 + batch["quantity"] / before.where(before > 0, 1.0), 1.0),
+            index=batch.index,
+        )
+        # product of the factors of each row and the rows after it, in its asset
+        remaining = factor.iloc[::-1].groupby(assets.iloc[::-1], sort=False).cumprod().reindex(batch.index)
+
+        grouped = pd.DataFrame({"asset": assets, "quantity": batch["quantity"], "kept": batch["cost"] * remaining})
+        sums = grouped.groupby("asset", sort=False).sum()
+        scale = factor.groupby(assets, sort=False).prod()
+
+        applied = pd.DataFrame(
+            {
+                "quantity": start["quantity"] + sums["quantity"],
+                "cost_basis": start["cost_basis"] * scale + sums["kept"],
+            }
+        )
+        self.state = applied.combine_first(self.state)
+
+    def positions(self):
+        """
+        Get the quantity and cost basis of the assets still held, a DataFrame indexed by asset
+        """
+        with self._lock:
+            return self.state[self.state["quantity"] > 0].copy()
+
+    def transactions(self):
+        """
+        Get the applied transactions as one DataFrame of ledger rows, oldest first
+        """
+        with self._lock:
+            if self._frame is None:
+                if self._batches:
+                    self._frame = pd.concat(self._batches, ignore_index=True)
+                    self._batches = [self._frame]
+                else:
+                    self._frame = transactions_frame([])
+            return self._frame
@@ -2,6 +2,7 @@ from typing import Tuple
 
 from PIL import Image, ImageColor
 
+from cardano_ticker.data_fetcher.data_plan import DataPlan
 from cardano_ticker.utils.colors import Colors
 
 
@@ -46,6 +47,40 @@ class AbstractWidget:
         """
         raise NotImplementedError("Subclasses must implement the update method")
 
+    async def update_async(self):
+        """
+        Update the widget from an event loop, so that several widgets can fetch their data concurrently
+        The requests returned by data_requests are fetched on the shared fetch executor, then the widget updates
+        from them with update_from_plan. Widgets declaring no request update in place.
+        """
+        if not self.data_requests():
+            self.update()
+            return
+        self.update_from_plan(await DataPlan([self]).execute_async())
+
+    def data_requests(self):
+        """
+        Declare the data the next update needs, so a DataPlan can fetch it together with the other widgets' data
+        Returns a list of DataRequest, empty if the widget fetches nothing or fetches on its own
+        """
+        return []
+
+    def update_from_plan(self, results):
+        """
+        Update the widget from the results of a DataPlan
+        Args:
+            results: PlanResults holding the result of every request returned by data_requests
+        """
+        self.update()
+
+    def render_key(self):
+        """
+        Get a hashable key of the data the next render draws, so a layout can skip rendering the widget
+        when the key did not change since its last render
+        Returns None to render on every frame
+        """
+        return None
+
     def render(self):
         """
         Render the widget as an image
@@ -2,6 +2,7 @@ import os
 
 from PIL import ImageFont
 
+from cardano_ticker.data_fetcher.data_plan import DataRequest
 from cardano_ticker.utils.constants import RESOURCES_DIR
 from cardano_ticker.utils.currency import PriceCurrency
 from cardano_ticker.widgets.generic.w_charts_generic import (
@@ -32,7 +33,15 @@ class BlockchainTransactionsWidget(LineChartWidget):
         )
 
     def update(self):
-        blockchain_stats = self.data_fetcher.blockchain_stats()
+        self._update_stats(self.data_fetcher.blockchain_stats())
+
+    def data_requests(self):
+        return [DataRequest(self.data_fetcher, "blockchain_stats", ())]
+
+    def update_from_plan(self, results):
+        self._update_stats(results.value(DataRequest(self.data_fetcher, "blockchain_stats", ())))
+
+    def _update_stats(self, blockchain_stats):
         l_data = [("tx nb", blockchain_stats["transactions"]["transactions"])]
         super().update(l_data, [self.line_color])
 
@@ -43,8 +52,16 @@ class BlockchainProgressWidget(ProgressBarWidget):
         super().__init__(size, 0, background_color=background_color, font_size=font_size)
 
     def update(self):
-        blockchain_stats = self.data_fetcher.blockchain_stats()
-        super().update(blockchain_stats["percentage_progress"])
+        self._update_progress(self.data_fetcher.epoch_progress())
+
+    def data_requests(self):
+        return [DataRequest(self.data_fetcher, "epoch_progress", ())]
+
+    def update_from_plan(self, results):
+        self._update_progress(results.value(DataRequest(self.data_fetcher, "epoch_progress", ())))
+
+    def _update_progress(self, epoch_progress):
+        super().update(epoch_progress["percentage_progress"])
 
 
 class BlockchainStatsTable(TableWidget):
@@ -73,7 +90,15 @@ class BlockchainStatsTable(TableWidget):
         )
 
     def update(self):
-        blockchain_stats = self.data_fetcher.blockchain_stats()
+        self._update_stats(self.data_fetcher.blockchain_stats())
+
+    def data_requests(self):
+        return [DataRequest(self.data_fetcher, "blockchain_stats", ())]
+
+    def update_from_plan(self, results):
+        self._update_stats(results.value(DataRequest(self.data_fetcher, "blockchain_stats", ())))
+
+    def _update_stats(self, blockchain_stats):
         headers = ["Epoch", "Active Stake", "Total Stake Pools", "Remaining Time"]
 
         active_stake = blockchain_stats["active_stake"]
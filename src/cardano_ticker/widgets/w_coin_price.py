@@ -4,6 +4,7 @@ from typing import List, Tuple
 from PIL import Image, ImageDraw, ImageFont
 
 from cardano_ticker.data_fetcher.data_fetcher import DataFetcher
+from cardano_ticker.data_fetcher.data_plan import DataRequest
 from cardano_ticker.utils.colors import Colors
 from cardano_ticker.utils.constants import RESOURCES_DIR
 from cardano_ticker.utils.currency import PriceCurrency
@@ -201,6 +202,12 @@ class BtcPrice(PriceWidget):
         price = self.data_fetcher.get_realtime("BTC", self._currency.value)
         return super().update(price)
 
+    def data_requests(self):
+        return [DataRequest(self.data_fetcher, "get_realtime", ("BTC", self._currency.value))]
+
+    def update_from_plan(self, results):
+        return super().update(results.value(self.data_requests()[0]))
+
 
 class EthPrice(PriceWidget):
     def __init__(
@@ -227,6 +234,12 @@ class EthPrice(PriceWidget):
         price = self.data_fetcher.get_realtime("ETH", self._currency.value)
         return super().update(price)
 
+    def data_requests(self):
+        return [DataRequest(self.data_fetcher, "get_realtime", ("ETH", self._currency.value))]
+
+    def update_from_plan(self, results):
+        return super().update(results.value(self.data_requests()[0]))
+
 
 class AdaPrice(PriceWidget):
     def __init__(
@@ -253,6 +266,12 @@ class AdaPrice(PriceWidget):
         price = self.data_fetcher.get_realtime("ADA", self._currency.value)
         return super().update(price)
 
+    def data_requests(self):
+        return [DataRequest(self.data_fetcher, "get_realtime", ("ADA", self._currency.value))]
+
+    def update_from_plan(self, results):
+        return super().update(results.value(self.data_requests()[0]))
+
 
 class PriceWithLogo(AbstractWidget):
     def __init__(
@@ -354,10 +373,9 @@ class CoinPriceWithLogo(PriceWithLogo):
         logo = self.get_logo()
         symbol = self.get_symbol()
 
-        if isinstance(currency, list):
-            prices = [(data_fetcher.get_realtime(symbol, c.value), c) for c in currency]
-        else:
-            prices = [(data_fetcher.get_realtime(symbol, currency.value), currency)]
+        currencies = currency if isinstance(currency, list) else [currency]
+        quotes = data_fetcher.get_realtime_many([(symbol, c.value) for c in currencies])
+        prices = [(quotes[(symbol, c.value)], c) for c in currencies]
         super().__init__(prices, size, logo, text_color, background_color)
 
     def get_logo(self):
@@ -366,11 +384,25 @@ class CoinPriceWithLogo(PriceWithLogo):
     def get_symbol(self):
         raise NotImplementedError("Subclasses must implement the get_symbol method")
 
-    def update(self):
+    def _pairs(self):
+        symbol = self.get_symbol()
+        return tuple((symbol, c.value) for c in self.price_widgets.keys())
+
+    def _update_quotes(self, quotes):
         symbol = self.get_symbol()
-        prices = [(self.data_fetcher.get_realtime(symbol, c.value), c) for c in self.price_widgets.keys()]
+        prices = [(quotes[(symbol, c.value)], c) for c in self.price_widgets.keys()]
         return super().update(prices)
 
+    def update(self):
+        quotes = self.data_fetcher.get_realtime_many(self._pairs())
+        return self._update_quotes(quotes)
+
+    def data_requests(self):
+        return [DataRequest(self.data_fetcher, "get_realtime_many", (self._pairs(),))]
+
+    def update_from_plan(self, results):
+        return self._update_quotes(results.value(self.data_requests()[0]))
+
 
 class BtcPriceWithLogo(CoinPriceWithLogo):
     def __init__(
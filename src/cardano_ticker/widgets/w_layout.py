@@ -1,9 +1,11 @@
+import asyncio
 import logging
 from typing import Tuple
 
 import numpy as np
 from PIL import Image, ImageColor
 
+from cardano_ticker.data_fetcher.data_plan import DataPlan
 from cardano_ticker.utils.colors import Colors
 from cardano_ticker.widgets.generic.w_abstract import AbstractWidget
 
@@ -20,6 +22,9 @@ class WidgetLayout:
             pixel_density: The pixel density of the pixels per unit length
         """
         self._widgets = []
+        self._data_plan = None
+        # render key of each widget at its last render, by widget id
+        self._render_keys = {}
         self.background_color = self._convert_color(background_color)
         self.resolution = grid_size
         self._canvas = Image.new("RGBA", self.resolution, self.background_color)
@@ -76,29 +81,98 @@ class WidgetLayout:
                 br = (int(pos[0] + w.resolution[0]), int(pos[1] + w.resolution[1]))
                 self.grid_mask[tl[0] : br[0], tl[1] : br[1]] = 0
                 self._widgets.remove((w, pos))
+                self._render_keys.pop(id(w), None)
                 return True
 
         print("Widget not found")
         return False
 
+    @property
+    def widgets(self):
+        return [widget for widget, _ in self._widgets]
+
+    def set_data_plan(self, data_plan: DataPlan):
+        """
+        Fetch the data of the planned widgets with a DataPlan instead of letting each widget fetch on its own
+        Args:
+            data_plan: The plan, built from the widgets of this layout
+        """
+        self._data_plan = data_plan
+
+    def _unplanned_widgets(self):
+        planned = self._data_plan.widgets if self._data_plan is not None else []
+        return [widget for widget, _ in self._widgets if not any(widget is w for w in planned)]
+
+    async def _update_widgets(self):
+        """
+        Update all widgets concurrently, the planned ones from the results of the data plan
+        """
+        updates = [self._update_async(widget) for widget in self._unplanned_widgets()]
+        if self._data_plan is None:
+            await asyncio.gather(*updates)
+            return
+
+        results, *_ = await asyncio.gather(self._data_plan.execute_async(), *updates)
+        for widget in self._data_plan.widgets:
+            self._update_from_plan(widget, results)
+
+    @staticmethod
+    async def _update_async(widget: AbstractWidget):
+        """
+        Update an unplanned widget, keeping its previous data when the update fails
+        """
+        try:
+            await widget.update_async()
+        except Exception as e:
+            logging.error(f"Failed to update {type(widget).__name__}, keeping its previous data: {e}")
+
+    @staticmethod
+    def _update_from_plan(widget: AbstractWidget, results):
+        """
+        Update a planned widget, keeping its previous data when one of its requests failed
+        """
+        try:
+            widget.update_from_plan(results)
+        except Exception as e:
+            logging.error(f"Failed to update {type(widget).__name__}, keeping its previous data: {e}")
+
     def render(self):
         """
         Render the layout
         """
         self._canvas = Image.new("RGBA", self.resolution, self.background_color)
 
-        # update widgets with new data
+        # update widgets with new data, fetching concurrently on an event loop
         logging.info("Fetching data and updating widgets")
-        for widget, _ in self._widgets:
-            widget.update()
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(self._update_widgets())
+        else:
+            # already inside an event loop (e.g. a notebook), fall back to updating one by one
+            if self._data_plan is not None:
+                results = self._data_plan.execute()
+                for widget in self._data_plan.widgets:
+                    self._update_from_plan(widget, results)
+            for widget in self._unplanned_widgets():
+                try:
+                    widget.update()
+                except Exception as e:
+                    logging.error(f"Failed to update {type(widget).__name__}, keeping its previous data: {e}")
 
         logging.info("Rendering widgets on canvas")
+        rendered = 0
         for widget, position in self._widgets:
-            widget.render()
+            key = widget.render_key()
+            if key is None or self._render_keys.get(id(widget)) != key:
+                widget.render()
+                self._render_keys[id(widget)] = key
+                rendered += 1
             widget_img = widget.get()
             # rescale image to layout units
             widget_size = (widget.resolution[0], widget.resolution[1])
 
             widget_img = widget_img.resize((int(widget_size[0]), int(widget_size[1])))
             self._canvas.paste(widget_img, (position[0], position[1]))
+        logging.info(f"Rendered {rendered} of {len(self._widgets)} widgets, the others did not change")
         return self._canvas
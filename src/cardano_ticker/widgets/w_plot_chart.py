@@ -8,6 +8,7 @@ import pandas as pd
 from PIL import Image
 
 from cardano_ticker.data_fetcher.data_fetcher import DataFetcher
+from cardano_ticker.data_fetcher.data_plan import DataRequest
 from cardano_ticker.widgets.generic.w_abstract import AbstractWidget
 
 
@@ -23,6 +24,8 @@ class PlotChart(AbstractWidget):
         background_color="white",
         text_color="black",
         title=None,
+        days=7,
+        interval=None,
     ):
         """
         Initialize the widget
@@ -33,13 +36,17 @@ class PlotChart(AbstractWidget):
             increasing_line_color: The color of the increasing line
             decreasing_line_color: The color of the decreasing line
             pixel_density: The pixel density of the pixels per unit length
+            days: Length of the chart window in days, fractions of a day give intraday charts
+            interval: The candle interval ("1m", "15m", "1h" or "1d"), picked from days and the widget width when None
         """
 
         super().__init__(size, background_color=background_color)
         self.data_fetcher = data_fetcher
         self._symbol = symbol
         self._currency = currency
-        self._prices = data_fetcher.get_chart_data(self._symbol, self._currency, 7)
+        self._days = days
+        self._interval = interval
+        self._prices = self.__fetch_prices()
         self._increasing_line_color = increasing_line_color
         self._decreasing_line_color = decreasing_line_color
         text_color = self._convert_color(text_color)
@@ -73,13 +80,34 @@ class PlotChart(AbstractWidget):
         X = np.asarray(buf)
         return X[:, :, :3]
 
+    def __fetch_prices(self):
+        return self.data_fetcher.get_candles(self._symbol, self._currency, self._days, self.width, self._interval)
+
     def update(self):
         """
         Update the prices
         Args:
             prices: The prices to plot, a pandas dataframe with columns 'open', 'close', 'high', 'low'
         """
-        self._prices = self.data_fetcher.get_chart_data(self._symbol, self._currency, 7)
+        self._prices = self.__fetch_prices()
+
+    def data_requests(self):
+        return [self.__candles_request()]
+
+    def update_from_plan(self, results):
+        self._prices = results.value(self.__candles_request())
+
+    def __candles_request(self):
+        args = (self._symbol, self._currency, self._days, self.width, self._interval)
+        return DataRequest(self.data_fetcher, "get_candles", args)
+
+    def __candle_days(self):
+        """
+        Get the duration of a candle in days, the unit of the time axis
+        """
+        if len(self._prices) < 2:
+            return 1.0
+        return (self._prices.index[1:] - self._prices.index[:-1]).min() / pd.Timedelta(days=1)
 
     def render(self):
         # Skip rendering if prices data is invalid
@@ -94,9 +122,10 @@ class PlotChart(AbstractWidget):
         ax.set_facecolor(bk_color)
         fig.patch.set_facecolor(bk_color)
 
-        # define width of candlestick elements
-        width = 0.6
-        width2 = 0.05
+        # define width of candlestick elements, relative to the candle interval
+        candle_days = self.__candle_days()
+        width = 0.6 * candle_days
+        width2 = 0.05 * candle_days
 
         # define up and down prices
         up = self._prices[self._prices.close >= self._prices.open]
@@ -131,7 +160,9 @@ class PlotChart(AbstractWidget):
         plt.xticks(rotation=0, ha="center", fontsize=font_xy[0], color=self.text_color)
         plt.grid(color=self.text_color, linestyle="--", linewidth=1)
         plt.yticks(rotation=0, ha="right", fontsize=font_xy[1], color=self.text_color)
-        ax.xaxis.set_major_formatter(mdates.DateFormatter("%b-%d"))
+        # intraday charts show the time of day
+        date_format = "%H:%M" if self._prices.index[-1] - self._prices.index[0] <= pd.Timedelta(days=1) else "%b-%d"
+        ax.xaxis.set_major_formatter(mdates.DateFormatter(date_format))
 
         #   plt.axhline(y = current_price, color = 'r', linewidth=10, linestyle = '--')
         img_arr = self.__fig2rgb_array(fig)
@@ -2,6 +2,7 @@ import os
 
 from PIL import ImageFont
 
+from cardano_ticker.data_fetcher.data_plan import DataRequest
 from cardano_ticker.utils.constants import RESOURCES_DIR
 from cardano_ticker.utils.currency import PriceCurrency
 from cardano_ticker.widgets.generic.w_charts_generic import (
@@ -39,7 +40,15 @@ class PoolInfoTable(TableWidget):
         )
 
     def update(self):
-        data = self.datafetcher.pool(self.pool_id)
+        self._update_pool(self.datafetcher.pool(self.pool_id))
+
+    def data_requests(self):
+        return [DataRequest(self.datafetcher, "pool", (self.pool_id,))]
+
+    def update_from_plan(self, results):
+        self._update_pool(results.value(DataRequest(self.datafetcher, "pool", (self.pool_id,))))
+
+    def _update_pool(self, data):
         headers = [
             "Live",
             "Active",
@@ -79,7 +88,15 @@ class PoolStakeBarChart(BarChartWidget):
         super().__init__(size, [], [], background_color=background_color, font_size=font_size, text_color=text_color)
 
     def update(self):
-        data = self.datafetcher.pool(self.pool_id)
+        self._update_pool(self.datafetcher.pool(self.pool_id))
+
+    def data_requests(self):
+        return [DataRequest(self.datafetcher, "pool", (self.pool_id,))]
+
+    def update_from_plan(self, results):
+        self._update_pool(results.value(DataRequest(self.datafetcher, "pool", (self.pool_id,))))
+
+    def _update_pool(self, data):
         chart_data = [
             ("Live Stake", int(data["live_stake"]) // 1e6),
             ("Active Stake", int(data["active_stake"]) // 1e6),
@@ -95,7 +112,15 @@ class SupplyPieChartWidget(PieChartWidget):
         self.data_fetcher = data_fetcher
 
     def update(self):
-        data = self.data_fetcher.network()
+        self._update_network(self.data_fetcher.network())
+
+    def data_requests(self):
+        return [DataRequest(self.data_fetcher, "network", ())]
+
+    def update_from_plan(self, results):
+        self._update_network(results.value(DataRequest(self.data_fetcher, "network", ())))
+
+    def _update_network(self, data):
         # Create bar widget for supply
         chart_data = [
             ("Circulating", int(data["supply"]["circulating"])),
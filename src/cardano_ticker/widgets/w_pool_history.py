@@ -4,6 +4,7 @@ import numpy as np
 from matplotlib import pyplot as plt
 from PIL import Image
 
+from cardano_ticker.data_fetcher.data_plan import DataRequest
 from cardano_ticker.widgets.generic.w_abstract import AbstractWidget
 
 
@@ -33,26 +34,29 @@ class AdaPoolHistWidget(AbstractWidget):
         self.pool_data = self.data_fetcher.pool_history(self.pool_id)
         self.render()
 
+    def data_requests(self):
+        return [DataRequest(self.data_fetcher, "pool_history", (self.pool_id,))]
+
+    def update_from_plan(self, results):
+        self.pool_data = results.value(DataRequest(self.data_fetcher, "pool_history", (self.pool_id,)))
+        self.render()
+
     def render(self):
         """
         Render the pool history
-        pool_data: The pool data to render is a list of dictionaries with keys 'epoch', 'active_stake', 'rewards', 'blocks' obtained with  BlockFrostApi.pool_history
+        pool_data: The pool data to render is a dict of arrays 'epoch', 'active_stake', 'rewards' and 'blocks',
+        as returned by DataFetcher.pool_history
         """
 
         pool_history = self.pool_data
-        # Convert active stake and rewards to integers for easier plotting
-        for entry in pool_history:
-            entry["active_stake"] = int(entry["active_stake"])
-            entry["rewards"] = int(entry["rewards"])
-
-        # Extract data
-        epochs = [entry["epoch"] for entry in pool_history]
-        active_stake = [entry["active_stake"] / 1e9 for entry in pool_history]  # Convert to billions
-        rewards = [entry["rewards"] / 1e6 for entry in pool_history]  # Convert to millions
+        epochs = pool_history["epoch"]
+        active_stake = pool_history["active_stake"] / 1e9  # Convert to billions
+        rewards = pool_history["rewards"] / 1e6  # Convert to millions
 
         # Filter epochs and blocks for red dots
-        epochs_with_blocks = [entry["epoch"] for entry in pool_history if entry["blocks"] > 0]
-        blocks_with_blocks = [entry["blocks"] for entry in pool_history if entry["blocks"] > 0]
+        with_blocks = pool_history["blocks"] > 0
+        epochs_with_blocks = epochs[with_blocks]
+        blocks_with_blocks = pool_history["blocks"][with_blocks]
 
         # Create subplots
         fig, ax1 = plt.subplots()
@@ -18,6 +18,7 @@ import os
 
 from cardano_ticker.widgets.generic.w_abstract import AbstractWidget
 from cardano_ticker.data_fetcher.portfolio_fetcher import PortfolioDataFetcher, get_asset_color
+from cardano_ticker.data_fetcher.data_plan import DataRequest
 from cardano_ticker.utils.constants import RESOURCES_DIR
 
 logging.basicConfig(level=logging.INFO)
@@ -38,9 +39,12 @@ class PortfolioSummaryWidget(AbstractWidget):
         background_color: str = "#f8f9fa",
         text_color: str = "black",
         font_size: int = 14,
+        local_valuation: bool = False,
     ):
         super().__init__(size, background_color=background_color)
         self.portfolio_fetcher = portfolio_fetcher
+        # value the holdings at the dashboard quotes instead of the server prices
+        self.local_valuation = local_valuation
         self.text_color = self._convert_color(text_color)
         self.font_size = font_size
         self.font_path = os.path.join(RESOURCES_DIR, "fonts/Roboto_Condensed-Black.ttf")
@@ -57,20 +61,49 @@ class PortfolioSummaryWidget(AbstractWidget):
     def update(self):
         """Fetch latest portfolio data"""
         if self.portfolio_fetcher:
-            data = self.portfolio_fetcher.fetch_from_ticker_api()
-            if data and 'summary' in data:
-                summary = data['summary']
-                self.total_value = summary.get('totalValue', 0)
-                self.btc_price = summary.get('btcPrice', 0)
-                self.total_pnl = summary.get('totalPnl', 0)
-                self.total_pnl_percent = summary.get('totalPnlPercent', 0)
-                self.perf_7d = summary.get('performance7d', None)
+            data = self.portfolio_fetcher.get_snapshot(self.local_valuation)
+            if self._update_summary(data):
                 # Fetch EUR rate and calculate EUR value (only if rate is available)
-                eur_rate = self.portfolio_fetcher.get_eur_rate(refresh=True)
-                if eur_rate is not None:
-                    self.eur_value = self.total_value * eur_rate
-                else:
-                    self.eur_value = None
+                self._update_eur_value(self.portfolio_fetcher.get_eur_rate(refresh=True))
+
+    def data_requests(self):
+        """The portfolio snapshot and the EUR rate"""
+        if not self.portfolio_fetcher:
+            return []
+        return [
+            DataRequest(self.portfolio_fetcher, "get_snapshot", (self.local_valuation,)),
+            DataRequest(self.portfolio_fetcher, "get_eur_rate", (True,)),
+        ]
+
+    def update_from_plan(self, results):
+        """Update from the prefetched portfolio snapshot and EUR rate"""
+        snapshot_request, eur_request = self.data_requests()
+        if self._update_summary(results.value(snapshot_request)):
+            self._update_eur_value(results.value(eur_request))
+
+    def render_key(self):
+        """The ticker API payload and the EUR value, None before the first payload"""
+        digest = self.portfolio_fetcher.snapshot_digest(self.local_valuation) if self.portfolio_fetcher else None
+        return (digest, self.eur_value) if digest else None
+
+    def _update_summary(self, data) -> bool:
+        """Store the summary metrics, returns False if the data has no summary"""
+        if not data or 'summary' not in data:
+            return False
+        summary = data['summary']
+        self.total_value = summary.get('totalValue', 0)
+        self.btc_price = summary.get('btcPrice', 0)
+        self.total_pnl = summary.get('totalPnl', 0)
+        self.total_pnl_percent = summary.get('totalPnlPercent', 0)
+        self.perf_7d = summary.get('performance7d', None)
+        return True
+
+    def _update_eur_value(self, eur_rate: Optional[float]):
+        """Calculate the EUR value, None if the rate is not available"""
+        if eur_rate is not None:
+            self.eur_value = self.total_value * eur_rate
+        else:
+            self.eur_value = None
 
     def _auto_adjust_font(self, text, font_path, start_size, max_width):
         """Shrink font until text fits within max_width"""
@@ -191,6 +224,7 @@ class AllocationDonutChart(AbstractWidget):
         title: Optional[str] = None,
         btc_price: Optional[float] = None,
         hide_value: bool = False,
+        local_valuation: bool = False,
     ):
         """
         Initialize the donut chart.
@@ -207,6 +241,7 @@ class AllocationDonutChart(AbstractWidget):
             title: Optional title for the chart
             btc_price: Current BTC price in USD for displaying value in BTC
             hide_value: If True, don't show value in title (use when summary bar shows it)
+            local_valuation: Value the holdings at the dashboard quotes instead of the server prices
         """
         super().__init__(size, background_color=background_color)
         self.data = data or []
@@ -219,15 +254,37 @@ class AllocationDonutChart(AbstractWidget):
         self.title = title
         self.btc_price = btc_price
         self.hide_value = hide_value
+        self.local_valuation = local_valuation
+        self._manual_updates = 0
 
     def update(self, data: Optional[List[Tuple[str, float, str]]] = None):
         """Update the chart data"""
         if data is not None:
             self.data = data
+            self._manual_updates += 1
         elif self.portfolio_fetcher:
-            raw_data = self.portfolio_fetcher.get_allocation_data(refresh=True)
-            # Override with e-ink compatible colors
-            self.data = [(name, value, get_asset_color(name)) for name, value, _ in raw_data]
+            allocation = self.portfolio_fetcher.get_allocation_data(refresh=True, local=self.local_valuation)
+            self._update_allocation(allocation)
+
+    def data_requests(self):
+        """The allocation data, unless the chart is fed manually"""
+        if not self.portfolio_fetcher:
+            return []
+        return [DataRequest(self.portfolio_fetcher, "get_allocation_data", (True, self.local_valuation))]
+
+    def update_from_plan(self, results):
+        """Update from the prefetched allocation data"""
+        self._update_allocation(results.value(self.data_requests()[0]))
+
+    def render_key(self):
+        """The ticker API payload and the data passed to update, None without a fetcher"""
+        digest = self.portfolio_fetcher.snapshot_digest(self.local_valuation) if self.portfolio_fetcher else None
+        return (digest, self._manual_updates) if digest else None
+
+    def _update_allocation(self, raw_data: List[Tuple[str, float, str]]):
+        """Store the allocation data"""
+        # Override with e-ink compatible colors
+        self.data = [(name, value, get_asset_color(name)) for name, value, _ in raw_data]
 
     def render(self):
         """Render the donut chart with improved label positioning to avoid overlaps"""
@@ -351,6 +408,7 @@ class TreemapWidget(AbstractWidget):
         title: Optional[str] = None,
         padding: int = 2,
         show_7d: bool = False,
+        local_valuation: bool = False,
     ):
         """
         Initialize the treemap widget.
@@ -365,6 +423,7 @@ class TreemapWidget(AbstractWidget):
             title: Optional title for the chart
             padding: Padding between rectangles in pixels
             show_7d: If True, show 7-day performance instead of total P&L
+            local_valuation: Value the holdings at the dashboard quotes instead of the server prices
         """
         super().__init__(size, background_color=background_color)
         self.data = data or []
@@ -374,26 +433,62 @@ class TreemapWidget(AbstractWidget):
         self.title = title
         self.padding = padding
         self.show_7d = show_7d
+        self.local_valuation = local_valuation
         self.font_path = os.path.join(RESOURCES_DIR, "fonts/DejaVuSans.ttf")
         # Store percent changes for display
         self.percent_changes: dict = {}
+        self._manual_updates = 0
 
     def update(self, data: Optional[List[Tuple[str, float, str]]] = None):
         """Update the treemap data"""
         if data is not None:
             self.data = data
+            self._manual_updates += 1
         elif self.portfolio_fetcher:
             if self.show_7d:
                 # Get 7-day performance data: (asset, value_change, percent_change, color)
-                perf_data = self.portfolio_fetcher.get_performance_7d_data(refresh=True)
+                perf_data = self.portfolio_fetcher.get_performance_7d_data(refresh=True, local=self.local_valuation)
                 if perf_data:
-                    self.data = [(p[0], p[1], p[3]) for p in perf_data]
-                    self.percent_changes = {p[0]: p[2] for p in perf_data}
+                    self._update_performance(perf_data)
                 else:
                     # Fallback to P&L data if no 7d data available
-                    self.data = self.portfolio_fetcher.get_pnl_data(refresh=True)
+                    self.data = self.portfolio_fetcher.get_pnl_data(refresh=True, local=self.local_valuation)
             else:
-                self.data = self.portfolio_fetcher.get_pnl_data(refresh=True)
+                self.data = self.portfolio_fetcher.get_pnl_data(refresh=True, local=self.local_valuation)
+
+    def data_requests(self):
+        """
+        The P&L data, and the 7-day performance first when shown, unless the treemap is fed manually
+        Both are read from the shared portfolio snapshot
+        """
+        if not self.portfolio_fetcher:
+            return []
+        args = (True, self.local_valuation)
+        pnl_request = DataRequest(self.portfolio_fetcher, "get_pnl_data", args)
+        if not self.show_7d:
+            return [pnl_request]
+        return [DataRequest(self.portfolio_fetcher, "get_performance_7d_data", args), pnl_request]
+
+    def update_from_plan(self, results):
+        """Update from the prefetched data, falling back to the P&L data when no 7-day data is available"""
+        requests = self.data_requests()
+        data = results.value(requests[0])
+        if not self.show_7d:
+            self.data = data
+        elif data:
+            self._update_performance(data)
+        else:
+            self.data = results.value(requests[1])
+
+    def render_key(self):
+        """The ticker API payload and the data passed to update, None without a fetcher"""
+        digest = self.portfolio_fetcher.snapshot_digest(self.local_valuation) if self.portfolio_fetcher else None
+        return (digest, self._manual_updates) if digest else None
+
+    def _update_performance(self, perf_data: List[Tuple[str, float, float, str]]):
+        """Store the 7-day performance data"""
+        self.data = [(p[0], p[1], p[3]) for p in perf_data]
+        self.percent_changes = {p[0]: p[2] for p in perf_data}
 
     def _squarify(self, values: List[float], x: float, y: float, width: float, height: float) -> List[dict]:
         """
@@ -653,6 +748,7 @@ class PortfolioValueChart(AbstractWidget):
         font_size: int = 10,
         title: Optional[str] = None,
         days: int = 7,
+        local_history: bool = False,
     ):
         super().__init__(size, background_color=background_color)
         self.portfolio_fetcher = portfolio_fetcher
@@ -662,12 +758,36 @@ class PortfolioValueChart(AbstractWidget):
         self.font_size = font_size
         self.title = title
         self.days = days
+        # compute the history from the transactions and the daily candles instead of asking the ticker API
+        self.local_history = local_history
         self.history_data: List[Tuple[str, float]] = []
 
+    @property
+    def _history_method(self) -> str:
+        return "get_local_history" if self.local_history else "fetch_portfolio_history"
+
     def update(self):
         """Fetch latest portfolio history data"""
         if self.portfolio_fetcher:
-            self.history_data = self.portfolio_fetcher.fetch_portfolio_history(days=self.days)
+            self.history_data = getattr(self.portfolio_fetcher, self._history_method)(self.days)
+
+    def data_requests(self):
+        """The portfolio value history"""
+        if not self.portfolio_fetcher:
+            return []
+        return [DataRequest(self.portfolio_fetcher, self._history_method, (self.days,))]
+
+    def update_from_plan(self, results):
+        """Update from the prefetched portfolio value history"""
+        self.history_data = results.value(self.data_requests()[0])
+
+    def render_key(self):
+        """The portfolio history payload"""
+        if not self.portfolio_fetcher:
+            return None
+        if self.local_history:
+            return self.portfolio_fetcher.local_history_digest(self.days)
+        return self.portfolio_fetcher.history_digest(self.days)
 
     def render(self):
         """Render the portfolio value line chart"""
@@ -0,0 +1,135 @@
+import pytest
+
+from cardano_ticker.data_fetcher.chain_backend import api_error
+from cardano_ticker.data_fetcher.chain_follower import ChainFollower
+
+BLOCK_TIME = 20
+GENESIS_TIME = 1_700_000_000
+
+
+class Chain:
+    """
+    Blockfrost client stand-in serving a list of blocks, keeping the block listing calls
+    """
+
+    def __init__(self, length):
+        self.blocks = []
+        self.extend(length)
+        self.calls = []
+
+    def extend(self, length, fork=""):
+        for _ in range(length):
+            height = len(self.blocks)
+            self.blocks.append(
+                {
+                    "hash": f"{fork}h{height}",
+                    "height": height,
+                    "time": GENESIS_TIME + height * BLOCK_TIME,
+                    "tx_count": height + (1000 if fork else 0),
+                    "previous_block": self.blocks[-1]["hash"] if self.blocks else None,
+                }
+            )
+
+    def fork(self, depth, length):
+        """
+        Replace the last depth blocks by length other blocks
+        """
+        del self.blocks[-depth:]
+        self.extend(length, fork="f")
+
+    def _index(self, block_hash):
+        for i, block in enumerate(self.blocks):
+            if block["hash"] == block_hash:
+                return i
+        raise api_error(404, "The requested component has not been found.")
+
+    def block_latest(self, return_type=None):
+        return self.blocks[-1]
+
+    def blocks_previous(self, block_hash, count=100, page=1, return_type=None):
+        self.calls.append(("previous", block_hash, page))
+        end = self._index(block_hash) - (page - 1) * count
+        return self.blocks[max(end - count, 0) : max(end, 0)]
+
+    def blocks_next(self, block_hash, count=100, page=1, return_type=None):
+        self.calls.append(("next", block_hash, page))
+        start = self._index(block_hash) + 1 + (page - 1) * count
+        return self.blocks[start : start + count]
+
+
+def window(chain, window_s):
+    tip_time = chain.blocks[-1]["time"]
+    return [block for block in chain.blocks if block["time"] >= tip_time - window_s]
+
+
+def assert_follows(follower, chain, window_s):
+    expected = window(chain, window_s)
+    assert [block[0] for block in follower._blocks] == [block["hash"] for block in expected]
+    assert sum(follower.transactions_data()["transactions"]) == sum(block["tx_count"] for block in expected)
+
+
+@pytest.fixture
+def chain():
+    return Chain(50)
+
+
+def test_bootstrap_pages_backwards_from_the_tip(chain):
+    follower = ChainFollower(chain, window_s=10 * BLOCK_TIME, page_size=3)
+    follower.sync()
+
+    assert chain.calls == [("previous", "h49", page) for page in (1, 2, 3, 4)]
+    assert_follows(follower, chain, 10 * BLOCK_TIME)
+
+
+def test_following_fetches_the_blocks_after_the_last_one(chain):
+    follower = ChainFollower(chain, window_s=10 * BLOCK_TIME, page_size=3)
+    follower.sync()
+    chain.calls.clear()
+
+    chain.extend(5)
+    follower.sync(force=True)
+
+    # one call per full page, the last known block moves along
+    assert chain.calls == [("next", "h49", 1), ("next", "h52", 1)]
+    assert_follows(follower, chain, 10 * BLOCK_TIME)
+
+    chain.calls.clear()
+    follower.sync(force=True)
+    assert chain.calls == []
+
+
+def test_rollback_drops_the_blocks_that_left_the_chain(chain):
+    follower = ChainFollower(chain, window_s=10 * BLOCK_TIME, page_size=3)
+    follower.sync()
+    chain.calls.clear()
+
+    # h48 and h49 were rolled back, two other blocks and a new one follow h47
+    chain.fork(2, 3)
+    follower.sync(force=True)
+
+    assert chain.calls == [("next", "h49", 1), ("next", "h48", 1), ("next", "h47", 1)]
+    assert_follows(follower, chain, 10 * BLOCK_TIME)
+
+
+def test_deep_rollback_reloads_the_window(chain):
+    follower = ChainFollower(chain, window_s=10 * BLOCK_TIME, page_size=3, max_rollback=2)
+    follower.sync()
+
+    chain.fork(4, 4)
+    follower.sync(force=True)
+
+    assert_follows(follower, chain, 10 * BLOCK_TIME)
+
+
+def test_old_blocks_leave_the_window(chain):
+    follower = ChainFollower(chain, window_s=10 * BLOCK_TIME, page_size=100)
+    follower.sync()
+    before = follower.transactions_data()
+
+    chain.extend(6)
+    follower.sync(force=True)
+
+    assert len(follower._blocks) == 11
+    assert_follows(follower, chain, 10 * BLOCK_TIME)
+    # the minutes of the evicted blocks are gone from the counts
+    assert follower.transactions_data()["dates"][0] > before["dates"][0]
@@ -0,0 +1,177 @@
+import threading
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import pytest
+
+from cardano_ticker.data_fetcher import crypto_price_fetcher
+from cardano_ticker.data_fetcher.crypto_price_fetcher import CryptoPriceFetcher
+
+HOUR = 60 * 60
+
+
+def candles(close, count=3, freq="D"):
+    index = pd.date_range(end=pd.Timestamp.now().floor(freq), periods=count, freq=freq)
+    return pd.DataFrame({"high": close, "low": close, "open": close, "close": close}, index=index)
+
+
+class Response:
+    def __init__(self, payload):
+        self.status_code = 200
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+
+class CannedSession:
+    """
+    Session stand-in answering each request with the next canned payload, keeping the query of every request
+    """
+
+    def __init__(self, payloads):
+        self.payloads = list(payloads)
+        self.queries = []
+
+    def get(self, url, params=None):
+        self.queries.append({key: values[0] for key, values in parse_qs(urlparse(url).query).items()})
+        return Response(self.payloads.pop(0))
+
+
+class Provider:
+    """
+    Candle provider stand-in answering the same candles, held back until released when slow
+    """
+
+    def __init__(self, close, slow=False):
+        self.close = close
+        self.release = threading.Event()
+        if not slow:
+            self.release.set()
+        self.calls = []
+
+    def __call__(self, symbol, currency, interval, start, limit):
+        self.calls.append((interval, start, limit))
+        self.release.wait(5)
+        return candles(self.close, limit, "D" if interval == "1d" else "h")
+
+
+@pytest.fixture
+def fetcher(monkeypatch):
+    fetcher = CryptoPriceFetcher("key", hedge_delay=0.05, session=CannedSession([]))
+    # every provider supports every pair without downloading the listings
+    monkeypatch.setattr(fetcher.symbols, "refresh", lambda *args, **kwargs: None)
+    yield fetcher
+    fetcher._executor.shutdown(wait=True)
+
+
+def test_chart_race_stores_only_the_winner(fetcher):
+    # CryptoCompare is preferred but slow, Binance wins the race and CryptoCompare answers last
+    slow, fast = Provider(2.0, slow=True), Provider(1.0)
+    fetcher._get_candles_from_cryptocompare = slow
+    fetcher._get_candles_from_binance = fast
+
+    df = fetcher.get_chart_data("ADA", "USD", days=3)
+    slow.release.set()
+    fetcher._executor.shutdown(wait=True)
+
+    assert slow.calls == fast.calls == [("1d", None, 3)]
+    assert df["close"].tolist() == [1.0, 1.0, 1.0]
+    assert fetcher.candles.window("ADA", "USD", "1d", 3)["close"].tolist() == [1.0, 1.0, 1.0]
+
+
+def test_candle_race_stores_only_the_winner(fetcher):
+    # Binance is preferred for intraday candles but slow, CryptoCompare wins and Binance answers last
+    slow, fast = Provider(2.0, slow=True), Provider(1.0)
+    fetcher._get_candles_from_binance = slow
+    fetcher._get_candles_from_cryptocompare = fast
+
+    df = fetcher.get_candles("ADA", "USD", days=0.25, interval="1h")
+    slow.release.set()
+    fetcher._executor.shutdown(wait=True)
+
+    assert slow.calls == fast.calls == [("1h", None, 6)]
+    assert df["close"].tolist() == [1.0] * 6
+    assert fetcher.candles.window("ADA", "USD", "1h", 6)["close"].tolist() == [1.0] * 6
+
+
+def kline(open_time, close):
+    return [
+        open_time * 1000,
+        "1",
+        "2",
+        "0.5",
+        str(close),
+        "0",
+        open_time * 1000 + HOUR * 1000 - 1,
+        "0",
+        0,
+        "0",
+        "0",
+        "0",
+    ]
+
+
+def test_binance_pages_forwards_from_start(fetcher, monkeypatch):
+    monkeypatch.setattr(crypto_price_fetcher, "BINANCE_KLINES_LIMIT", 2)
+    start = 1_700_000_000 // HOUR * HOUR
+    series = [kline(start + i * HOUR, i + 1) for i in range(5)]
+    fetcher.session = CannedSession([series[0:2], series[2:4], series[4:5]])
+
+    df = fetcher._get_candles_from_binance("ADA", "USD", "1h", start, 5)
+
+    queries = fetcher.session.queries
+    assert [query["symbol"] for query in queries] == ["ADAUSDT"] * 3
+    assert [int(query["startTime"]) // 1000 for query in queries] == [start, start + 2 * HOUR, start + 4 * HOUR]
+    assert [query["limit"] for query in queries] == ["2", "2", "1"]
+    assert df["close"].tolist() == [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert list(df.index) == list(pd.to_datetime([start + i * HOUR for i in range(5)], unit="s"))
+
+
+def test_binance_stops_on_a_short_page(fetcher, monkeypatch):
+    monkeypatch.setattr(crypto_price_fetcher, "BINANCE_KLINES_LIMIT", 2)
+    start = 1_700_000_000 // HOUR * HOUR
+    fetcher.session = CannedSession([[kline(start, 1), kline(start + HOUR, 2)], [kline(start + 2 * HOUR, 3)]])
+
+    df = fetcher._get_candles_from_binance("ADA", "USD", "1h", start, 6)
+
+    assert len(fetcher.session.queries) == 2
+    assert df["close"].tolist() == [1.0, 2.0, 3.0]
+
+
+def histo(times, closes):
+    rows = [{"time": t, "high": c, "low": c, "open": c, "close": c} for t, c in zip(times, closes)]
+    return {"Response": "Success", "Data": {"Data": rows}}
+
+
+def test_cryptocompare_pages_backwards_from_now(fetcher, monkeypatch):
+    monkeypatch.setattr(crypto_price_fetcher, "CRYPTOCOMPARE_HISTO_LIMIT", 3)
+    t = [1_700_000_000 // HOUR * HOUR + i * HOUR for i in range(11)]
+    fetcher.session = CannedSession(
+        [
+            histo(t[7:11], [7, 8, 9, 10]),
+            # the pair was listed at t[5]: earlier candles are zeros, t[7] is answered again
+            histo(t[3:8], [0, 0, 5, 6, 70]),
+        ]
+    )
+
+    df = fetcher._get_candles_from_cryptocompare("ADA", "USD", "1h", None, 6)
+
+    first, second = fetcher.session.queries
+    assert first["limit"] == "3" and "toTs" not in first
+    assert second["limit"] == "2" and int(second["toTs"]) == t[6]
+    assert first["fsym"] == "ADA" and first["tsym"] == "USD"
+    assert df.index.is_unique and df.index.is_monotonic_increasing
+    assert list(df.index) == list(pd.to_datetime(t[5:11], unit="s"))
+    assert (df["close"] > 0).all()
+
+
+def test_cryptocompare_stops_once_start_is_reached(fetcher, monkeypatch):
+    monkeypatch.setattr(crypto_price_fetcher, "CRYPTOCOMPARE_HISTO_LIMIT", 3)
+    t = [1_700_000_000 // HOUR * HOUR + i * HOUR for i in range(11)]
+    fetcher.session = CannedSession([histo(t[7:11], [7, 8, 9, 10])])
+
+    df = fetcher._get_candles_from_cryptocompare("ADA", "USD", "1h", t[8], 6)
+
+    assert len(fetcher.session.queries) == 1
+    assert df["close"].tolist() == [8, 9, 10]
@@ -0,0 +1,101 @@
+import pytest
+
+from cardano_ticker.data_fetcher.pool_index import PoolIndex
+
+
+class Listings:
+    """
+    Blockfrost client stand-in serving the pool and retirement listings, keeping the first page of every read
+    """
+
+    def __init__(self, pools, retired=()):
+        self.pool_ids = list(pools)
+        self.retired = list(retired)
+        self.reads = []
+
+    def _read(self, name, items, count, page):
+        self.reads.append((name, page))
+        return items[(page - 1) * count :]
+
+    def pools(self, count, page, gather_pages, return_type):
+        return self._read("pools", self.pool_ids, count, page)
+
+    def pools_retired(self, count, page, gather_pages, return_type):
+        return self._read("retired", self.retired, count, page)
+
+
+@pytest.fixture
+def listings():
+    return Listings([f"pool{i}" for i in range(7)], [{"pool_id": "old0", "epoch": 300}])
+
+
+@pytest.fixture
+def index(listings):
+    index = PoolIndex(listings, page_size=2, tail_pages=1)
+    index.sync()
+    listings.reads.clear()
+    yield index
+    index.close()
+
+
+def test_first_sync_reads_the_listings_in_full(listings):
+    index = PoolIndex(listings, page_size=2, tail_pages=1)
+    index.sync()
+
+    assert listings.reads == [("pools", 1), ("retired", 1)]
+    assert index.count() == 7
+
+
+def test_tail_sync_only_reads_the_last_pages(index, listings):
+    listings.pool_ids.append("pool7")
+    index.sync(force=True)
+
+    assert listings.reads == [("pools", 4), ("retired", 1)]
+    assert index.count() == 8
+
+    # pool7 retired and left the end of the listing
+    listings.pool_ids.remove("pool7")
+    listings.retired.append({"pool_id": "pool7", "epoch": 400})
+    listings.reads.clear()
+    index.sync(force=True)
+    assert listings.reads == [("pools", 4), ("retired", 1)]
+    assert index.count() == 7
+
+
+def test_shifted_listing_escalates_to_a_full_sync(index, listings):
+    # pool1 left the listing, the pages after it shifted
+    listings.pool_ids.remove("pool1")
+    index.sync(force=True)
+
+    assert listings.reads == [("pools", 4), ("retired", 1), ("pools", 1), ("retired", 1)]
+    assert index.count() == 6
+
+
+def test_full_sync_removes_pools_that_left_the_listing(listings):
+    index = PoolIndex(listings, page_size=2, tail_pages=1, full_sync_interval=0)
+    index.sync()
+    listings.pool_ids = [pool_id for pool_id in listings.pool_ids if pool_id not in ("pool2", "pool5")]
+    index.sync(force=True)
+
+    assert index.count() == 5
+    rows = index._db.execute("SELECT pool_id FROM pools WHERE retired_epoch IS NULL ORDER BY pool_id").fetchall()
+    assert [row[0] for row in rows] == ["pool0", "pool1", "pool3", "pool4", "pool6"]
+
+
+def test_registered_again_pool_does_not_force_full_syncs(index, listings):
+    # old0 retired at epoch 300 and registered again, it is listed in both listings
+    listings.pool_ids.append("old0")
+    index.sync(force=True)
+    assert listings.reads[-2:] == [("pools", 1), ("retired", 1)]
+    assert index.count() == 8
+
+    listings.reads.clear()
+    index.sync(force=True)
+    assert listings.reads == [("pools", 4), ("retired", 1)]
+    assert index.count() == 8
+
+    # a later retirement retires it again
+    listings.pool_ids.remove("old0")
+    listings.retired.append({"pool_id": "old0", "epoch": 420})
+    index.sync(force=True)
+    assert index.count() == 7
@@ -0,0 +1,213 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import pytest
+
+from cardano_ticker.data_fetcher.data_plan import DataPlan
+from cardano_ticker.data_fetcher.portfolio_fetcher import PortfolioDataFetcher
+from cardano_ticker.widgets.w_layout import WidgetLayout
+from cardano_ticker.widgets.w_portfolio_charts import AllocationDonutChart
+
+LAST_MODIFIED = "Sat, 17 Oct 2026 00:00:00 GMT"
+
+
+class TickerApi:
+    """
+    Stand-in for the portfolio-tracker ticker API, answering 304 when the validators match unless told otherwise
+    The paths in answers get their fixed (status, payload) answer instead
+    """
+
+    def __init__(self):
+        self.version = 1
+        self.honor_validators = True
+        self.holdings = None
+        self.answers = {}
+        self.requests = []
+        self.statuses = []
+
+    def payload(self):
+        value = float(self.version)
+        return {
+            "summary": {"totalValue": value, "btcPrice": 60000.0},
+            "allocation": [{"asset": "BTC", "value": value, "color": "#ff8000"}],
+            "pnlData": [{"asset": "BTC", "pnl": 1.0, "color": "#00ff00"}],
+            **({"holdings": self.holdings} if self.holdings is not None else {}),
+        }
+
+    def handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def send_json(self, status, payload, headers=()):
+                body = json.dumps(payload).encode()
+                api.statuses.append(status)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                api.requests.append(dict(self.headers))
+                path = urlsplit(self.path).path
+                if path in api.answers:
+                    self.send_json(*api.answers[path])
+                    return
+                etag = f'"v{api.version}"'
+                if api.honor_validators and self.headers.get("If-None-Match") == etag:
+                    api.statuses.append(304)
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_json(200, api.payload(), [("ETag", etag), ("Last-Modified", LAST_MODIFIED)])
+
+        return Handler
+
+
+@pytest.fixture
+def ticker_api():
+    api = TickerApi()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), api.handler())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    api.url = f"http://127.0.0.1:{server.server_port}"
+    yield api
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def fetcher(ticker_api):
+    return PortfolioDataFetcher(ticker_api.url, portfolio_id=1, api_key="key", snapshot_ttl=0)
+
+
+def test_sends_validators_of_previous_answer(ticker_api, fetcher):
+    fetcher.fetch_from_ticker_api()
+    fetcher.fetch_from_ticker_api()
+
+    first, second = ticker_api.requests
+    assert "If-None-Match" not in first and "If-Modified-Since" not in first
+    assert second["If-None-Match"] == '"v1"'
+    assert second["If-Modified-Since"] == LAST_MODIFIED
+    assert second["X-API-Key"] == "key"
+
+
+def test_not_modified_reuses_parsed_snapshot(ticker_api, fetcher):
+    first = fetcher.get_snapshot()
+    digest = fetcher.snapshot_digest()
+    second = fetcher.get_snapshot()
+
+    assert ticker_api.statuses == [200, 304]
+    assert second is first
+    assert fetcher.snapshot_digest() == digest
+
+
+def test_unchanged_payload_reuses_parsed_snapshot(ticker_api, fetcher):
+    ticker_api.honor_validators = False
+    first = fetcher.get_snapshot()
+    digest = fetcher.snapshot_digest()
+    second = fetcher.get_snapshot()
+
+    assert ticker_api.statuses == [200, 200]
+    assert second is first
+    assert fetcher.snapshot_digest() == digest
+
+    ticker_api.version = 2
+    third = fetcher.get_snapshot()
+    assert third is not first and third["summary"]["totalValue"] == 2.0
+    assert fetcher.snapshot_digest() != digest
+
+
+def test_render_key_skips_unchanged_widget(ticker_api, fetcher):
+    widget = AllocationDonutChart((200, 200), portfolio_fetcher=fetcher)
+    renders = []
+    render = widget.render
+    widget.render = lambda: renders.append(fetcher.snapshot_digest()) or render()
+    layout = WidgetLayout((200, 200))
+    layout.add_widget(widget, (0, 0))
+    layout.set_data_plan(DataPlan([widget]))
+
+    layout.render()
+    layout.render()
+    assert len(renders) == 1
+    assert ticker_api.statuses == [200, 304]
+
+    ticker_api.version = 2
+    layout.render()
+    assert len(renders) == 2 and renders[0] != renders[1]
+    assert widget.data[0][1] == 2.0
+
+
+class Quotes:
+    """
+    QuoteMatrix stand-in answering fixed USD prices, keeping the requested pairs
+    """
+
+    def __init__(self, prices):
+        self.prices = prices
+        self.pairs = []
+
+    def rates(self, pairs):
+        self.pairs.extend(pairs)
+        return {pair: self.prices.get(pair[0], 0.0) for pair in pairs}
+
+
+def holding(asset, quantity, price):
+    return {"asset": asset, "quantity": quantity, "costBasis": quantity * price, "currentPrice": price}
+
+
+def test_local_valuation_only_quotes_known_assets(ticker_api):
+    ticker_api.holdings = [
+        holding("BTC", 1, 60000.0),
+        holding("CASH", 1000, 1.0),
+        holding("NIGHT", 100, 0.05),
+        holding("WBTC", 1, 60000.0),
+        holding("ADA", 1000, 0.5),
+    ]
+    # CASH and NIGHT have unrelated tokens quoted under their names, ADA is quoted far off the server price
+    quotes = Quotes({"BTC": 62000.0, "CASH": 3.5, "NIGHT": 40.0, "ADA": 5.0})
+    fetcher = PortfolioDataFetcher(
+        ticker_api.url, portfolio_id=1, api_key="key", quotes=quotes, quote_symbols={"wbtc": "btc"}
+    )
+
+    snapshot = fetcher.get_snapshot(local=True)
+
+    prices = {h["asset"]: h["currentPrice"] for h in snapshot["holdings"]}
+    assert prices == {"BTC": 62000.0, "CASH": 1.0, "NIGHT": 0.05, "WBTC": 62000.0, "ADA": 0.5}
+    assert {symbol for symbol, _ in quotes.pairs} == {"BTC", "ADA"}
+    assert snapshot["summary"]["totalValue"] == 62000.0 + 1000.0 + 5.0 + 62000.0 + 500.0
+
+
+class PriceFetcher:
+    """
+    CryptoPriceFetcher stand-in only pricing the currencies in themselves
+    """
+
+    def get_chart_data(self, symbol, currency, days, require_ohlc=True):
+        return None
+
+    def get_realtime_many(self, pairs):
+        return {(symbol, currency): 1.0 if symbol == currency else 0.0 for symbol, currency in pairs}
+
+
+def test_local_history_falls_back_when_transactions_are_refused(ticker_api):
+    ticker_api.answers = {
+        "/api/transactions": (403, {"error": "Unauthorized"}),
+        "/api/ticker/portfolio/history": (200, {"history": [{"date": "2026-10-16", "totalValue": 5.0}]}),
+    }
+    fetcher = PortfolioDataFetcher(
+        ticker_api.url, portfolio_id=1, api_key="key", holdings_ttl=0, price_fetcher=PriceFetcher()
+    )
+
+    assert fetcher.get_local_history(7) == [("2026-10-16", 5.0)]
+    assert fetcher.local_history_digest(7) == fetcher.history_digest(7) is not None
+
+    ticker_api.answers["/api/transactions"] = (200, [{"asset": "USD", "type": "Deposit", "quantity": 3, "date": None}])
+    assert fetcher.get_local_history(1)[-1][1] == 3.0
@@ -0,0 +1,79 @@
+import pandas as pd
+
+from cardano_ticker.data_fetcher.portfolio_history import PortfolioHistory
+from cardano_ticker.data_fetcher.transaction_ledger import TransactionLedger
+
+TODAY = pd.Timestamp.now(tz="UTC").tz_localize(None).normalize()
+START = TODAY - pd.Timedelta(days=4)
+
+
+def close(asset, day):
+    offset = (day - START).days
+    return 100.0 + offset if asset == "BTC" else 1.0 + offset / 10
+
+
+class Closes:
+    """
+    Daily candles stand-in, the candle of today included as the providers answer it, keeping the requests
+    """
+
+    def __init__(self):
+        self.requests = []
+
+    def __call__(self, asset, days):
+        self.requests.append((asset, days))
+        index = pd.date_range(end=TODAY, periods=days, freq="D")
+        return pd.DataFrame({"close": [close(asset, day) for day in index]}, index=index)
+
+
+def transaction(asset, kind, quantity, day, hours=12):
+    date = (day + pd.Timedelta(hours=hours)).isoformat() + "Z"
+    return {"asset": asset, "type": kind, "quantity": quantity, "costUsd": 0, "date": date}
+
+
+def day(offset):
+    return (START + pd.Timedelta(days=offset)).strftime("%Y-%m-%d")
+
+
+def test_daily_values_are_holdings_times_closes():
+    ledger = TransactionLedger()
+    ledger.update(
+        [
+            transaction("BTC", "Buy", 2, START - pd.Timedelta(days=10)),
+            transaction("ADA", "Buy", 100, START + pd.Timedelta(days=1)),
+            transaction("BTC", "Sell", 1, START + pd.Timedelta(days=3)),
+        ]
+    )
+    closes = Closes()
+    history = PortfolioHistory(ledger, closes, lambda assets: {"BTC": 200.0, "ADA": 2.0})
+
+    values = history.history(5)
+
+    assert values == [
+        (day(0), 2 * 100.0),
+        (day(1), 2 * 101.0 + 100 * 1.1),
+        (day(2), 2 * 102.0 + 100 * 1.2),
+        (day(3), 1 * 103.0 + 100 * 1.3),
+        # today is valued at the current quotes
+        (day(4), 1 * 200.0 + 100 * 2.0),
+    ]
+    assert sorted(closes.requests) == [("ADA", 5), ("BTC", 5)]
+
+    # the closed days are kept, a later transaction only recomputes the days from its date
+    assert history.history(5) == values
+    assert len(closes.requests) == 2
+    ledger.update(
+        [
+            transaction("BTC", "Buy", 2, START - pd.Timedelta(days=10)),
+            transaction("ADA", "Buy", 100, START + pd.Timedelta(days=1)),
+            transaction("BTC", "Sell", 1, START + pd.Timedelta(days=3)),
+            transaction("ADA", "Withdrawal", 100, START + pd.Timedelta(days=2)),
+        ]
+    )
+    assert history.history(5) == [
+        values[0],
+        values[1],
+        (day(2), 2 * 102.0),
+        (day(3), 1 * 103.0),
+        (day(4), 1 * 200.0),
+    ]
@@ -0,0 +1,75 @@
+from cardano_ticker.data_fetcher.data_plan import DataPlan, DataRequest
+from cardano_ticker.widgets.generic.w_abstract import AbstractWidget
+from cardano_ticker.widgets.w_layout import WidgetLayout
+
+
+class Source:
+    """
+    Fetcher stand-in counting its calls, failing for the keys listed in failing
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.failing = set()
+
+    def value(self, key):
+        self.calls += 1
+        if key in self.failing:
+            raise ConnectionError(f"{key} unavailable")
+        return f"{key}-{self.calls}"
+
+
+class ValueWidget(AbstractWidget):
+    def __init__(self, source, key):
+        super().__init__((10, 10))
+        self.source = source
+        self.key = key
+        self.value = None
+
+    def update(self):
+        self.value = self.source.value(self.key)
+
+    def data_requests(self):
+        return [DataRequest(self.source, "value", (self.key,))]
+
+    def update_from_plan(self, results):
+        self.value = results.value(self.data_requests()[0])
+
+    def render(self):
+        pass
+
+
+def _layout(widgets, planned):
+    layout = WidgetLayout((10 * len(widgets), 10))
+    for i, widget in enumerate(widgets):
+        layout.add_widget(widget, (10 * i, 0))
+    if planned:
+        layout.set_data_plan(DataPlan(widgets))
+    return layout
+
+
+def test_failed_request_keeps_previous_data():
+    source = Source()
+    first, second = ValueWidget(source, "a"), ValueWidget(source, "b")
+    layout = _layout([first, second], planned=True)
+
+    layout.render()
+    kept, previous = first.value, second.value
+    source.failing.add("a")
+    layout.render()
+
+    assert first.value == kept
+    assert second.value.startswith("b-") and second.value != previous
+
+
+def test_unplanned_widgets_update_through_their_requests():
+    source = Source()
+    first, second = ValueWidget(source, "a"), ValueWidget(source, "b")
+    layout = _layout([first, second], planned=False)
+
+    source.failing.add("b")
+    layout.render()
+
+    assert first.value.startswith("a-")
+    assert second.value is None
+    assert source.calls == 2